@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.blog"
+
+    def ready(self):
+        from apps.blog import caches
+        from apps.blog.models import Category, Tag
+        from djangoAdmin.utils import autocomplete
+
+        # 输入联想索引随模型变更增量刷新
+        autocomplete.register('tag', Tag, 'tag_name')
+        autocomplete.register('category', Category, 'category_name')
+
+        # 站点配置、文章列表首页的两级缓存随模型变更失效
+        caches.connect_signals()
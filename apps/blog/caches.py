@@ -0,0 +1,47 @@
+"""博客热点数据的两级缓存：站点配置、文章列表首页（不带筛选条件的第一页）
+相关模型变化时在事务提交后失效；作者昵称、头像的修改不触发失效，最多 ARTICLE_FRONT_TTL 秒后可见。
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.blog.models import Article, Category, Config, Tag
+from djangoAdmin.utils.tiered_cache import register
+
+ARTICLE_FRONT_TTL = 60
+ARTICLE_FRONT_MAX_SIZE = 100  # 更大的 pageSize 不缓存，避免键无限增长
+ARTICLE_FRONT_PARAMS = {'pageNum', 'pageSize'}
+
+config_cache = register('blog:config', ttl=3600)
+article_front_cache = register('blog:article_front', ttl=ARTICLE_FRONT_TTL, stale_ttl=5 * 60)
+
+
+def front_page_size(query_params):
+    """文章列表首页请求的 pageSize；带筛选条件或不是第一页时返回 None"""
+    if not set(query_params) <= ARTICLE_FRONT_PARAMS or query_params.get('pageNum', '1') != '1':
+        return None
+    page_size = query_params.get('pageSize', '10')
+    if not page_size.isdigit() or not 1 <= int(page_size) <= ARTICLE_FRONT_MAX_SIZE:
+        return None
+    return int(page_size)
+
+
+def invalidate_article_front():
+    transaction.on_commit(article_front_cache.invalidate)
+
+
+def on_config_change(sender, **kwargs):
+    transaction.on_commit(config_cache.invalidate)
+
+
+def on_article_change(sender, **kwargs):
+    invalidate_article_front()
+
+
+def connect_signals():
+    post_save.connect(on_config_change, sender=Config, dispatch_uid='tiered_config_save')
+    post_delete.connect(on_config_change, sender=Config, dispatch_uid='tiered_config_delete')
+    # 文章列表嵌套了分类和标签；文章标签关联批量写入不触发信号，由 ArticleViewSet 显式失效
+    for model in (Article, Category, Tag):
+        uid = f'tiered_article_front_{model._meta.model_name}'
+        post_save.connect(on_article_change, sender=model, dispatch_uid=f'{uid}_save')
+        post_delete.connect(on_article_change, sender=model, dispatch_uid=f'{uid}_delete')
@@ -0,0 +1,43 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.core.management.base import BaseCommand
+
+from apps.blog.models import Photo
+from apps.blog.photo_meta import LOAD_FIELDS, META_FIELDS, apply_metadata, extract_from_url
+
+
+class Command(BaseCommand):
+    help = '为已有照片补齐拍摄时间、尺寸、方向和主色调（多进程并行解析）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='并行解析的进程数')
+        parser.add_argument('--batch-size', type=int, default=200, help='每批处理的照片数')
+        parser.add_argument('--force', action='store_true', help='重新解析已解析过的照片')
+        parser.add_argument('--retry-failed', action='store_true', help='重新解析之前失败的照片')
+
+    def handle(self, *args, **options):
+        queryset = Photo.objects.only(*LOAD_FIELDS)
+        if not options['force']:
+            queryset = queryset.filter(meta_status__in=[0, 2] if options['retry_failed'] else [0])
+        total = queryset.count()
+        done = failed = 0
+        last_id = 0
+        # 子进程用 spawn 启动，不继承父进程的数据库连接；只负责下载和解析，不访问数据库
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=django.setup) as pool:
+            while True:
+                photos = list(queryset.filter(id__gt=last_id).order_by('id')[:options['batch_size']])
+                if not photos:
+                    break
+                results = pool.map(extract_from_url, [photo.url or '' for photo in photos])
+                for photo, meta in zip(photos, results):
+                    apply_metadata(photo, meta if photo.url else None)
+                    failed += meta is None
+                Photo.objects.bulk_update(photos, META_FIELDS)
+                done += len(photos)
+                last_id = photos[-1].id
+                self.stdout.write(f'已处理 {done}/{total}，失败 {failed}')
+        self.stdout.write(self.style.SUCCESS(f'补齐完成，共处理 {done} 张照片，失败 {failed} 张'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog.purge import RecycledPhotoPurge
+
+
+class Command(BaseCommand):
+    help = '清空照片回收站（分批删除数据库记录和 R2 对象，中断后重新执行即可继续）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=RecycledPhotoPurge.CHUNK_SIZE, help='每批处理的照片数')
+
+    def handle(self, *args, **options):
+        purge = RecycledPhotoPurge(chunk_size=options['chunk_size'])
+        started = purge.run(progress=lambda state: self.stdout.write(
+            f"已删除 {state['deleted']}/{state['total']}（last_id={state['last_id']}）"
+        ))
+        if not started:
+            raise CommandError('回收站清理任务正在进行中')
+        state = RecycledPhotoPurge.get_state()
+        if state['status'] == 'failed':
+            raise CommandError(f"清理失败: {state['error']}")
+        self.stdout.write(self.style.SUCCESS(f"清理完成，共删除 {state['deleted']} 张照片"))
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0017_remove_comment_for_id_remove_comment_parent_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="dominant_color",
+            field=models.CharField(
+                blank=True, max_length=7, null=True, verbose_name="主色调"
+            ),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="height",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="高度"
+            ),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="meta_status",
+            field=models.SmallIntegerField(
+                choices=[(0, "待解析"), (1, "已解析"), (2, "解析失败")],
+                default=0,
+                verbose_name="元数据状态",
+            ),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="orientation",
+            field=models.SmallIntegerField(
+                blank=True, null=True, verbose_name="EXIF方向"
+            ),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="taken_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="拍摄时间"),
+        ),
+        migrations.AddField(
+            model_name="photo",
+            name="width",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="宽度"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="photo",
+            index=models.Index(fields=["-taken_at", "-id"], name="photo_taken_at_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="photo",
+            index=models.Index(
+                fields=["meta_status", "id"], name="photo_meta_status_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0018_photo_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PhotoObjectOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=555, verbose_name="对象键")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="创建时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "待删除照片对象",
+                "verbose_name_plural": "待删除照片对象",
+                "db_table": "blog_photo_object_outbox",
+            },
+        ),
+    ]
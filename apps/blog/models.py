@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
 
 
 class Category(models.Model):
@@ -120,6 +122,19 @@ class Config(models.Model):
         verbose_name_plural = verbose_name
 
 
+class PhotoAlbumQuerySet(models.QuerySet):
+    def with_stats(self):
+        """附带各状态照片数量和最终封面（显式封面优先，否则取最新的正常照片），一条 SQL 完成"""
+        newest_photo = Photo.objects.filter(
+            album=OuterRef('pk'), status=1
+        ).order_by('-created_at', '-id').values('url')[:1]
+        return self.annotate(
+            normal_count=Count('photos', filter=Q(photos__status=1)),
+            recycled_count=Count('photos', filter=Q(photos__status=2)),
+            cover=Coalesce(NullIf('album_cover', Value('')), Subquery(newest_photo)),
+        )
+
+
 class PhotoAlbum(models.Model):
     STATUS_CHOICES = (
         (1, '正常'),
@@ -131,6 +146,7 @@ class PhotoAlbum(models.Model):
     album_cover = models.CharField(max_length=555, null=True, blank=True, verbose_name="相册封面")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="修改时间")
+    objects = PhotoAlbumQuerySet.as_manager()
 
     class Meta:
         db_table = 'blog_photo_album'
@@ -146,6 +162,11 @@ class Photo(models.Model):
         (1, '正常'),
         (2, '回收站')
     )
+    META_STATUS_CHOICES = (
+        (0, '待解析'),
+        (1, '已解析'),
+        (2, '解析失败')
+    )
 
     album = models.ForeignKey(
         PhotoAlbum,
@@ -157,6 +178,12 @@ class Photo(models.Model):
     )
     url = models.CharField(max_length=555, null=True, blank=True, verbose_name="图片地址")
     status = models.IntegerField(choices=STATUS_CHOICES, default=1, verbose_name="状态")
+    taken_at = models.DateTimeField(null=True, blank=True, verbose_name="拍摄时间")
+    width = models.PositiveIntegerField(null=True, blank=True, verbose_name="宽度")
+    height = models.PositiveIntegerField(null=True, blank=True, verbose_name="高度")
+    orientation = models.SmallIntegerField(null=True, blank=True, verbose_name="EXIF方向")
+    dominant_color = models.CharField(max_length=7, null=True, blank=True, verbose_name="主色调")
+    meta_status = models.SmallIntegerField(choices=META_STATUS_CHOICES, default=0, verbose_name="元数据状态")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="修改时间")
 
@@ -165,6 +192,24 @@ class Photo(models.Model):
         verbose_name = '照片管理'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-taken_at', '-id'], name='photo_taken_at_idx'),
+            models.Index(fields=['meta_status', 'id'], name='photo_meta_status_idx'),
+        ]
 
     def __str__(self):
         return f"照片 {self.id}"
+
+
+class PhotoObjectOutbox(models.Model):
+    """待删除的 R2 对象：与照片记录在同一事务中写入，对象删除成功后移除"""
+    key = models.CharField(max_length=555, verbose_name="对象键")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+
+    class Meta:
+        db_table = 'blog_photo_object_outbox'
+        verbose_name = '待删除照片对象'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,136 @@
+import logging
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from apps.blog.models import Photo
+from djangoAdmin.utils.storage import get_s3_client, object_key_from_url
+
+logger = logging.getLogger(__name__)
+
+EXIF_IFD = 0x8769
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_DATETIME_ORIGINAL = 0x9003
+FETCH_TIMEOUT = 30  # 秒
+COLOR_SAMPLE_SIZE = (64, 64)  # 计算主色调时的缩略图尺寸
+
+_executor = None
+
+
+def get_executor():
+    """照片解析线程池（进程内懒加载）"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PHOTO_META_WORKERS, thread_name_prefix='photo-meta')
+    return _executor
+
+
+def fetch_image(url):
+    """本存储桶的图片直接走 R2 接口读取，其他地址走 HTTP"""
+    if key := object_key_from_url(url):
+        return get_s3_client().get_object(Bucket=settings.CLOUDFLARE_R2_BUCKET_NAME, Key=key)['Body'].read()
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError('不支持的图片地址')
+    with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+        return response.read()
+
+
+def _parse_exif_datetime(value):
+    if not value:
+        return None
+    try:
+        taken_at = datetime.strptime(str(value).strip('\x00 '), '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+    # EXIF 时间不带时区，按站点时区解释
+    return timezone.make_aware(taken_at)
+
+
+def _dominant_color(image):
+    sample = image.convert('RGB')
+    sample.thumbnail(COLOR_SAMPLE_SIZE)
+    quantized = sample.quantize(colors=5)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def extract_metadata(data):
+    """从图片字节中解析拍摄时间、显示尺寸、方向和主色调"""
+    with Image.open(BytesIO(data)) as image:
+        width, height = image.size
+        exif = image.getexif()
+        orientation = exif.get(TAG_ORIENTATION)
+        taken_at = (_parse_exif_datetime(exif.get_ifd(EXIF_IFD).get(TAG_DATETIME_ORIGINAL))
+                    or _parse_exif_datetime(exif.get(TAG_DATETIME)))
+        if orientation in (5, 6, 7, 8):  # 旋转 90° 的方向，显示尺寸需要交换宽高
+            width, height = height, width
+        # JPEG 使用 draft 模式按比例降采样解码，计算主色调无需完整解码
+        image.draft('RGB', (COLOR_SAMPLE_SIZE[0] * 4, COLOR_SAMPLE_SIZE[1] * 4))
+        color = _dominant_color(image)
+    return {
+        'taken_at': taken_at,
+        'width': width,
+        'height': height,
+        'orientation': orientation,
+        'dominant_color': color,
+    }
+
+
+def extract_from_url(url):
+    """下载并解析单张图片，失败时返回 None（可在线程池或进程池中执行，不访问数据库）"""
+    try:
+        return extract_metadata(fetch_image(url))
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        logger.warning('照片元数据解析失败 %s: %s', url, e)
+        return None
+    except Exception:
+        logger.exception('照片元数据解析失败 %s', url)
+        return None
+
+
+def apply_metadata(photo, meta):
+    """把解析结果写到实例上；没有 EXIF 拍摄时间时以上传时间作为时间线位置"""
+    if meta is None:
+        photo.meta_status = 2
+        photo.taken_at = photo.taken_at or photo.created_at
+        return photo
+    for field, value in meta.items():
+        setattr(photo, field, value)
+    photo.taken_at = photo.taken_at or photo.created_at
+    photo.meta_status = 1
+    return photo
+
+
+META_FIELDS = ['taken_at', 'width', 'height', 'orientation', 'dominant_color', 'meta_status']
+# 解析时读取的字段：META_FIELDS 必须一并加载，否则写回时每个延迟字段都会单独查询一次
+LOAD_FIELDS = ['id', 'url', 'created_at', *META_FIELDS]
+
+
+def process_photo(photo_id):
+    try:
+        photo = Photo.objects.filter(id=photo_id).only(*LOAD_FIELDS).first()
+        if photo is None:
+            return
+        apply_metadata(photo, extract_from_url(photo.url) if photo.url else None)
+        Photo.objects.filter(id=photo.id).update(**{field: getattr(photo, field) for field in META_FIELDS})
+    finally:
+        connections.close_all()
+
+
+def schedule_extraction(photo_ids):
+    """事务提交后把新照片交给线程池解析，不阻塞上传请求"""
+    def submit():
+        executor = get_executor()
+        for photo_id in photo_ids:
+            executor.submit(process_photo, photo_id)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,141 @@
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils.timezone import now
+
+from apps.blog.models import Photo, PhotoObjectOutbox
+from djangoAdmin.utils.redis_ops import delete_if_equals
+from djangoAdmin.utils.storage import S3_TIMEOUT, delete_objects, object_key_from_url
+
+logger = logging.getLogger(__name__)
+
+
+class RecycledPhotoPurge:
+    """回收站照片后台清理任务
+    每次处理固定数量的照片：先在短事务中锁定并删除仍在回收站的记录，同一事务中把对象键写入 PhotoObjectOutbox，
+    提交后再批量删除 R2 对象并移除 outbox 记录。不会出现记录还在、图片已被删除的情况；
+    对象删除失败或进程崩溃时对象键留在 outbox 中，下次运行先删除这些对象再继续处理剩余的回收站照片。
+    进度写入缓存，进程崩溃后锁自动过期。
+    """
+    STATE_KEY = 'photo_purge:state'
+    LOCK_KEY = 'photo_purge:lock'
+    # 锁超时（秒）：每次 DeleteObjects 请求前续期，单次请求最长为连接加读取超时，留出重试的余量
+    LOCK_TIMEOUT = 5 * S3_TIMEOUT
+    STATE_TIMEOUT = 7 * 24 * 3600
+    CHUNK_SIZE = 500
+
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.lock_token = None
+
+    @classmethod
+    def get_state(cls):
+        return cache.get(cls.STATE_KEY) or {'status': 'idle', 'deleted': 0, 'total': 0}
+
+    def _save_state(self, **fields):
+        state = self.get_state()
+        state.update(fields, updated_at=now().strftime('%Y-%m-%d %H:%M:%S'))
+        cache.set(self.STATE_KEY, state, timeout=self.STATE_TIMEOUT)
+        return state
+
+    def acquire(self):
+        token = uuid.uuid4().hex
+        if not cache.add(self.LOCK_KEY, token, timeout=self.LOCK_TIMEOUT):
+            return False
+        self.lock_token = token
+        return True
+
+    def _renew(self):
+        cache.touch(self.LOCK_KEY, self.LOCK_TIMEOUT)
+
+    def release(self):
+        if self.lock_token:
+            delete_if_equals(self.LOCK_KEY, self.lock_token)
+        self.lock_token = None
+
+    def start_in_background(self):
+        """获取锁后在后台线程运行，已有任务在运行时返回 False"""
+        if not self.acquire():
+            return False
+        self._begin()
+        threading.Thread(target=self._run_and_cleanup, name='photo-purge', daemon=True).start()
+        return True
+
+    def run(self, progress=None):
+        """前台运行（管理命令使用）"""
+        if not self.acquire():
+            return False
+        self._begin()
+        self._run_and_cleanup(progress)
+        return True
+
+    def _begin(self):
+        state = self.get_state()
+        remaining = Photo.objects.filter(status=2).count()
+        if state['status'] in ('running', 'failed'):
+            # 上次任务中断：沿用已删除数量，从剩余照片继续
+            self._save_state(status='running', total=state.get('deleted', 0) + remaining, error=None)
+        else:
+            self._save_state(status='running', deleted=0, total=remaining, error=None,
+                             started_at=now().strftime('%Y-%m-%d %H:%M:%S'))
+
+    def _run_and_cleanup(self, progress=None):
+        try:
+            self._purge(progress)
+            self._save_state(status='done')
+        except Exception as e:
+            logger.exception('回收站照片清理失败')
+            self._save_state(status='failed', error=str(e))
+        finally:
+            self.release()
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    def _purge(self, progress=None):
+        # 先删除上次中断时留下的对象
+        self._drain()
+        last_id = 0
+        while True:
+            chunk = list(
+                Photo.objects.filter(status=2, id__gt=last_id).order_by('id').values_list('id', 'url')[:self.chunk_size]
+            )
+            if not chunk:
+                break
+            ids = [photo_id for photo_id, _ in chunk]
+
+            # 短事务锁定并删除本批中仍在回收站的记录，同时把要删除的对象键写入 outbox；
+            # 期间被还原的照片不会被删除，仍被其他照片引用的地址也保留
+            with transaction.atomic():
+                purged = list(Photo.objects.select_for_update().filter(id__in=ids, status=2)
+                              .values_list('id', 'url'))
+                Photo.objects.filter(id__in=[photo_id for photo_id, _ in purged]).delete()
+                urls = {url for _, url in purged if url}
+                shared = set(Photo.objects.filter(url__in=urls).values_list('url', flat=True))
+                PhotoObjectOutbox.objects.bulk_create(
+                    [PhotoObjectOutbox(key=key) for key in map(object_key_from_url, urls - shared) if key]
+                )
+            deleted = len(purged)
+            self._drain()
+
+            last_id = ids[-1]
+            state = self.get_state()
+            state = self._save_state(deleted=state.get('deleted', 0) + deleted, last_id=last_id)
+            self._renew()
+            if progress:
+                progress(state)
+
+    def _drain(self):
+        """删除 outbox 中的对象，成功后移除对应记录；失败时记录保留，下次运行继续删除"""
+        last_id = 0
+        while True:
+            pending = list(
+                PhotoObjectOutbox.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'key')[:self.chunk_size]
+            )
+            if not pending:
+                break
+            delete_objects((key for _, key in pending), before_batch=self._renew)
+            PhotoObjectOutbox.objects.filter(id__in=[outbox_id for outbox_id, _ in pending]).delete()
+            last_id = pending[-1][0]
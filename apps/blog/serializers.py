@@ -86,8 +86,16 @@ class PhotoAlbumSerializer(serializers.ModelSerializer):
         read_only_fields = ('created_at', 'updated_at')
 
 
+class PhotoAlbumListSerializer(PhotoAlbumSerializer):
+    """相册列表：附带 PhotoAlbumQuerySet.with_stats() 注解的照片数量和封面"""
+    normal_count = serializers.IntegerField(read_only=True)
+    recycled_count = serializers.IntegerField(read_only=True)
+    cover = serializers.CharField(read_only=True, allow_null=True)
+
+
 class PhotoSerializer(serializers.ModelSerializer):
     STATUS_DISPLAY = serializers.CharField(source='get_status_display', read_only=True)
+    taken_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
     created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
     updated_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
     album = PhotoAlbumSerializer(read_only=True)  # 读取时显示完整相册信息
@@ -102,7 +110,22 @@ class PhotoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Photo
         fields = [
-            'id', 'album', 'album_id', 'url', 'status', 'STATUS_DISPLAY',
-            'created_at', 'updated_at'
+            'id', 'album', 'album_id', 'url', 'status', 'STATUS_DISPLAY', 'taken_at', 'width', 'height',
+            'orientation', 'dominant_color', 'created_at', 'updated_at'
         ]
-        read_only_fields = ('created_at', 'updated_at', 'STATUS_DISPLAY')
+        read_only_fields = ('created_at', 'updated_at', 'STATUS_DISPLAY', 'taken_at', 'width', 'height',
+                            'orientation', 'dominant_color')
+
+
+class PhotoListSerializer(serializers.ModelSerializer):
+    """照片列表用的精简序列化器：只返回 album_id，相册信息在响应中按组只出现一次"""
+    STATUS_DISPLAY = serializers.CharField(source='get_status_display', read_only=True)
+    taken_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
+    created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
+    updated_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
+
+    class Meta:
+        model = Photo
+        fields = ['id', 'album_id', 'url', 'status', 'STATUS_DISPLAY', 'taken_at', 'width', 'height',
+                  'orientation', 'dominant_color', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -1,3 +1,367 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework_jwt.settings import api_settings
+
+from apps.blog.models import Article, Config, Photo, PhotoAlbum, PhotoObjectOutbox, Tag
+from apps.blog.photo_meta import EXIF_IFD, TAG_DATETIME_ORIGINAL, TAG_ORIENTATION, apply_metadata, \
+    extract_metadata, process_photo
+from apps.blog.purge import RecycledPhotoPurge
+from apps.blog.views import PhotoViewSet
+from apps.user.models import SysUser
+from djangoAdmin.utils import tiered_cache
+from djangoAdmin.utils.autocomplete import get_index
+from djangoAdmin.utils.media import RangeFileWrapper, serve_media
+from djangoAdmin.utils.pagination import CURSOR_MAX_PAGE_SIZE
+from djangoAdmin.utils.storage import public_url
+from djangoAdmin.utils.tiered_cache import Entry, TieredCache
+
+
+@override_settings(AUTOCOMPLETE_CHECK_INTERVAL=0)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ['Python', 'Django', 'python-web', 'CPython', 'Vue']:
+            Tag.objects.create(tag_name=name)
+        get_index('tag').rebuild()
+        user = SysUser.objects.create(username='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(user))
+
+    def names(self, prefix, limit=10):
+        return [item['name'] for item in get_index('tag').search(prefix, limit)]
+
+    def test_ranked_prefix_and_infix(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('python'), ['Python', 'python-web', 'CPython'])
+        self.assertEqual(self.names('PY', limit=2), ['Python', 'python-web'])
+        self.assertEqual(self.names('o'), ['Python', 'python-web', 'Django', 'CPython'])
+        self.assertEqual(self.names('xyz'), [])
+
+    def test_incremental_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(tag_name='Pydantic')
+            Tag.objects.filter(tag_name='Django').delete()
+            Tag.objects.get(tag_name='Vue').delete()
+        with self.assertNumQueries(0):
+            self.assertIn('Pydantic', self.names('pyd'))
+            self.assertEqual(self.names('vue'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.tag_name = 'FastAPI'
+            tag.save()
+        self.assertEqual(self.names('pyd'), [])
+        self.assertEqual(self.names('fast'), ['FastAPI'])
+
+    def test_endpoint(self):
+        response = self.client.get('/api/autocomplete/tag/', {'prefix': 'dj'}).json()
+        self.assertEqual(response['data'], [{'id': Tag.objects.get(tag_name='Django').id, 'name': 'Django'}])
+        self.assertEqual(self.client.get('/api/autocomplete/unknown/').status_code, 404)
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.cache = TieredCache('test', ttl=60)
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_local_tier_and_invalidation(self):
+        self.assertEqual(self.cache.get('k', self.compute), 1)
+        self.assertEqual(self.cache.get('k', self.compute), 1)
+        self.assertEqual(self.cache.stats['local_hits'], 1)
+        # 其他进程：本地为空，从共享层读取
+        other = TieredCache('test', ttl=60)
+        self.assertEqual(other.get('k', self.compute), 1)
+        self.assertEqual(other.stats['shared_hits'], 1)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get('k', self.compute), 2)
+
+    def put_expired(self, value):
+        entry = Entry(value, time.time() - 61, 60, 60, 0.01)
+        cache.set(self.cache._shared_key('k'), entry)
+        return entry
+
+    def test_stale_while_revalidate(self):
+        self.put_expired('stale')
+        # 另一个进程持有重建锁：直接返回陈旧值
+        cache.add(tiered_cache.LOCK_KEY.format('test', 'k'), 'other')
+        self.assertEqual(self.cache.get('k', self.compute), 'stale')
+        self.assertEqual(self.calls, 0)
+        # 锁释放后由当前调用方重建
+        cache.delete(tiered_cache.LOCK_KEY.format('test', 'k'))
+        self.assertEqual(self.cache.get('k', self.compute), 1)
+
+    def test_single_flight_in_process(self):
+        self.put_expired('stale')
+        self.cache._flights['k'] = mock.Mock()  # 本进程已有线程在重建
+        self.assertEqual(self.cache.get('k', self.compute), 'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_expiration(self):
+        fresh = Entry('v', time.time() - 50, 60, 60, 0.001)
+        slow = Entry('v', time.time() - 50, 60, 60, 30)
+        with mock.patch('djangoAdmin.utils.tiered_cache.random.random', return_value=0.5):
+            self.assertTrue(tiered_cache._fresh(fresh, time.time()))
+            # 计算耗时 30 秒，剩余 10 秒时提前重建
+            self.assertFalse(tiered_cache._fresh(slow, time.time()))
+
+
+class HotDataCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.user = SysUser.objects.create(username='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(self.user))
+        for index in range(3):
+            Article.objects.create(article_title=f'article{index}', author=self.user, article_content='content',
+                                   article_description='description')
+
+    def test_article_front_page(self):
+        self.assertEqual(self.client.get('/api/blog/articles/').json()['total'], 3)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/blog/articles/', {'pageNum': 1, 'pageSize': 10}).json()
+        self.assertEqual(len(response['articleList']), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(article_title='new', author=self.user, article_content='content',
+                                   article_description='description')
+        self.assertEqual(self.client.get('/api/blog/articles/').json()['total'], 4)
+        # 带筛选条件的请求不走缓存
+        with self.assertNumQueries(3):
+            self.client.get('/api/blog/articles/', {'article_title': 'new'})
+
+    def test_config_list(self):
+        config = Config.objects.create(blog_name='blog')
+        self.assertEqual(self.client.get('/api/blog/configs/').json()[0]['blog_name'], 'blog')
+        with self.captureOnCommitCallbacks(execute=True):
+            config.blog_name = 'renamed'
+            config.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/blog/configs/').json()[0]['blog_name'], 'renamed')
+        with self.assertNumQueries(0):
+            self.client.get('/api/blog/configs/')
+
+
+class RecycledPhotoPurgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        album = PhotoAlbum.objects.create(album_name='album')
+        self.recycled = [Photo.objects.create(album=album, url=public_url(f'photos/{index}.jpg'), status=2)
+                         for index in range(3)]
+        # 与回收站照片共用地址的正常照片
+        Photo.objects.create(album=album, url=self.recycled[0].url, status=1)
+
+    def test_deletes_rows_then_unshared_objects(self):
+        with mock.patch('apps.blog.purge.delete_objects') as delete_objects:
+            self.assertTrue(RecycledPhotoPurge(chunk_size=2).run())
+        keys = [key for call in delete_objects.call_args_list for key in call.args[0]]
+        self.assertEqual(keys, ['photos/1.jpg', 'photos/2.jpg'])
+        self.assertFalse(Photo.objects.filter(status=2).exists())
+        self.assertEqual(RecycledPhotoPurge.get_state()['deleted'], 3)
+        self.assertIsNone(cache.get(RecycledPhotoPurge.LOCK_KEY))
+
+    def test_photo_restored_mid_chunk_keeps_object(self):
+        restored = self.recycled[1]
+
+        def atomic():
+            # 读取本批之后、删除之前照片被还原
+            Photo.objects.filter(id=restored.id).update(status=1)
+            return transaction.atomic()
+
+        with mock.patch('apps.blog.purge.delete_objects') as delete_objects, \
+                mock.patch('apps.blog.purge.transaction', mock.Mock(atomic=atomic)):
+            RecycledPhotoPurge().run()
+        keys = [key for call in delete_objects.call_args_list for key in call.args[0]]
+        self.assertEqual(keys, ['photos/2.jpg'])
+        self.assertTrue(Photo.objects.filter(id=restored.id, status=1).exists())
+
+    def test_failed_object_delete_is_retried(self):
+        with mock.patch('apps.blog.purge.delete_objects', side_effect=RuntimeError('R2 error')):
+            RecycledPhotoPurge().run()
+        self.assertEqual(RecycledPhotoPurge.get_state()['status'], 'failed')
+        # 记录已删除，对象键留在 outbox 中
+        self.assertFalse(Photo.objects.filter(status=2).exists())
+        self.assertEqual(sorted(PhotoObjectOutbox.objects.values_list('key', flat=True)),
+                         ['photos/1.jpg', 'photos/2.jpg'])
+
+        with mock.patch('apps.blog.purge.delete_objects') as delete_objects:
+            self.assertTrue(RecycledPhotoPurge().run())
+        keys = [key for call in delete_objects.call_args_list for key in call.args[0]]
+        self.assertEqual(sorted(keys), ['photos/1.jpg', 'photos/2.jpg'])
+        self.assertFalse(PhotoObjectOutbox.objects.exists())
+        self.assertEqual(RecycledPhotoPurge.get_state()['status'], 'done')
+
+
+class PhotoCursorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = SysUser.objects.create(username='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(user))
+        album = PhotoAlbum.objects.create(album_name='album')
+        Photo.objects.bulk_create([Photo(album=album, url=f'https://example.com/{index}.jpg') for index in range(5)])
+
+    def test_total_only_on_first_page(self):
+        first = self.client.get('/api/blog/photos/', {'limit': 2}).json()
+        self.assertEqual((first['total'], len(first['photoList'])), (5, 2))
+        with self.assertNumQueries(1):  # 只有取本页的查询，没有 COUNT(*)
+            second = self.client.get('/api/blog/photos/', {'limit': 2, 'cursor': first['nextCursor']}).json()
+        self.assertIsNone(second['total'])
+        self.assertEqual(len(second['photoList']), 2)
+
+    def test_limits_are_clamped(self):
+        album = PhotoAlbum.objects.get()
+        Photo.objects.bulk_create([Photo(album=album, url=f'https://example.com/more-{index}.jpg')
+                                   for index in range(CURSOR_MAX_PAGE_SIZE)])
+        response = self.client.get('/api/blog/photos/', {'limit': 1000000}).json()
+        self.assertEqual(len(response['photoList']), CURSOR_MAX_PAGE_SIZE)
+        response = self.client.get('/api/blog/photos/', {'group': 'album', 'photoLimit': 1000000}).json()
+        self.assertEqual(len(response['groupList'][0]['photoList']), PhotoViewSet.GROUP_PHOTO_MAX_LIMIT)
+
+
+class PhotoMetaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = SysUser.objects.create(username='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(user))
+        self.album = PhotoAlbum.objects.create(album_name='album')
+
+    @staticmethod
+    def jpeg(size=(40, 20), color=(200, 30, 30), orientation=None, taken_at=None):
+        exif = Image.Exif()
+        if orientation:
+            exif[TAG_ORIENTATION] = orientation
+        if taken_at:
+            exif.get_ifd(EXIF_IFD)[TAG_DATETIME_ORIGINAL] = taken_at
+        buffer = BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG', exif=exif)
+        return buffer.getvalue()
+
+    def test_extract_metadata(self):
+        meta = extract_metadata(self.jpeg(orientation=6, taken_at='2024:05:06 07:08:09'))
+        # 方向 6 需要旋转 90°，显示尺寸交换宽高
+        self.assertEqual((meta['width'], meta['height'], meta['orientation']), (20, 40, 6))
+        self.assertEqual(meta['taken_at'], timezone.make_aware(datetime(2024, 5, 6, 7, 8, 9)))
+        red, green, blue = (int(meta['dominant_color'][i:i + 2], 16) for i in (1, 3, 5))
+        self.assertTrue(red > 180 and green < 60 and blue < 60)
+
+        meta = extract_metadata(self.jpeg())
+        self.assertEqual((meta['width'], meta['height'], meta['orientation'], meta['taken_at']), (40, 20, None, None))
+
+    def test_apply_metadata(self):
+        photo = Photo.objects.create(album=self.album, url='https://example.com/a.jpg')
+        apply_metadata(photo, None)
+        self.assertEqual((photo.meta_status, photo.taken_at), (2, photo.created_at))
+
+        photo = Photo.objects.create(album=self.album, url='https://example.com/b.jpg')
+        taken_at = timezone.now() - timedelta(days=30)
+        apply_metadata(photo, {'taken_at': taken_at, 'width': 3, 'height': 4, 'orientation': 1,
+                               'dominant_color': '#000000'})
+        self.assertEqual((photo.meta_status, photo.taken_at, photo.width), (1, taken_at, 3))
+
+    def test_process_photo_writes_back_in_one_update(self):
+        photo = Photo.objects.create(album=self.album, url='https://example.com/a.jpg')
+        with mock.patch('apps.blog.photo_meta.extract_from_url', return_value=None), \
+                mock.patch('apps.blog.photo_meta.connections'), self.assertNumQueries(2):
+            process_photo(photo.id)
+        photo.refresh_from_db()
+        self.assertEqual((photo.meta_status, photo.taken_at), (2, photo.created_at))
+
+    def test_timeline_order_and_cursor(self):
+        base = timezone.make_aware(datetime(2024, 3, 15, 12))
+        photos = [Photo.objects.create(album=self.album, url=f'https://example.com/{days}.jpg',
+                                       taken_at=base - timedelta(days=days)) for days in (0, 20, 40, 40)]
+        Photo.objects.create(album=self.album, url='https://example.com/recycled.jpg', status=2, taken_at=base)
+        Photo.objects.create(album=self.album, url='https://example.com/pending.jpg')  # 尚未解析，没有拍摄时间
+
+        first = self.client.get('/api/blog/photos/timeline/', {'limit': 3}).json()
+        self.assertEqual([(month['month'], [photo['id'] for photo in month['photoList']]) for month in first['timeline']],
+                         [('2024-03', [photos[0].id]), ('2024-02', [photos[1].id, photos[3].id])])
+        second = self.client.get('/api/blog/photos/timeline/', {'limit': 3, 'cursor': first['nextCursor']}).json()
+        # 拍摄时间相同的照片按 id 倒序，跨页时同一个月出现在相邻两页
+        self.assertEqual(second['timeline'], [{'month': '2024-02', 'photoList': second['timeline'][0]['photoList']}])
+        self.assertEqual([photo['id'] for photo in second['timeline'][0]['photoList']], [photos[2].id])
+        self.assertIsNone(second['nextCursor'])
+
+
+class ServeMediaTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.body = bytes(range(256)) * 4
+        with open(os.path.join(self.root, 'a.jpg'), 'wb') as file:
+            file.write(self.body)
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        response = serve_media(self.factory.get('/api/media/a.jpg', **headers), 'a.jpg', document_root=self.root)
+        self.addCleanup(response.close)
+        return response
+
+    @staticmethod
+    def content(response):
+        return b''.join(response.streaming_content)
+
+    def test_full_body(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.body)
+        self.assertEqual((response['Accept-Ranges'], response['Content-Type']), ('bytes', 'image/jpeg'))
+
+    def test_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+        self.assertEqual(self.content(response), self.body[10:20])
+        # bytes=-N 为最后 N 个字节
+        response = self.get(HTTP_RANGE='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.content(response), self.body[-5:])
+        response = self.get(HTTP_RANGE=f'bytes={len(self.body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.body)}')
+
+    def test_if_range_mismatch_returns_full_body(self):
+        response = self.get(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.body)
+
+    def test_not_modified(self):
+        response = self.get()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_close_mid_stream(self):
+        with open(os.path.join(self.root, 'a.jpg'), 'rb') as file:
+            wrapper = RangeFileWrapper(file, 0, len(self.body) - 1, chunk_size=100)
+            chunks = iter(wrapper)
+            next(chunks)
+            wrapper.close()
+            self.assertTrue(wrapper.mapped.closed)
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/a.jpg')
+        self.assertNotIn('Content-Type', response)
+
+    @override_settings(MEDIA_OFFLOAD='x-sendfile')
+    def test_sendfile(self):
+        response = self.get()
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.root, 'a.jpg'))
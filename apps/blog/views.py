@@ -1,21 +1,30 @@
 import random
+from collections import defaultdict
+
 from apps.user.models import SysUser
+from apps.user.username_index import username_exists
 from django.db import IntegrityError
-from django.utils.timezone import now
+from django.utils.timezone import now, localtime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Q, Count, F, Window
+from django.db.models.functions import RowNumber
+from apps.blog.caches import article_front_cache, config_cache, front_page_size, invalidate_article_front
 from apps.blog.models import Article, Category, Tag, ArticleTag, Photo, PhotoAlbum, Config, Comment
+from apps.blog.photo_meta import schedule_extraction
+from apps.blog.purge import RecycledPhotoPurge
+from apps.statistics.counters import PHOTO_STATUS_METRICS, apply_deltas
 from apps.blog.serializers import ArticleSerializer, CategorySerializer, TagSerializer, PhotoSerializer, \
-    PhotoAlbumSerializer, ConfigSerializer, CommentSerializer
-from djangoAdmin.utils.pagination import paginate_queryset
+    PhotoAlbumSerializer, ConfigSerializer, CommentSerializer, PhotoListSerializer, PhotoAlbumListSerializer
+from djangoAdmin.utils.pagination import paginate_queryset, cursor_paginate, encode_cursor
 
 
 # Create your views here.
 
 class ArticleViewSet(viewsets.ModelViewSet):
-    queryset = Article.objects.all()
+    # 作者、分类 JOIN 一次，标签一次预取，序列化时不再逐条查询
+    queryset = Article.objects.select_related('author', 'category').prefetch_related('tags')
     serializer_class = ArticleSerializer
 
     def list(self, request, *args, **kwargs):
@@ -77,18 +86,21 @@ class ArticleViewSet(viewsets.ModelViewSet):
                 return Response({'code': 400, 'errorInfo': 'status参数错误！'}, status=status.HTTP_400_BAD_REQUEST)
         queryset = queryset.filter(conditions).distinct()
         # 优化查询性能
-        queryset = queryset.select_related('category').prefetch_related('tags').order_by('is_top', 'id')
-        try:
-            page, total = paginate_queryset(queryset, request.query_params.get('pageNum', 1),
-                                            request.query_params.get('pageSize', 10))
+        queryset = queryset.order_by('is_top', 'id')
+
+        def load_page(page_num, page_size):
+            page, total = paginate_queryset(queryset, page_num, page_size)
             # ✅ 使用序列化器处理分页数据
             serializer = self.get_serializer(page.object_list, many=True)
+            return {'total': total, 'articleList': list(serializer.data)}
 
-            return Response({
-                'code': 200,
-                'total': total,
-                'articleList': serializer.data,  # 包含完整序列化数据
-            })
+        try:
+            # 不带筛选条件的第一页（博客首页）走两级缓存
+            if page_size := front_page_size(query_params):
+                data = article_front_cache.get(page_size, lambda: load_page(1, page_size))
+            else:
+                data = load_page(query_params.get('pageNum', 1), query_params.get('pageSize', 10))
+            return Response({'code': 200, **data})
         except ValueError as e:
             return Response({'code': 404, 'errorInfo': str(e)}, status=404)
         except Exception as e:
@@ -134,13 +146,8 @@ class ArticleViewSet(viewsets.ModelViewSet):
         article_id = response.data.get('id')
 
         # 处理 tags 数组并存储到 article_tag 表
-        tagids = request.data.get('tags', [])
-        for tag_id in tagids:
-            try:
-                ArticleTag.objects.create(article_id=article_id, tag_id=tag_id)
-            except Tag.DoesNotExist:
-                return Response({'code': 404, 'errorInfo': f'标签 {tag_id} 不存在！'},
-                                status=status.HTTP_404_NOT_FOUND)
+        if error := self._save_tags(article_id, request.data.get('tags', [])):
+            return error
 
         return response
 
@@ -162,15 +169,21 @@ class ArticleViewSet(viewsets.ModelViewSet):
         ArticleTag.objects.filter(article_id=article_id).delete()
 
         # 处理 tags 数组并存储到 article_tag 表
-        tagids = request.data.get('tags', [])
-        for tag_id in tagids:
-            try:
-                ArticleTag.objects.create(article_id=article_id, tag_id=tag_id)
-            except Tag.DoesNotExist:
-                return Response({'code': 404, 'errorInfo': f'标签 {tag_id} 不存在！'},
-                                status=status.HTTP_404_NOT_FOUND)
+        if error := self._save_tags(article_id, request.data.get('tags', [])):
+            return error
         return response
 
+    @staticmethod
+    def _save_tags(article_id, tag_ids):
+        """一次查询校验标签、一次批量插入关联，SQL 条数与标签数量无关"""
+        existing = {str(pk) for pk in Tag.objects.filter(id__in=tag_ids).values_list('id', flat=True)}
+        if missing := [tag_id for tag_id in tag_ids if str(tag_id) not in existing]:
+            return Response({'code': 404, 'errorInfo': f'标签 {missing[0]} 不存在！'},
+                            status=status.HTTP_404_NOT_FOUND)
+        ArticleTag.objects.bulk_create([ArticleTag(article_id=article_id, tag_id=tag_id) for tag_id in tag_ids])
+        invalidate_article_front()
+        return None
+
     @action(methods=['get'], detail=True, url_path='adjacent-articles')
     def adjacent_articles(self, request, pk=None):
         try:
@@ -181,8 +194,8 @@ class ArticleViewSet(viewsets.ModelViewSet):
             # 获取基准排序字段值
         current_id = current_article.id
 
-        # 构建排序条件（按id升序）
-        base_queryset = Article.objects.all().order_by('id')
+        # 构建排序条件（按id升序），沿用视图的关联预取
+        base_queryset = self.get_queryset().order_by('id')
 
         # 获取上一篇（id更小的最大文章）
         prev_article = base_queryset.filter(id__lt=current_id).order_by('-id').first()
@@ -297,12 +310,17 @@ class TagViewSet(viewsets.ModelViewSet):
 
 
 class PhotoViewSet(viewsets.ModelViewSet):
-    queryset = Photo.objects.all()
+    queryset = Photo.objects.select_related('album')  # PhotoSerializer 嵌套完整相册信息
     serializer_class = PhotoSerializer
 
+    PHOTO_CURSOR_PAGE_SIZE = 50  # 未传分页参数时每批返回的照片数（游标分页）
+    GROUP_PHOTO_LIMIT = 12  # 分组模式下每个相册附带的照片数
+    GROUP_PHOTO_MAX_LIMIT = 50  # photoLimit 上限
+
     def list(self, request, *args, **kwargs):
         # 基础查询集
         queryset = self.filter_queryset(self.get_queryset())
+        album_name = None
 
         # ✅ 公共过滤条件（移到分页判断前）
         if album_id := request.query_params.get('albumId'):
@@ -315,6 +333,7 @@ class PhotoViewSet(viewsets.ModelViewSet):
                                 status=status.HTTP_404_NOT_FOUND)
 
         # ✅ 状态过滤（公共逻辑）
+        status_value = None
         if status_param := request.query_params.get('status'):
             try:
                 status_value = int(status_param)
@@ -327,31 +346,117 @@ class PhotoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-        # ✅ 公共排序逻辑
-        queryset = queryset.order_by('-created_at')
+        try:
+            # 分组模式：相册信息 + 每个相册的一页照片
+            if request.query_params.get('group') == 'album':
+                return self._grouped_list(request, queryset, album_id, status_value)
+
+            # 相册只 JOIN 一次，不再逐条查询
+            queryset = queryset.select_related('album')
+            next_cursor = None
+            if request.query_params.get('pageNum') or request.query_params.get('pageSize'):
+                # 原有分页逻辑
+                page_num = int(request.query_params.get('pageNum', 1))
+                page_size = int(request.query_params.get('pageSize', 10))
+                page, total = paginate_queryset(queryset.order_by('-created_at', '-id'), page_num, page_size)
+                photos = page.object_list
+            else:
+                # 游标分页，避免一次序列化整张表
+                cursor = request.query_params.get('cursor')
+                photos, next_cursor = cursor_paginate(
+                    queryset, cursor, request.query_params.get('limit', self.PHOTO_CURSOR_PAGE_SIZE)
+                )
+                # 总数只在第一页计算，后续翻页不再执行 COUNT(*)
+                total = None if cursor else queryset.count()
+        except ValueError as e:
+            return Response({'code': 400, 'errorInfo': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 分页判断
-        if not request.query_params.get('pageNum') and not request.query_params.get('pageSize'):
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({
-                'code': 200,
-                'total': len(queryset),
-                'photoList': serializer.data,  # ✅ 保持字段名一致
-                'albumName': album_name if album_id else None  # ✅ 安全获取相册名
-            })
-        else:
-            # 原有分页逻辑
-            page_num = int(request.query_params.get('pageNum', 1))
-            page_size = int(request.query_params.get('pageSize', 10))
-            page, total = paginate_queryset(queryset, page_num, page_size)
-            serializer = self.get_serializer(page.object_list, many=True)
-            return Response({
-                'code': 200,
-                'total': total,
-                'photoList': serializer.data,
-                'albumName': album_name if album_id else None
+        return Response({
+            'code': 200,
+            'total': total,
+            'photoList': PhotoListSerializer(photos, many=True).data,
+            'albumList': self._album_headers(photos),  # 每个相册只出现一次
+            'nextCursor': next_cursor,
+            'albumName': album_name  # ✅ 安全获取相册名
+        })
+
+    @action(methods=['get'], detail=False, url_path='timeline')
+    def timeline(self, request):
+        """按拍摄时间倒序的照片时间线，按月分组，游标走 (taken_at, id) 索引"""
+        queryset = Photo.objects.filter(status=1, taken_at__isnull=False)
+        if album_id := request.query_params.get('albumId'):
+            queryset = queryset.filter(album_id=album_id)
+        try:
+            photos, next_cursor = cursor_paginate(
+                queryset, request.query_params.get('cursor'),
+                request.query_params.get('limit', self.PHOTO_CURSOR_PAGE_SIZE),
+                ordering=('-taken_at', '-id')
+            )
+        except ValueError as e:
+            return Response({'code': 400, 'errorInfo': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        months = []
+        serialized = PhotoListSerializer(photos, many=True).data
+        for photo, data in zip(photos, serialized):
+            month = localtime(photo.taken_at).strftime('%Y-%m')
+            if not months or months[-1]['month'] != month:
+                months.append({'month': month, 'photoList': []})
+            months[-1]['photoList'].append(data)
+
+        return Response({
+            'code': 200,
+            'timeline': months,  # 跨页时同一个月可能出现在相邻两页，前端按 month 合并
+            'nextCursor': next_cursor,
+        })
+
+    def _album_headers(self, photos):
+        """按出现顺序去重当前页照片所属的相册"""
+        albums = {photo.album_id: photo.album for photo in photos if photo.album_id}
+        return PhotoAlbumSerializer(list(albums.values()), many=True).data
+
+    def _grouped_list(self, request, queryset, album_id, status_value):
+        """分组模式：相册分页 + 每个相册前 N 张照片，查询次数固定（计数、相册、照片各一次）"""
+        page_num = int(request.query_params.get('pageNum', 1))
+        page_size = int(request.query_params.get('pageSize', 10))
+        photo_limit = min(max(1, int(request.query_params.get('photoLimit', self.GROUP_PHOTO_LIMIT))),
+                          self.GROUP_PHOTO_MAX_LIMIT)
+
+        photo_filter = Q(photos__status=status_value) if status_value else Q()
+        albums = PhotoAlbum.objects.annotate(photo_total=Count('photos', filter=photo_filter))
+        if album_id:
+            albums = albums.filter(id=album_id)
+        page, total = paginate_queryset(albums.order_by('-created_at', '-id'), page_num, page_size)
+        album_list = list(page.object_list)
+
+        # 窗口函数按相册取前 N 张，一条 SQL 拿到所有分组的照片
+        photos = queryset.filter(album_id__in=[album.id for album in album_list]).annotate(
+            row_num=Window(RowNumber(), partition_by=F('album_id'),
+                           order_by=[F('created_at').desc(), F('id').desc()])
+        ).filter(row_num__lte=photo_limit).order_by('album_id', '-created_at', '-id')
+        grouped = defaultdict(list)
+        for photo in photos:
+            grouped[photo.album_id].append(photo)
+
+        group_list = []
+        for album in album_list:
+            album_photos = grouped.get(album.id, [])
+            next_cursor = None
+            if album.photo_total > len(album_photos):
+                # 继续翻页时带上 albumId 和该游标请求普通列表即可
+                next_cursor = encode_cursor([album_photos[-1].created_at, album_photos[-1].id])
+            group_list.append({
+                'album': PhotoAlbumSerializer(album).data,
+                'total': album.photo_total,
+                'photoList': PhotoListSerializer(album_photos, many=True).data,
+                'nextCursor': next_cursor,
             })
 
+        return Response({
+            'code': 200,
+            'total': total,
+            'groupList': group_list,
+        })
+
     def create(self, request, *args, **kwargs):
         try:
             # 获取 album_id 和 urls 列表
@@ -376,6 +481,7 @@ class PhotoViewSet(viewsets.ModelViewSet):
                                 status=status.HTTP_404_NOT_FOUND)
 
             # 批量创建照片
+            photo_ids = []
             for url in urls:
                 photo_data = {
                     'url': url,
@@ -383,6 +489,10 @@ class PhotoViewSet(viewsets.ModelViewSet):
                 }
                 photo = Photo(**photo_data)
                 photo.save()
+                photo_ids.append(photo.id)
+
+            # 拍摄时间、尺寸、主色调在后台线程池中解析
+            schedule_extraction(photo_ids)
 
             return Response({
                 'code': 200,
@@ -426,26 +536,33 @@ class PhotoViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'code': 400, 'errorInfo': 'status参数应为1（正常）或2（回收站）'},
                             status=status.HTTP_400_BAD_REQUEST)
-        # 更新照片状态
-        if status_param == 1:
-            Photo.objects.filter(id__in=photo_ids).update(status=2)
-        else:
-            Photo.objects.filter(id__in=photo_ids).update(status=1)
+        # 更新照片状态（只有状态为 status_param 的照片会变化，其余照片已经是目标状态）
+        target = 2 if status_param == 1 else 1
+        changed = Photo.objects.filter(id__in=photo_ids, status=status_param).update(status=target)
+        # 批量 update 不触发模型信号，显式调整统计计数器
+        apply_deltas({PHOTO_STATUS_METRICS[status_param]: -changed, PHOTO_STATUS_METRICS[target]: changed})
         return Response({'code': 200, 'info': '状态修改成功！'}, status=status.HTTP_200_OK)
 
     @action(methods=['delete'], detail=False, url_path='delete-recycled')
     def delete_recycled(self, request):
-        """删除所有在回收站的照片"""
+        """清空回收站：启动后台分批删除任务（同时删除 R2 中的图片对象）"""
         try:
-            # 获取所有状态为回收站的照片
-            recycled_photos = Photo.objects.filter(status=2)
-            # 删除这些照片
-            recycled_photos.delete()
-            return Response({'code': 200, 'info': '回收站照片删除成功！'}, status=status.HTTP_200_OK)
+            purge = RecycledPhotoPurge()
+            if not purge.start_in_background():
+                return Response({'code': 400, 'errorInfo': '回收站清理任务正在进行中',
+                                 'job': RecycledPhotoPurge.get_state()},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response({'code': 200, 'info': '回收站清理任务已启动！', 'job': RecycledPhotoPurge.get_state()},
+                            status=status.HTTP_202_ACCEPTED)
         except Exception as e:
             return Response({'code': 500, 'errorInfo': f'删除回收站照片时出错: {str(e)}'},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(methods=['get'], detail=False, url_path='delete-recycled/status')
+    def delete_recycled_status(self, request):
+        """查询回收站清理任务进度"""
+        return Response({'code': 200, 'job': RecycledPhotoPurge.get_state()})
+
 
 class PhotoAlbumViewSet(viewsets.ModelViewSet):
     queryset = PhotoAlbum.objects.all()
@@ -456,8 +573,8 @@ class PhotoAlbumViewSet(viewsets.ModelViewSet):
         page_num = int(request.query_params.get('pageNum', 1))
         page_size = int(request.query_params.get('pageSize', 10))
 
-        # 基础查询集
-        queryset = self.filter_queryset(self.get_queryset())
+        # 基础查询集（照片数量和封面在同一条 SQL 中注解）
+        queryset = self.filter_queryset(self.get_queryset()).with_stats()
 
         # 添加排序（按创建时间倒序）
         queryset = queryset.order_by('-created_at')
@@ -467,7 +584,7 @@ class PhotoAlbumViewSet(viewsets.ModelViewSet):
             page, total = paginate_queryset(queryset, page_num, page_size)
 
             # 序列化数据
-            serializer = self.get_serializer(page.object_list, many=True)
+            serializer = PhotoAlbumListSerializer(page.object_list, many=True)
 
             return Response({
                 'code': 200,
@@ -503,9 +620,13 @@ class ConfigViewSet(viewsets.ModelViewSet):
     queryset = Config.objects.all()
     serializer_class = ConfigSerializer
 
+    def list(self, request, *args, **kwargs):
+        # 每个页面都会读取站点配置，走两级缓存；Config 保存、删除时失效
+        return Response(config_cache.get('all', lambda: list(self.get_serializer(self.get_queryset(), many=True).data)))
+
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('from_user')  # CommentSerializer 嵌套评论人
     serializer_class = CommentSerializer
 
     @action(methods=['get'], detail=False, url_path='message-list')
@@ -516,7 +637,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         end_time = request.query_params.get('end_time')
 
         # 构建基础查询集（留言类型=3）
-        queryset = Comment.objects.filter(comment_type=3).order_by('-created_at')
+        queryset = self.get_queryset().filter(comment_type=3).order_by('-created_at')
 
         # 构建过滤条件
         conditions = Q()
@@ -588,7 +709,7 @@ class CommentViewSet(viewsets.ModelViewSet):
             while True:
                 random_suffix = str(random.randint(100, 999)).zfill(3)
                 guest_username = f'游客{random_suffix}'
-                if not SysUser.objects.filter(username=guest_username).exists():
+                if not username_exists(guest_username):
                     break
             guest_user = SysUser.objects.create(
                 username=guest_username,
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.menu.models import SysMenuClosure
+from apps.menu.services import invalidate_menus
+
+
+class Command(BaseCommand):
+    help = '根据 sys_menu.parent_id 全量重建菜单闭包表（绕过模型直接修改数据库后使用）'
+
+    def handle(self, *args, **options):
+        count = SysMenuClosure.objects.rebuild()
+        invalidate_menus()
+        self.stdout.write(self.style.SUCCESS(f'闭包表重建完成，共 {count} 条关联'))
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    SysMenu = apps.get_model("menu", "SysMenu")
+    SysMenuClosure = apps.get_model("menu", "SysMenuClosure")
+    parents = dict(SysMenu.objects.values_list("id", "parent_id"))
+    links = []
+    for menu_id in parents:
+        current, depth, seen = menu_id, 0, set()
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            links.append(
+                SysMenuClosure(ancestor_id=current, descendant_id=menu_id, depth=depth)
+            )
+            current, depth = parents[current], depth + 1
+    SysMenuClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("menu", "0009_alter_sysmenu_parent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SysMenuClosure",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("depth", models.IntegerField(default=0, verbose_name="层级差")),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="menu.sysmenu",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="menu.sysmenu",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "sys_menu_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="menu_closure_descendant_idx",
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Prefetch
 from rest_framework import serializers
 
@@ -43,6 +43,92 @@ class SysMenu(models.Model):
         db_table = "sys_menu"
         ordering = ["order_num"]
 
+    def save(self, *args, **kwargs):
+        """保存时同步维护闭包表：新建插入祖先链，修改父菜单时整体移动子树"""
+        with transaction.atomic():
+            if self._state.adding:
+                super().save(*args, **kwargs)
+                SysMenuClosure.objects.insert_node(self.pk, self.parent_id)
+                return
+            old_parent_id = SysMenu.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            moved = old_parent_id != self.parent_id
+            if moved and self.parent_id and SysMenuClosure.objects.is_descendant(self.parent_id, self.pk):
+                raise ValueError('不能将菜单移动到自身或其子菜单下')
+            super().save(*args, **kwargs)
+            if moved:
+                SysMenuClosure.objects.move_subtree(self.pk, self.parent_id)
+
+
+class SysMenuClosureQuerySet(models.QuerySet):
+    def descendant_ids(self, menu_id, include_self=True):
+        """子树内全部菜单ID（一次索引查询）"""
+        queryset = self.filter(ancestor_id=menu_id)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return list(queryset.values_list('descendant_id', flat=True))
+
+    def ancestor_ids(self, menu_ids, include_self=True):
+        """一组菜单的全部祖先ID（一次索引查询），menu_ids 可以是子查询"""
+        queryset = self.filter(descendant_id__in=menu_ids)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return set(queryset.values_list('ancestor_id', flat=True))
+
+    def is_descendant(self, menu_id, ancestor_id):
+        """menu_id 是否位于 ancestor_id 的子树中（含自身），用于写入时拒绝成环"""
+        return self.filter(ancestor_id=ancestor_id, descendant_id=menu_id).exists()
+
+    def insert_node(self, menu_id, parent_id):
+        links = [SysMenuClosure(ancestor_id=menu_id, descendant_id=menu_id, depth=0)]
+        if parent_id:
+            links += [SysMenuClosure(ancestor_id=ancestor_id, descendant_id=menu_id, depth=depth + 1)
+                      for ancestor_id, depth in self.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')]
+        self.bulk_create(links)
+
+    def move_subtree(self, menu_id, new_parent_id):
+        subtree = list(self.filter(ancestor_id=menu_id).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        # 断开子树与原祖先之间的关联，子树内部关系保持不变
+        self.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if new_parent_id:
+            ancestors = list(self.filter(descendant_id=new_parent_id).values_list('ancestor_id', 'depth'))
+            self.bulk_create([
+                SysMenuClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+                for ancestor_id, up in ancestors
+                for descendant_id, down in subtree
+            ])
+
+    def rebuild(self):
+        """根据 parent_id 全量重建闭包表"""
+        parents = dict(SysMenu.objects.values_list('id', 'parent_id'))
+        links = []
+        for menu_id in parents:
+            current, depth, seen = menu_id, 0, set()
+            while current is not None and current in parents and current not in seen:
+                seen.add(current)
+                links.append(SysMenuClosure(ancestor_id=current, descendant_id=menu_id, depth=depth))
+                current, depth = parents[current], depth + 1
+        with transaction.atomic():
+            self.all().delete()
+            self.bulk_create(links, batch_size=1000)
+        return len(links)
+
+
+# 菜单层级闭包表：每对 (祖先, 后代) 一行，depth 为层级差，自身 depth=0
+class SysMenuClosure(models.Model):
+    id = models.AutoField(primary_key=True)
+    ancestor = models.ForeignKey(SysMenu, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(SysMenu, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.IntegerField(default=0, verbose_name="层级差")
+    objects = SysMenuClosureQuerySet.as_manager()
+
+    class Meta:
+        db_table = "sys_menu_closure"
+        unique_together = ('ancestor', 'descendant')
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='menu_closure_descendant_idx'),
+        ]
+
 
 class SysMenuSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
@@ -52,9 +138,14 @@ class SysMenuSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_children(self, obj):
-        # 自动递归序列化子菜单，并保持排序
-        children = obj.children.all().order_by('order_num')
-        return SysMenuSerializer(children, many=True).data if children.exists() else []
+        # 整棵树请使用 apps.menu.tree.build_menu_tree；这里只处理单个菜单的序列化
+        children = getattr(obj, 'prefetched_children', None)
+        if children is not None:
+            return SysMenuSerializer(children, many=True).data
+        # 闭包表一次查询取出整棵子树，在内存中组装，不再逐层查询子菜单
+        from apps.menu.tree import build_menu_tree, menu_rows
+        return build_menu_tree(menu_rows(SysMenu.objects.filter(
+            ancestor_links__ancestor_id=obj.id, ancestor_links__depth__gt=0)))
 
 
 # 系统角色菜单关联类
@@ -0,0 +1,110 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+from apps.menu.services import CACHE_TIMEOUT, get_menu_snapshot, get_perm_version, get_user_perms
+
+ALL_PERMS = -1  # 超级管理员：所有位均为 1
+LOCAL_CACHE_SIZE = 10000
+
+
+def split_perms(value):
+    return [perm.strip() for perm in (value or '').split(',') if perm.strip()]
+
+
+class PermissionBitsCache:
+    """每个进程一份：权限标识 -> 位序号 的注册表，以及 用户ID -> 权限位图
+    全局权限版本号（perm:version）变化时整体失效；版本号最多每 PERMISSION_VERSION_CHECK_INTERVAL 秒读取一次
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0.0
+        self.registry = None
+        self.bits = {}
+
+    def _sync_version(self):
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < settings.PERMISSION_VERSION_CHECK_INTERVAL:
+            return self.version
+        version = get_perm_version()
+        with self._lock:
+            if version != self.version:
+                self.version, self.registry, self.bits = version, None, {}
+            self.checked_at = now
+        return version
+
+    def get_registry(self):
+        self._sync_version()
+        registry = self.registry
+        if registry is None:
+            perms = sorted({perm for menu in get_menu_snapshot().values() for perm in split_perms(menu['perms'])})
+            registry = self.registry = {perm: index for index, perm in enumerate(perms)}
+        return registry
+
+    def get_bits(self, user_id):
+        version = self._sync_version()
+        bits = self.bits.get(user_id)
+        if bits is not None:
+            return bits
+        key = f'perm:bits:{user_id}:g{version}'
+        bits = cache.get(key)
+        if bits is None:
+            bits = self.compile(user_id)
+            cache.set(key, bits, timeout=CACHE_TIMEOUT)
+        with self._lock:
+            if len(self.bits) >= LOCAL_CACHE_SIZE:
+                self.bits.clear()
+            self.bits[user_id] = bits
+        return bits
+
+    def compile(self, user_id):
+        """把用户的有效权限标识编译为整数位图"""
+        role_codes, perms, _ = get_user_perms(user_id)
+        if role_codes & set(settings.SUPER_ADMIN_ROLE_CODES):
+            return ALL_PERMS
+        registry = self.get_registry()
+        bits = 0
+        for value in perms:
+            for perm in split_perms(value):
+                if perm in registry:
+                    bits |= 1 << registry[perm]
+        return bits
+
+    def has_perm(self, user_id, perm):
+        index = self.get_registry().get(perm)
+        if index is None:
+            # 没有任何菜单声明该权限标识，视为未纳入权限控制
+            return True
+        return self.get_bits(user_id) >> index & 1 == 1
+
+
+permission_cache = PermissionBitsCache()
+
+
+class HasMenuPerm(BasePermission):
+    """按视图的 required_perms（action -> 权限标识）校验当前 Token 用户的按钮权限"""
+
+    def has_permission(self, request, view):
+        required = getattr(view, 'required_perms', {}).get(view.action)
+        if not required:
+            return True
+        payload = getattr(request._request, 'jwt_payload', None)
+        if not payload or not permission_cache.has_perm(payload.get('user_id'), required):
+            raise PermissionDenied({'code': 403, 'errorInfo': '没有操作权限'})
+        return True
+
+
+class IsSuperAdmin(BasePermission):
+    """只允许超级管理员（SUPER_ADMIN_ROLE_CODES）访问"""
+
+    def has_permission(self, request, view):
+        payload = getattr(request._request, 'jwt_payload', None)
+        if not payload or permission_cache.get_bits(payload.get('user_id')) != ALL_PERMS:
+            raise PermissionDenied({'code': 403, 'errorInfo': '没有操作权限'})
+        return True
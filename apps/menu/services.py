@@ -0,0 +1,137 @@
+import time
+
+from django.core.cache import cache
+
+from apps.menu.models import SysMenuClosure, SysRoleMenu
+from apps.menu.tree import build_menu_tree, menu_rows
+from apps.role.models import SysUserRole
+from djangoAdmin.utils.redis_ops import bump_versions
+from djangoAdmin.utils.tiered_cache import cached
+
+# 版本号键：写操作只递增版本号，旧版本的缓存条目自然失效
+PERM_VERSION_KEY = 'perm:version'  # 全局权限版本，任何权限相关的写操作都会递增
+MENU_VERSION_KEY = 'perm:menu_version'  # 菜单结构（增删改菜单）
+ROLES_VERSION_KEY = 'perm:roles_version'  # 角色名称等基础信息
+ROLE_VERSION_KEY = 'perm:role_version:{}'  # 单个角色的菜单分配
+USER_VERSION_KEY = 'perm:user_version:{}'  # 单个用户的角色分配
+CACHE_TIMEOUT = 24 * 3600
+
+
+def _initial_version():
+    # 以毫秒时间戳作为初始版本号，缓存被清空后也不会与各进程内存中的旧版本号重复
+    return int(time.time() * 1000)
+
+
+def _versions(*keys):
+    """一次 MGET 读取多个版本号，缺失的先初始化"""
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        for key in missing:
+            cache.add(key, _initial_version(), timeout=None)
+        values.update(cache.get_many(missing))
+    return [values.get(key) or 1 for key in keys]
+
+
+def _bump(*keys):
+    # 所有版本号在一次往返中递增，并同时递增全局权限版本号
+    bump_versions([*keys, PERM_VERSION_KEY], _initial_version())
+
+
+def invalidate_menus():
+    _bump(MENU_VERSION_KEY)
+    get_menu_tree.invalidate()
+
+
+def invalidate_roles(*role_ids):
+    _bump(ROLES_VERSION_KEY, *[ROLE_VERSION_KEY.format(role_id) for role_id in role_ids])
+
+
+def invalidate_role_menus(role_id):
+    _bump(ROLE_VERSION_KEY.format(role_id))
+
+
+def invalidate_users(*user_ids):
+    _bump(*[USER_VERSION_KEY.format(user_id) for user_id in user_ids])
+
+
+def get_perm_version():
+    return _versions(PERM_VERSION_KEY)[0]
+
+
+def _menu_snapshot(menu_version):
+    """整张菜单表的扁平快照：{id: 菜单数据}"""
+    key = f'perm:menus:v{menu_version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = {row['id']: row for row in menu_rows()}
+        cache.set(key, snapshot, timeout=CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_menu_snapshot():
+    """当前版本的菜单快照（供需要整张菜单图的接口复用）"""
+    menu_version, = _versions(MENU_VERSION_KEY)
+    return _menu_snapshot(menu_version)
+
+
+@cached('menu_tree', ttl=CACHE_TIMEOUT)
+def get_menu_tree():
+    """完整菜单树，进程内命中时不访问 Redis；invalidate_menus 时失效"""
+    return build_menu_tree(get_menu_snapshot().values())
+
+
+def get_role_menu_ids(role_id, menu_version, role_version):
+    """角色的有效菜单ID（已分配菜单 + 所有祖先），按版本号缓存"""
+    key = f'perm:role_menus:{role_id}:v{menu_version}.{role_version}'
+    menu_ids = cache.get(key)
+    if menu_ids is None:
+        # 闭包表一次查询得到已分配菜单及其全部祖先
+        assigned = SysRoleMenu.objects.filter(role_id=role_id).values('menu_id')
+        menu_ids = sorted(SysMenuClosure.objects.ancestor_ids(assigned))
+        cache.set(key, menu_ids, timeout=CACHE_TIMEOUT)
+    return menu_ids
+
+
+def get_user_roles(user_id, user_version, roles_version):
+    key = f'perm:user_roles:{user_id}:v{user_version}.{roles_version}'
+    roles = cache.get(key)
+    if roles is None:
+        roles = [{'id': role['role__id'], 'name': role['role__name'], 'code': role['role__code']}
+                 for role in SysUserRole.objects.filter(user_id=user_id).values('role__id', 'role__name', 'role__code')]
+        cache.set(key, roles, timeout=CACHE_TIMEOUT)
+    return roles
+
+
+def _resolve(user_id):
+    """返回 (角色列表, 菜单快照, 有效菜单ID集合)"""
+    user_version, roles_version, menu_version = _versions(
+        USER_VERSION_KEY.format(user_id), ROLES_VERSION_KEY, MENU_VERSION_KEY
+    )
+    roles = get_user_roles(user_id, user_version, roles_version)
+    snapshot = _menu_snapshot(menu_version)
+    role_versions = _versions(*[ROLE_VERSION_KEY.format(role['id']) for role in roles]) if roles else []
+
+    menu_ids = set()
+    for role, role_version in zip(roles, role_versions):
+        menu_ids.update(get_role_menu_ids(role['id'], menu_version, role_version))
+    return roles, snapshot, menu_ids
+
+
+def get_user_permissions(user_id):
+    """用户的角色列表和菜单树，全部来自按版本号失效的缓存"""
+    roles, snapshot, menu_ids = _resolve(user_id)
+    return {
+        'roles': ",".join(role['name'] or '' for role in roles),
+        'roleList': roles,
+        'menuList': build_menu_tree(snapshot.values(), menu_ids),
+    }
+
+
+def get_user_perms(user_id):
+    """用户的角色编码集合和有效菜单上配置的权限标识集合"""
+    roles, snapshot, menu_ids = _resolve(user_id)
+    role_codes = {role.get('code') for role in roles if role.get('code')}
+    perms = {snapshot[menu_id]['perms'] for menu_id in menu_ids
+             if menu_id in snapshot and snapshot[menu_id]['perms']}
+    return role_codes, perms, snapshot
@@ -1,3 +1,150 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_jwt.settings import api_settings
 
-# Create your tests here.
+from apps.menu.models import SysMenu, SysMenuClosure, SysRoleMenu
+from apps.menu.services import get_user_permissions
+from apps.menu.tree import build_menu_tree, menu_rows
+from apps.role.models import SysRole, SysUserRole
+from apps.user.models import SysUser
+from djangoAdmin.utils import tiered_cache
+
+
+def make_token(user):
+    return api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(user))
+
+
+def create_menu_tree(size, fan_out=10):
+    """按层批量创建 size 个菜单，每个节点最多 fan_out 个子节点"""
+    menus = []
+    for index in range(size):
+        parent = menus[(index - 1) // fan_out] if index else None
+        menus.append(SysMenu.objects.create(name=f'menu{index}', parent=parent, order_num=size - index))
+    return menus
+
+
+class MenuTreeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = SysUser.objects.create(username='admin')
+        cls.menus = create_menu_tree(1000)
+
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear_local()
+        self.client.defaults['HTTP_AUTHORIZATION'] = make_token(self.user)
+
+    def count_nodes(self, nodes):
+        return sum(1 + self.count_nodes(node['children']) for node in nodes)
+
+    def test_build_tree_in_memory(self):
+        with self.assertNumQueries(1):
+            tree = build_menu_tree(menu_rows())
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(self.count_nodes(tree), 1000)
+        children = tree[0]['children']
+        self.assertEqual([child['order_num'] for child in children],
+                         sorted(child['order_num'] for child in children))
+
+    def test_list_uses_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/menu/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.count_nodes(response.json()['data']), 1000)
+
+    def test_tree_uses_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/menu/tree/')
+        self.assertEqual(self.count_nodes(response.json()), 1000)
+
+    def test_user_menu_tree_includes_ancestors(self):
+        role = SysRole.objects.create(name='editor')
+        SysUserRole.objects.create(user=self.user, role=role)
+        leaf = self.menus[-1]
+        SysRoleMenu.objects.create(role=role, menu=leaf)
+
+        with self.assertNumQueries(3):
+            permissions = get_user_permissions(self.user.id)
+        with self.assertNumQueries(0):
+            get_user_permissions(self.user.id)
+
+        node, depth = permissions['menuList'][0], 1
+        while node['children']:
+            node, depth = node['children'][0], depth + 1
+        self.assertEqual(node['id'], leaf.id)
+        self.assertEqual(depth, 4)
+
+
+class MenuClosureTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = make_token(SysUser.objects.create(username='admin'))
+        self.root = SysMenu.objects.create(name='root')
+        self.child = SysMenu.objects.create(name='child', parent=self.root)
+        self.leaf = SysMenu.objects.create(name='leaf', parent=self.child)
+        self.other = SysMenu.objects.create(name='other')
+
+    def assertClosureConsistent(self):
+        actual = set(SysMenuClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+        SysMenuClosure.objects.rebuild()
+        self.assertEqual(actual, set(SysMenuClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')))
+
+    def test_descendants_and_ancestors(self):
+        with self.assertNumQueries(1):
+            self.assertCountEqual(SysMenuClosure.objects.descendant_ids(self.root.id),
+                                  [self.root.id, self.child.id, self.leaf.id])
+        with self.assertNumQueries(1):
+            self.assertEqual(SysMenuClosure.objects.ancestor_ids([self.leaf.id], include_self=False),
+                             {self.root.id, self.child.id})
+        self.assertClosureConsistent()
+
+    def test_move_subtree(self):
+        self.child.parent = self.other
+        self.child.save()
+        self.assertEqual(SysMenuClosure.objects.ancestor_ids([self.leaf.id], include_self=False),
+                         {self.other.id, self.child.id})
+        self.assertClosureConsistent()
+
+    def test_reject_cycle(self):
+        self.root.parent = self.leaf
+        with self.assertRaises(ValueError):
+            self.root.save()
+        response = self.client.put(f'/api/menu/{self.root.id}/', {'name': 'root', 'parent': self.leaf.id},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertClosureConsistent()
+
+    def test_destroy_subtree(self):
+        response = self.client.delete(f'/api/menu/{self.child.id}/')
+        self.assertEqual(response.json()['code'], 200)
+        self.assertCountEqual(SysMenu.objects.values_list('id', flat=True), [self.root.id, self.other.id])
+        self.assertClosureConsistent()
+
+
+@override_settings(PERMISSION_VERSION_CHECK_INTERVAL=0)
+class MenuPermissionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SysUser.objects.create(username='editor')
+        self.role = SysRole.objects.create(name='editor', code='editor')
+        SysUserRole.objects.create(user=self.user, role=self.role)
+        self.client.defaults['HTTP_AUTHORIZATION'] = make_token(self.user)
+        system = SysMenu.objects.create(name='system')
+        self.list_button = SysMenu.objects.create(name='menu-list', parent=system, menu_type='F',
+                                                  perms='system:menu:list')
+        SysMenu.objects.create(name='menu-remove', parent=system, menu_type='F', perms='system:menu:remove')
+
+    def test_perms_enforced_and_invalidated(self):
+        self.assertEqual(self.client.get('/api/menu/').status_code, 403)
+
+        self.client.patch(f'/api/role/{self.role.id}/assign-menus/', {'menuIds': [self.list_button.id]},
+                          content_type='application/json')
+        self.assertEqual(self.client.get('/api/menu/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/menu/{self.list_button.id}/').status_code, 403)
+
+    def test_super_admin_and_unregistered_perms(self):
+        self.role.code = 'admin'
+        self.role.save()
+        self.assertEqual(self.client.get('/api/menu/').status_code, 200)
+        # 没有菜单声明 system:user:list，不纳入校验
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
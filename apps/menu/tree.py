@@ -0,0 +1,37 @@
+from apps.menu.models import SysMenu
+
+MENU_FIELDS = ['id', 'name', 'icon', 'parent_id', 'order_num', 'path', 'component', 'menu_type', 'perms',
+               'create_time', 'update_time', 'remark']
+
+
+def menu_rows(queryset=None):
+    """一次查询读取菜单，返回与 SysMenuSerializer 字段一致的扁平字典（不含 children）"""
+    queryset = SysMenu.objects.all() if queryset is None else queryset
+    rows = []
+    for row in queryset.order_by().values(*MENU_FIELDS):
+        row['parent'] = row.pop('parent_id')
+        for date_field in ('create_time', 'update_time'):
+            if row[date_field]:
+                row[date_field] = row[date_field].isoformat()
+        rows.append(row)
+    return rows
+
+
+def _sort_key(row):
+    # 与数据库排序一致：order_num 为空的排在最前
+    return row['order_num'] is not None, row['order_num'] or 0, row['id']
+
+
+def build_menu_tree(rows, include_ids=None):
+    """O(n) 在内存中组装菜单树，兄弟节点按 order_num 排序
+    include_ids 不为空时只保留其中的节点；父节点不在结果中的节点作为根节点
+    """
+    nodes = {}
+    for row in rows:
+        if include_ids is None or row['id'] in include_ids:
+            nodes[row['id']] = {**row, 'children': []}
+    roots = []
+    for node in sorted(nodes.values(), key=_sort_key):
+        parent = nodes.get(node['parent'])
+        (parent['children'] if parent else roots).append(node)
+    return roots
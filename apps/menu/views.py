@@ -1,12 +1,13 @@
 from django.core.paginator import EmptyPage
 from django.db import IntegrityError
-from django.db.models import Prefetch
 from django.utils.timezone import now
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from apps.menu.models import SysMenu, SysMenuSerializer, SysRoleMenu
+from apps.menu.models import SysMenu, SysMenuSerializer, SysRoleMenu, SysMenuClosure
+from apps.menu.permissions import HasMenuPerm
+from apps.menu.services import get_menu_tree, invalidate_menus
 from djangoAdmin.utils.pagination import paginate_queryset
 
 
@@ -14,36 +15,28 @@ from djangoAdmin.utils.pagination import paginate_queryset
 class SysMenuViewSet(viewsets.ModelViewSet):
     queryset = SysMenu.objects.all()
     serializer_class = SysMenuSerializer
+    permission_classes = [HasMenuPerm]
+    # menu_tree 供角色分配菜单时使用，不单独校验
+    required_perms = {
+        'list': 'system:menu:list',
+        'retrieve': 'system:menu:query',
+        'create': 'system:menu:add',
+        'update': 'system:menu:edit',
+        'partial_update': 'system:menu:edit',
+        'destroy': 'system:menu:remove',
+    }
 
     @action(detail=False, methods=['get'], url_path='tree')
     def menu_tree(self, request):
-        """获取完整菜单树（自动递归嵌套）"""
-        queryset = SysMenu.objects.prefetch_related(
-            Prefetch('children', queryset=SysMenu.objects.all().order_by('order_num'))
-        ).filter(parent__isnull=True).order_by('order_num')
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """获取完整菜单树（一次查询读取整张表，在内存中组装）"""
+        return Response(get_menu_tree())
 
     def list(self, request, *args, **kwargs):
         """菜单列表接口（返回所有根菜单及嵌套子菜单）"""
         try:
-            # 1. 获取所有根菜单（parent为空的菜单）
-            queryset = SysMenu.objects.filter(parent__isnull=True).order_by('order_num')
-
-            # 2. 预取子菜单数据（优化查询性能）
-            queryset = queryset.prefetch_related(
-                Prefetch('children',
-                         queryset=SysMenu.objects.all().order_by('order_num'),
-                         to_attr='prefetched_children')
-            )
-
-            # 3. 序列化数据（自动包含嵌套子菜单）
-            serializer = self.get_serializer(queryset, many=True)
-
             return Response({
                 'code': 200,
-                'data': serializer.data
+                'data': get_menu_tree()
             })
 
         except Exception as e:
@@ -68,7 +61,9 @@ class SysMenuViewSet(viewsets.ModelViewSet):
             })
 
             # 调用父类方法处理
-            return super().create(request, *args, **kwargs)
+            response = super().create(request, *args, **kwargs)
+            invalidate_menus()
+            return response
 
         except SysMenu.DoesNotExist:
             return Response({'code': 404, 'errorInfo': '父菜单不存在'}, status=status.HTTP_404_NOT_FOUND)
@@ -86,6 +81,10 @@ class SysMenuViewSet(viewsets.ModelViewSet):
                     return Response({'code': 400, 'errorInfo': '不能设置自身为父菜单'},
                                     status=status.HTTP_400_BAD_REQUEST)
                 parent_menu = SysMenu.objects.get(id=parent_id)
+                # 闭包表一次查询判断目标父菜单是否在当前菜单的子树中
+                if SysMenuClosure.objects.is_descendant(parent_menu.id, instance.id):
+                    return Response({'code': 400, 'errorInfo': '不能将菜单移动到其子菜单下'},
+                                    status=status.HTTP_400_BAD_REQUEST)
                 request.data['parent'] = parent_menu.id
             else:
                 request.data['parent'] = None
@@ -94,31 +93,29 @@ class SysMenuViewSet(viewsets.ModelViewSet):
             request.data['update_time'] = now().date()
 
             # 调用父类方法处理
-            return super().update(request, *args, **kwargs)
+            response = super().update(request, *args, **kwargs)
+            invalidate_menus()
+            return response
 
         except SysMenu.DoesNotExist:
             return Response({'code': 404, 'errorInfo': '父菜单不存在'}, status=status.HTTP_404_NOT_FOUND)
         except IntegrityError as e:
             return Response({'code': 400, 'errorInfo': '菜单名称已存在'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'code': 400, 'errorInfo': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     def destroy(self, request, *args, **kwargs):
         """删除菜单（自动级联删除所有子菜单）"""
         try:
             target_menu = self.get_object()
 
-            # 1. 获取所有需要删除的菜单ID（包含目标菜单及其所有后代）
-            delete_ids = set()
-            queue = [target_menu]
-
-            # 使用广度优先搜索收集所有后代菜单ID
-            while queue:
-                current_menu = queue.pop(0)
-                delete_ids.add(current_menu.id)
-                queue.extend(list(current_menu.children.all()))
+            # 1. 获取所有需要删除的菜单ID（闭包表一次查询得到目标菜单及其所有后代）
+            delete_ids = SysMenuClosure.objects.descendant_ids(target_menu.id)
 
             # 2. 批量删除（单个SQL操作）
             SysRoleMenu.objects.filter(menu_id__in=delete_ids).delete()
             SysMenu.objects.filter(id__in=delete_ids).delete()
+            invalidate_menus()
 
             return Response({'code': 200, 'info': '删除成功！'})
 
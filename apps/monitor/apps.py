@@ -0,0 +1,25 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class MonitorConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.monitor"
+
+    def ready(self):
+        if settings.MONITOR_ENABLED:
+            from apps.monitor.instrumentation import instrument_cache, instrument_serializers
+
+            # 统计缓存命中和序列化耗时（只在有请求上下文时记录）
+            instrument_cache()
+            instrument_serializers()
+
+        if settings.MONITOR_PROFILER_SIGNAL:
+            from apps.monitor.profiler import profiler
+
+            profiler.install_signal(settings.MONITOR_PROFILER_SIGNAL)
+
+        if settings.MONITOR_MEMORY_PROFILING:
+            from apps.monitor.memory import memory_profiler
+
+            memory_profiler.start()
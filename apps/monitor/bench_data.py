@@ -0,0 +1,205 @@
+"""基准测试数据生成
+按给定规模批量插入文章、标签、分类、评论、相册照片、用户和角色/菜单树。
+主键显式分配（MySQL 的批量插入拿不到自增主键），外键直接引用；同一个随机种子生成的数据完全相同。
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from apps.blog.models import Article, ArticleTag, Category, Comment, Config, Photo, PhotoAlbum, Tag
+from apps.menu.models import SysMenu, SysMenuClosure, SysRoleMenu
+from apps.role.models import SysRole, SysUserRole
+from apps.user.models import SysUser
+
+ADMIN_USERNAME = 'bench_admin'
+ADMIN_PASSWORD = '123456'
+
+WORDS = ['Django', 'Python', 'Redis', 'MySQL', '缓存', '索引', '性能', '并发', '部署', '前端', 'Vue', '接口',
+         '数据库', '优化', '日志', '监控', '容器', '算法', '设计', '笔记', '实践', '源码', '测试', '架构']
+
+
+def default_sizes(articles):
+    """按文章数量推算其他数据的规模"""
+    return {
+        'articles': articles,
+        'users': max(10, articles // 10),
+        'tags': min(2000, max(20, articles // 50)),
+        'categories': min(200, max(5, articles // 200)),
+        'tags_per_article': 3,
+        'comments': articles * 2,
+        'albums': max(5, articles // 100),
+        'photos': articles,
+        'roles': 10,
+        'menus': 200,
+    }
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """临时关闭 auto_now / auto_now_add，让批量插入使用生成的时间（分布在过去一段时间内）"""
+    fields = [(field, field.auto_now, field.auto_now_add)
+              for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class DatasetGenerator:
+    def __init__(self, sizes, seed=42, batch_size=5000, days=730, progress=None):
+        self.sizes = sizes
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days  # 创建时间分布在最近多少天
+        self.progress = progress or (lambda model, count: None)
+        self.now = now()
+
+    def _next_id(self, model):
+        return (model.objects.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+
+    def _timestamp(self):
+        return self.now - timedelta(seconds=self.random.randrange(self.days * 86400))
+
+    def _title(self, words=4):
+        return ' '.join(self.random.choices(WORDS, k=words))
+
+    def _insert(self, model, objects):
+        """按批写入，每批一个事务，内存中最多保留一批对象"""
+        batch, total = [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                total += self._flush(model, batch)
+                batch = []
+        if batch:
+            total += self._flush(model, batch)
+        return total
+
+    def _flush(self, model, batch):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+        self.progress(model, len(batch))
+        return len(batch)
+
+    # ---------- 各类数据 ----------
+
+    def users(self):
+        start, count = self._next_id(SysUser), self.sizes['users']
+        password = hashlib.md5(ADMIN_PASSWORD.encode()).hexdigest()
+        users = (SysUser(id=start + index, username=f'bench_user_{start + index}', password=password, status=0,
+                         email=f'user{start + index}@example.com', create_time=self._timestamp().date())
+                 for index in range(count))
+        self._insert(SysUser, users)
+        return list(range(start, start + count))
+
+    def roles_and_menus(self, user_ids):
+        menu_start, menu_count = self._next_id(SysMenu), self.sizes['menus']
+        menus = []
+        for index in range(menu_count):
+            # 前 2% 为根目录，其余随机挂在已生成的菜单下
+            menu_id = menu_start + index
+            parent_id = None if index < max(1, menu_count // 50) else menu_start + self.random.randrange(index)
+            menus.append(SysMenu(id=menu_id, name=f'bench_menu_{menu_id}', parent_id=parent_id, order_num=index,
+                                 menu_type='M' if parent_id is None else self.random.choice('CF'),
+                                 path=f'/bench/{menu_id}', perms=f'bench:menu:{menu_id}'))
+        self._insert(SysMenu, menus)
+        SysMenuClosure.objects.rebuild()
+        menu_ids = [menu.id for menu in menus]
+
+        role_start = self._next_id(SysRole)
+        roles = [SysRole(id=role_start + index, name=f'bench_role_{index}', code=f'bench_role_{index}')
+                 for index in range(self.sizes['roles'])]
+        roles[0].code = 'admin'  # 超级管理员（SUPER_ADMIN_ROLE_CODES）
+        self._insert(SysRole, roles)
+        self._insert(SysRoleMenu, (SysRoleMenu(role_id=role.id, menu_id=menu_id)
+                                   for role in roles[1:]
+                                   for menu_id in self.random.sample(menu_ids, min(len(menu_ids), 30))))
+        self._insert(SysUserRole, (SysUserRole(user_id=user_id, role_id=self.random.choice(roles[1:]).id)
+                                   for user_id in user_ids))
+
+        admin = SysUser.objects.filter(username=ADMIN_USERNAME).first()
+        if admin is None:
+            admin = SysUser.objects.create(username=ADMIN_USERNAME, status=0, create_time=self.now.date(),
+                                           password=hashlib.md5(ADMIN_PASSWORD.encode()).hexdigest())
+        SysUserRole.objects.create(user=admin, role_id=roles[0].id)
+
+    def taxonomy(self):
+        tag_start, category_start = self._next_id(Tag), self._next_id(Category)
+        self._insert(Tag, (Tag(id=tag_start + index, tag_name=f'tag_{tag_start + index}',
+                               created_at=self.now, updated_at=self.now) for index in range(self.sizes['tags'])))
+        self._insert(Category, (Category(id=category_start + index, category_name=f'category_{category_start + index}',
+                                         created_at=self.now, updated_at=self.now)
+                                for index in range(self.sizes['categories'])))
+        return (list(range(tag_start, tag_start + self.sizes['tags'])),
+                list(range(category_start, category_start + self.sizes['categories'])))
+
+    def articles(self, user_ids, tag_ids, category_ids):
+        start, count = self._next_id(Article), self.sizes['articles']
+        per_article = min(self.sizes['tags_per_article'], len(tag_ids))
+
+        def articles():
+            for index in range(count):
+                created_at = self._timestamp()
+                yield Article(
+                    id=start + index, article_title=self._title(), author_id=self.random.choice(user_ids),
+                    category_id=self.random.choice(category_ids), article_content=self._title(60),
+                    article_description=self._title(12), is_top=1 if self.random.random() < 0.01 else 2,
+                    status=self.random.choices((1, 2, 3), weights=(90, 5, 5))[0],
+                    type=self.random.choice((1, 2, 3)), created_at=created_at, updated_at=created_at,
+                )
+
+        def article_tags():
+            for index in range(count):
+                for tag_id in self.random.sample(tag_ids, per_article):
+                    yield ArticleTag(article_id=start + index, tag_id=tag_id, created_at=self.now,
+                                     updated_at=self.now)
+
+        self._insert(Article, articles())
+        self._insert(ArticleTag, article_tags())
+
+    def comments(self, user_ids):
+        def comments():
+            for _ in range(self.sizes['comments']):
+                created_at = self._timestamp()
+                yield Comment(comment_type=self.random.choices((1, 2, 3), weights=(70, 10, 20))[0],
+                              from_user_id=self.random.choice(user_ids), content=self._title(20),
+                              created_at=created_at, updated_at=created_at)
+
+        self._insert(Comment, comments())
+
+    def photos(self):
+        start = self._next_id(PhotoAlbum)
+        album_ids = list(range(start, start + self.sizes['albums']))
+        self._insert(PhotoAlbum, (PhotoAlbum(id=album_id, album_name=f'album_{album_id}', description=self._title(3),
+                                             created_at=self._timestamp(), updated_at=self.now)
+                                  for album_id in album_ids))
+
+        def photos():
+            for index in range(self.sizes['photos']):
+                created_at = self._timestamp()
+                yield Photo(album_id=self.random.choice(album_ids), url=f'https://example.com/bench/{index}.jpg',
+                            status=1 if self.random.random() < 0.95 else 2, taken_at=created_at,
+                            width=4032, height=3024, orientation=1, dominant_color='#336699', meta_status=1,
+                            created_at=created_at, updated_at=created_at)
+
+        self._insert(Photo, photos())
+
+    def generate(self):
+        with explicit_timestamps(Tag, Category, Article, ArticleTag, Comment, PhotoAlbum, Photo):
+            user_ids = self.users()
+            self.roles_and_menus(user_ids)
+            tag_ids, category_ids = self.taxonomy()
+            self.articles(user_ids, tag_ids, category_ids)
+            self.comments(user_ids)
+            self.photos()
+        if not Config.objects.exists():
+            Config.objects.create(blog_name='bench')
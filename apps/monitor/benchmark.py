@@ -0,0 +1,294 @@
+"""接口基准测试
+按场景反复请求主要接口，统计吞吐量和 p50/p95/p99 延迟。请求可以走 Django 测试客户端（进程内，不经过网络），
+也可以走本地 WSGI 服务（wsgiref 多线程，或 --url 指定的外部服务），结果输出为 JSON，便于在不同提交之间比较。
+"""
+import json
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from contextlib import contextmanager
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import django
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework_jwt.settings import api_settings
+
+from apps.blog.models import Article, Category, Comment, Photo, PhotoAlbum, Tag
+from apps.menu.models import SysMenu
+from apps.monitor.bench_data import ADMIN_USERNAME
+from apps.role.models import SysRole
+from apps.user.models import SysUser
+
+DATASET_MODELS = OrderedDict([
+    ('articles', Article), ('tags', Tag), ('categories', Category), ('comments', Comment),
+    ('albums', PhotoAlbum), ('photos', Photo), ('users', SysUser), ('roles', SysRole), ('menus', SysMenu),
+])
+
+
+class Samples:
+    """从数据库中取一次主键范围和名称，生成请求路径时随机挑选"""
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        article_ids = Article.objects.filter(status=1).aggregate(low=Min('id'), high=Max('id'))
+        self.article_range = (article_ids['low'] or 1, article_ids['high'] or 1)
+        self.tag_names = list(Tag.objects.order_by('id').values_list('tag_name', flat=True)[:200]) or ['']
+
+    def page(self, pages=10):
+        return self.random.randint(1, pages)
+
+    def article_id(self):
+        return self.random.randint(*self.article_range)
+
+    def tag_name(self):
+        return self.random.choice(self.tag_names)
+
+
+# 场景名 -> 生成请求路径的函数
+SCENARIOS = OrderedDict([
+    ('article-list', lambda s: f"{reverse('article-list')}?pageNum={s.page()}&pageSize=10"),
+    ('article-detail', lambda s: reverse('article-detail', args=[s.article_id()])),
+    ('article-tag-filter', lambda s: f"{reverse('article-list')}?tags={s.tag_name()}&pageNum=1&pageSize=10"),
+    ('article-adjacent', lambda s: reverse('article-adjacent-articles', args=[s.article_id()])),
+    ('tag-list', lambda s: f"{reverse('tag-tag-list')}?pageNum={s.page()}&pageSize=10"),
+    ('category-list', lambda s: f"{reverse('category-category-list')}?pageNum=1&pageSize=10"),
+    ('message-list', lambda s: f"{reverse('comment-message-list')}?pageNum={s.page()}&pageSize=10"),
+    ('photo-list', lambda s: f"{reverse('photo-list')}?pageNum={s.page()}&pageSize=20"),
+    ('photo-timeline', lambda s: reverse('photo-timeline')),
+    ('album-list', lambda s: f"{reverse('album-list')}?pageNum=1&pageSize=10"),
+    ('menu-tree', lambda s: reverse('menu-menu-tree')),
+    ('user-list', lambda s: f"{reverse('user-list')}?pageNum={s.page()}&pageSize=10"),
+    ('role-list', lambda s: reverse('role-role-list')),
+    ('statistics', lambda s: reverse('statistics')),
+    ('bootstrap', lambda s: reverse('bootstrap')),
+])
+
+
+def auth_header(username=ADMIN_USERNAME):
+    """用户的 JWT，默认为基准测试管理员（seed_benchmark_data 创建）"""
+    user = SysUser.objects.filter(username=username).first()
+    if user is None:
+        return None
+    return api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(user))
+
+
+def percentile(values, p):
+    """最近秩法求百分位，values 已排序"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def latency_summary(seconds):
+    """耗时列表（秒）-> 平均值、p50/p95/p99 和最大值（毫秒）"""
+    ms = sorted(value * 1000 for value in seconds)
+    if not ms:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    return {
+        'mean': round(sum(ms) / len(ms), 2),
+        **{f'p{p}': round(percentile(ms, p), 2) for p in (50, 95, 99)},
+        'max': round(ms[-1], 2),
+    }
+
+
+# ---------- 发送请求 ----------
+
+class ClientTransport:
+    """Django 测试客户端，每个线程一个实例"""
+
+    def __init__(self, token):
+        self.token = token
+        self._local = threading.local()
+
+    def __call__(self, path, method='GET', body=b'', content_type=None, authenticated=True):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        headers = {'HTTP_AUTHORIZATION': self.token} if authenticated else {}
+        return client.generic(method, path, body, content_type or 'application/octet-stream', **headers).status_code
+
+
+class HttpTransport:
+    def __init__(self, token, base_url):
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, path, method='GET', body=b'', content_type=None, authenticated=True):
+        headers = {'Authorization': self.token} if authenticated else {}
+        if content_type:
+            headers['Content-Type'] = content_type
+        request = urllib.request.Request(self.base_url + path, data=body or None, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def local_server():
+    """在 127.0.0.1 的随机端口上启动多线程 WSGI 服务，返回地址"""
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=_ThreadingWSGIServer, handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def open_transport(mode, token, url=None):
+    """client：测试客户端；wsgi：url 指定的服务，未指定时启动本地 WSGI 服务"""
+    if mode == 'client':
+        yield ClientTransport(token)
+    elif url:
+        yield HttpTransport(token, url)
+    else:
+        with local_server() as base_url:
+            yield HttpTransport(token, base_url)
+
+
+# ---------- 执行 ----------
+
+def run_scenario(transport, paths, concurrency):
+    """用 concurrency 个线程发送 paths 中的全部请求，返回统计结果"""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    pending = iter(paths)
+
+    def worker():
+        nonlocal errors
+        local, failed = [], 0
+        try:
+            while True:
+                with lock:
+                    path = next(pending, None)
+                if path is None:
+                    break
+                start = time.perf_counter()
+                try:
+                    status = transport(path)
+                except Exception:
+                    status = None
+                local.append(time.perf_counter() - start)
+                if status is None or status >= 400:
+                    failed += 1
+        finally:
+            connections.close_all()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latencyMs': latency_summary(latencies),
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                                text=True, timeout=5).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return commit or None, bool(dirty)
+
+
+def environment(mode):
+    commit, dirty = git_revision()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'startedAt': now().isoformat(),
+        'mode': mode,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': {name: model.objects.count() for name, model in DATASET_MODELS.items()},
+    }
+
+
+def run(scenarios, requests, concurrency_levels, warmup=20, mode='client', url=None, seed=0, progress=None):
+    """执行基准测试，返回报告（dict）；mode 为 client（测试客户端）或 wsgi（本地 WSGI 服务或 url）"""
+    token = auth_header()
+    if token is None:
+        raise LookupError(f'没有找到 {ADMIN_USERNAME} 用户，请先执行 seed_benchmark_data')
+    report = {**environment(mode), 'results': []}
+    samples = Samples(seed)
+
+    with open_transport(mode, token, url) as send:
+        for name in scenarios:
+            build = SCENARIOS[name]
+            for _ in range(warmup):
+                send(build(samples))
+            for concurrency in concurrency_levels:
+                result = {'scenario': name, **run_scenario(send, [build(samples) for _ in range(requests)],
+                                                           concurrency)}
+                report['results'].append(result)
+                if progress:
+                    progress(result)
+    return report
+
+
+def compare(baseline, report):
+    """与基准报告比较：[(场景, 并发, 指标, 基准值, 当前值, 变化百分比)]"""
+    previous = {(result['scenario'], result['concurrency']): result for result in baseline['results']}
+    rows = []
+    for result in report['results']:
+        old = previous.get((result['scenario'], result['concurrency']))
+        if old is None:
+            continue
+        for metric, before, after in (('throughput', old['throughput'], result['throughput']),
+                                      ('p50', old['latencyMs']['p50'], result['latencyMs']['p50']),
+                                      ('p95', old['latencyMs']['p95'], result['latencyMs']['p95']),
+                                      ('p99', old['latencyMs']['p99'], result['latencyMs']['p99'])):
+            change = round((after - before) / before * 100, 1) if before and after is not None else None
+            rows.append((result['scenario'], result['concurrency'], metric, before, after, change))
+    return rows
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
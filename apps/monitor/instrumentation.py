@@ -0,0 +1,124 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.monitor import slow_queries
+from apps.monitor.memory import memory_profiler
+
+_current = ContextVar('request_stats', default=None)
+_MISSING = object()
+
+
+class RequestStats:
+    """单个请求的耗时分解，由中间件创建，各处埋点累加"""
+    __slots__ = ('start', 'view', 'db_count', 'db_time', 'cache_hits', 'cache_misses', 'serialize_time',
+                 'serialize_depth', 'render_start', 'render_time', 'mem_start', 'mem_peak')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view = None
+        self.db_count = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+        self.render_start = None
+        self.render_time = 0.0
+        self.mem_start = None  # 内存分析开启时：请求开始时的已分配量和目前的峰值
+        self.mem_peak = 0
+
+
+def current_stats():
+    return _current.get()
+
+
+def activate(stats):
+    return _current.set(stats)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def db_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper：统计 SQL 条数和耗时，超过阈值的记入慢查询日志"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.db_time += elapsed
+        stats.db_count += 1
+        threshold = settings.MONITOR_SLOW_QUERY_MS
+        if threshold is not None and elapsed * 1000 >= threshold:
+            slow_queries.record(sql, params, many, context, elapsed, stats.view)
+
+
+def instrument_cache():
+    """包装默认缓存后端类的 get / get_many，统计命中和未命中"""
+    backend = type(caches['default'])
+    if getattr(backend, '_monitor_instrumented', False):
+        return
+    original_get, original_get_many = backend.get, backend.get_many
+
+    @wraps(original_get)
+    def get(self, key, default=None, version=None, **kwargs):
+        value = original_get(self, key, _MISSING, version=version, **kwargs)
+        if (stats := _current.get()) is not None:
+            if value is _MISSING:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is _MISSING else value
+
+    @wraps(original_get_many)
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        values = original_get_many(self, keys, version=version, **kwargs)
+        if (stats := _current.get()) is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+    backend.get, backend.get_many = get, get_many
+    backend._monitor_instrumented = True
+
+
+def _timed_data(prop):
+    @property
+    @wraps(prop.fget)
+    def data(self):
+        stats = _current.get()
+        if stats is None:
+            return prop.fget(self)
+        # 嵌套的序列化器（ListSerializer -> Serializer -> BaseSerializer）只计最外层
+        stats.serialize_depth += 1
+        memory_start = memory_profiler.serializer_begin(stats) if stats.serialize_depth == 1 else None
+        start = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            stats.serialize_depth -= 1
+            if stats.serialize_depth == 0:
+                stats.serialize_time += time.perf_counter() - start
+                memory_profiler.serializer_end(stats, self, memory_start)
+    return data
+
+
+def instrument_serializers():
+    """统计 DRF 序列化器 .data 的耗时（内存分析开启时还有内存分配）"""
+    from rest_framework import serializers
+
+    for cls in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        if not getattr(prop.fget, '_monitor_instrumented', False):
+            wrapped = _timed_data(prop)
+            wrapped.fget._monitor_instrumented = True
+            cls.data = wrapped
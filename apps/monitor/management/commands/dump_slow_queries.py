@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.monitor import slow_queries
+
+
+class Command(BaseCommand):
+    help = '输出慢查询日志：按指纹聚合的次数、耗时、视图、调用栈和执行计划'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='输出前 N 个指纹（按总耗时）')
+        parser.add_argument('--samples', action='store_true', help='输出最近的原始样本而不是聚合结果')
+        parser.add_argument('--json', action='store_true', help='以 JSON 输出')
+        parser.add_argument('--clear', action='store_true', help='输出后清空样本')
+
+    def handle(self, *args, **options):
+        if options['samples']:
+            data = slow_queries.recent(options['limit'])
+        else:
+            data = slow_queries.summarize(limit=options['limit'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(data, ensure_ascii=False, indent=2, default=str))
+        elif options['samples']:
+            for sample in data:
+                at = datetime.fromtimestamp(sample['at']).strftime('%Y-%m-%d %H:%M:%S')
+                self.stdout.write(f"{at} {sample['ms']:>9.2f}ms {sample['view'] or '-'}\n  {sample['sql']}")
+        else:
+            for group in data:
+                self.stdout.write(self.style.WARNING(
+                    f"[{group['fingerprint']}] 次数 {group['count']}  总计 {group['totalMs']}ms  "
+                    f"平均 {group['avgMs']}ms  最大 {group['maxMs']}ms"))
+                self.stdout.write(f"  SQL: {group['sql']}")
+                self.stdout.write(f"  视图: {', '.join(group['views']) or '-'}")
+                for frame in group['stack']:
+                    self.stdout.write(f'    {frame}')
+                for row in group['plan'] or []:
+                    self.stdout.write('  计划: ' + ' '.join(f'{key}={value}' for key, value in row.items()))
+            if not data:
+                self.stdout.write('没有慢查询记录')
+
+        if options['clear']:
+            slow_queries.clear()
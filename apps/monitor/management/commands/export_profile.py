@@ -0,0 +1,63 @@
+import glob
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitor import profiler
+
+
+class Command(BaseCommand):
+    help = ('合并采样分析器保存的结果（各工作进程一个文件）并导出，'
+            '示例：python manage.py export_profile "logs/profiles/*.json" --format speedscope --output out.json')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='结果文件，支持通配符')
+        parser.add_argument('--format', choices=['collapsed', 'speedscope', 'top'], default='collapsed',
+                            help='collapsed：flamegraph.pl 格式；speedscope：speedscope.app 文件；top：各路由占比最高的函数')
+        parser.add_argument('--route', help='只导出指定路由，如 "GET api/blog/articles/$"')
+        parser.add_argument('--limit', type=int, default=10, help='top 格式下每个路由输出的函数数')
+        parser.add_argument('--output', help='写入文件；不指定时输出到标准输出')
+
+    def handle(self, *args, **options):
+        paths = sorted({path for pattern in options['paths'] for path in glob.glob(pattern)})
+        if not paths:
+            raise CommandError('没有找到结果文件')
+        profiles = []
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        profile = profiler.merge(profiles)
+
+        if options['format'] == 'collapsed':
+            content = profiler.collapsed(profile, options['route'])
+        elif options['format'] == 'speedscope':
+            content = json.dumps(profiler.speedscope(profile, options['route']), ensure_ascii=False)
+        else:
+            content = self.top(profile, options['route'], options['limit'])
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.stderr.write(f"{len(paths)} 个文件（进程 {profile['pids']}），{profile['samples']} 次采样，"
+                              f"已写入 {options['output']}")
+        else:
+            self.stdout.write(content, ending='')
+
+    @staticmethod
+    def top(profile, route, limit):
+        """每个路由按自身耗时（叶帧）和累计耗时（出现在栈中）排序的函数"""
+        lines = []
+        for name, counter in sorted(profile['stacks'].items(), key=lambda item: -sum(item[1].values())):
+            if route and name != route:
+                continue
+            total = sum(counter.values())
+            own, cumulative = Counter(), Counter()
+            for stack, count in counter.items():
+                frames = stack.split(';')
+                own[frames[-1]] += count
+                cumulative.update({frame: count for frame in set(frames)})
+            lines.append(f'{name}  {total} 次采样')
+            for label, count in own.most_common(limit):
+                lines.append(f'  自身 {count / total:6.1%}  累计 {cumulative[label] / total:6.1%}  {label}')
+        return '\n'.join(lines) + '\n' if lines else ''
@@ -0,0 +1,111 @@
+import gc
+import json
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from apps.monitor import benchmark
+from apps.monitor.memory import memory_profiler
+
+# 不分页的列表接口：一次序列化全部数据，是内存占用的主要来源
+SCENARIOS = {
+    **benchmark.SCENARIOS,
+    'photo-list-default': lambda s: reverse('photo-list'),
+    'message-list-unpaged': lambda s: reverse('comment-message-list'),
+}
+
+
+class Command(BaseCommand):
+    help = ('在进程内逐个请求接口，用 tracemalloc 统计每个接口的内存峰值、留存和序列化器分配，输出 JSON 报告，'
+            '--compare 与之前的报告比较（如上一次部署）。'
+            '示例：python manage.py memory_report --output mem.json --settings=djangoAdmin.settings_bench')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='只运行指定场景，可重复')
+        parser.add_argument('--requests', type=int, default=30, help='每个场景的请求数')
+        parser.add_argument('--warmup', type=int, default=3, help='每个场景正式统计前的预热请求数（填充缓存）')
+        parser.add_argument('--frames', type=int, default=1, help='tracemalloc 保存的调用栈深度')
+        parser.add_argument('--top', type=int, default=10, help='增长最多的代码行输出条数')
+        parser.add_argument('--seed', type=int, default=0, help='请求参数的随机种子')
+        parser.add_argument('--output', help='报告写入的 JSON 文件；不指定时输出到标准输出')
+        parser.add_argument('--compare', help='与之前的报告比较（JSON 文件）')
+
+    def handle(self, *args, **options):
+        if not settings.MONITOR_ENABLED:
+            raise CommandError('需要开启 MONITOR_ENABLED（内存统计依赖请求指标中间件）')
+        if options['requests'] <= 0:
+            raise CommandError('--requests 必须大于 0')
+        token = benchmark.auth_header()
+        if token is None:
+            raise CommandError('没有找到基准测试用户，请先执行 seed_benchmark_data')
+
+        started = memory_profiler.start(options['frames'])
+        if not started:
+            memory_profiler.reset()
+        try:
+            report = {**benchmark.environment('client'), 'requests': options['requests'],
+                      'scenarios': {}, 'growth': []}
+            samples = benchmark.Samples(options['seed'])
+            send = benchmark.ClientTransport(token)
+            for name in options['scenario'] or SCENARIOS:
+                report['scenarios'][name] = result = self.measure(send, SCENARIOS[name], samples, options)
+                self.stderr.write(self.describe(name, result))
+            report['growth'] = memory_profiler.growth(options['top'])
+        finally:
+            if started:
+                memory_profiler.stop()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"报告已写入 {options['output']}")
+        else:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+        if options['compare']:
+            self.compare(benchmark.load_report(options['compare']), report)
+
+    @staticmethod
+    def measure(send, build, samples, options):
+        for _ in range(options['warmup']):
+            send(build(samples))
+        memory_profiler.clear()
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        statuses = [send(build(samples)) for _ in range(options['requests'])]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        report = memory_profiler.report(options['top'])
+        return {
+            'errors': sum(1 for status in statuses if status >= 400),
+            # 垃圾回收后仍增长的内存平均到每个请求，持续大于 0 说明有泄漏（或无上限的缓存）
+            'retainedPerRequest': (after - before) // options['requests'],
+            'routes': report['routes'],
+            'serializers': report['serializers'],
+        }
+
+    @staticmethod
+    def describe(name, result):
+        peak = max((route['peakMax'] for route in result['routes']), default=0)
+        serializer = result['serializers'][0] if result['serializers'] else None
+        line = f"{name:<22} 峰值 {peak / 1024:>9.1f}KB  每请求留存 {result['retainedPerRequest']:>7}B"
+        if serializer:
+            line += f"  {serializer['name']} 峰值 {serializer['peakMax'] / 1024:.1f}KB"
+        return line + (f"  错误 {result['errors']}" if result['errors'] else '')
+
+    def compare(self, baseline, report):
+        self.stdout.write(f"与 {baseline.get('commit')} 比较（变化为正表示内存增加）：")
+        if baseline.get('dataset') != report['dataset']:
+            self.stdout.write(self.style.WARNING(f"数据量不一致：{baseline.get('dataset')} / {report['dataset']}"))
+        for name, result in report['scenarios'].items():
+            old = baseline.get('scenarios', {}).get(name)
+            if old is None:
+                continue
+            for metric, before, after in (
+                    ('peakAvg', sum(route['peakAvg'] for route in old['routes']),
+                     sum(route['peakAvg'] for route in result['routes'])),
+                    ('retainedPerRequest', old['retainedPerRequest'], result['retainedPerRequest'])):
+                change = f'{(after - before) / before * 100:+.1f}%' if before else '-'
+                self.stdout.write(f'{name:<22} {metric:<18} {before} -> {after} ({change})')
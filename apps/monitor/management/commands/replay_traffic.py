@@ -0,0 +1,75 @@
+import glob
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitor import benchmark, replay, traffic
+from apps.monitor.bench_data import ADMIN_USERNAME
+
+
+class Command(BaseCommand):
+    help = ('重放 TrafficRecordMiddleware 录制的请求并按接口统计延迟，'
+            '示例：python manage.py replay_traffic "logs/traffic-*.jsonl*" --speed 2 --output new.json '
+            '--compare old.json --settings=djangoAdmin.settings_bench')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='记录文件，支持通配符')
+        parser.add_argument('--speed', type=float, default=1.0, help='重放倍速，1 为原始节奏，0 表示尽快发送')
+        parser.add_argument('--concurrency', type=int, default=8, help='同时进行的请求数上限')
+        parser.add_argument('--mode', choices=['client', 'wsgi'], default='client',
+                            help='client：Django 测试客户端（进程内）；wsgi：本地多线程 WSGI 服务')
+        parser.add_argument('--url', help='wsgi 模式下请求外部服务（如 http://127.0.0.1:8000），不启动内置服务')
+        parser.add_argument('--username', default=ADMIN_USERNAME, help='录制时带令牌的请求以该用户身份重放')
+        parser.add_argument('--read-only', action='store_true', help='只重放 GET/HEAD/OPTIONS 请求')
+        parser.add_argument('--skip-uploads', action='store_true', help='跳过文件上传请求')
+        parser.add_argument('--limit', type=int, help='只重放前 N 条')
+        parser.add_argument('--output', help='报告写入的 JSON 文件；不指定时输出到标准输出')
+        parser.add_argument('--compare', help='与另一次重放的报告逐接口比较（JSON 文件）')
+        parser.add_argument('--force', action='store_true', help='允许在非基准测试配置的数据库上重放写请求')
+
+    def handle(self, *args, **options):
+        if options['speed'] < 0 or options['concurrency'] <= 0:
+            raise CommandError('--speed 不能为负数，--concurrency 必须大于 0')
+        if options['url'] and options['mode'] != 'wsgi':
+            raise CommandError('--url 只能在 --mode wsgi 下使用')
+        # 写请求（批量删除、重置密码、清理回收站等）会修改当前配置的数据库
+        writes_local = not (options['read_only'] or options['url'] or options['force'])
+        if writes_local and not getattr(settings, 'BENCHMARK_DATABASE', False):
+            raise CommandError('当前不是基准测试数据库，请使用 --settings=djangoAdmin.settings_bench，'
+                               '或加 --read-only / --url / --force')
+        paths = sorted({path for pattern in options['paths'] for path in glob.glob(pattern)})
+        if not paths:
+            raise CommandError('没有找到记录文件')
+        entries = replay.select(traffic.load(paths), options['read_only'], options['skip_uploads'])
+        entries = entries[:options['limit']]
+        if not entries:
+            raise CommandError('没有可重放的请求')
+        token = benchmark.auth_header(options['username'])
+        if token is None:
+            raise CommandError(f"没有找到用户 {options['username']}")
+
+        span = entries[-1]['t'] - entries[0]['t']
+        self.stderr.write(f'重放 {len(entries)} 条请求（录制时长 {span:.0f}s，{options["speed"] or "不限"} 倍速）')
+        with benchmark.open_transport(options['mode'], token, options['url']) as send:
+            results, elapsed = replay.replay(entries, send, options['speed'], options['concurrency'])
+        report = {**benchmark.environment(options['mode']), 'source': paths, 'speed': options['speed'],
+                  'concurrency': options['concurrency'], **replay.summarize(results, elapsed)}
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"{report['requests']} 条请求，{report['errors']} 个 5xx，"
+                              f"跟不上录制节奏的延后 p95={report['lagMs']['p95']}ms，报告已写入 {options['output']}")
+        else:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+        if options['compare']:
+            baseline = benchmark.load_report(options['compare'])
+            self.stdout.write(f"与 {options['compare']}（{baseline.get('commit')}）比较（变化为正表示延迟增加）：")
+            for key in ('mode', 'database', 'dataset', 'speed', 'concurrency'):
+                if baseline.get(key) != report[key]:
+                    self.stdout.write(self.style.WARNING(f'{key} 不一致：{baseline.get(key)} / {report[key]}'))
+            for name, metric, before, after, change in replay.compare(baseline, report):
+                change = '-' if change is None else f'{change:+.1f}%'
+                self.stdout.write(f'{name:<50} {metric:<4} {before} -> {after} ({change})')
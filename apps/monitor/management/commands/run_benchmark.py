@@ -0,0 +1,72 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitor import benchmark
+
+
+def _levels(value):
+    try:
+        levels = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        levels = []
+    if not levels or min(levels) <= 0:
+        raise ValueError(value)
+    return levels
+
+
+class Command(BaseCommand):
+    help = ('对主要接口做基准测试，输出吞吐量和 p50/p95/p99 延迟（JSON），'
+            '示例：python manage.py run_benchmark --concurrency 1,4,16 --output before.json '
+            '--settings=djangoAdmin.settings_bench')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=list(benchmark.SCENARIOS),
+                            help='只运行指定场景，可重复；默认全部')
+        parser.add_argument('--requests', type=int, default=200, help='每个场景、每个并发级别的请求数')
+        parser.add_argument('--concurrency', type=_levels, default=[1, 4, 16], help='并发级别，逗号分隔')
+        parser.add_argument('--warmup', type=int, default=20, help='每个场景正式测量前的预热请求数')
+        parser.add_argument('--mode', choices=['client', 'wsgi'], default='client',
+                            help='client：Django 测试客户端（进程内）；wsgi：本地多线程 WSGI 服务')
+        parser.add_argument('--url', help='wsgi 模式下请求外部服务（如 http://127.0.0.1:8000），不启动内置服务')
+        parser.add_argument('--seed', type=int, default=0, help='请求参数的随机种子')
+        parser.add_argument('--output', help='报告写入的 JSON 文件；不指定时输出到标准输出')
+        parser.add_argument('--compare', help='与之前的报告比较（JSON 文件）')
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0:
+            raise CommandError('--requests 必须大于 0')
+        if options['url'] and options['mode'] != 'wsgi':
+            raise CommandError('--url 只能在 --mode wsgi 下使用')
+        to_file = bool(options['output'])
+
+        def progress(result):
+            if to_file:
+                latency = result['latencyMs']
+                self.stdout.write(f"{result['scenario']:<20} c={result['concurrency']:<3} "
+                                  f"{result['throughput']:>8} req/s  p50={latency['p50']}ms "
+                                  f"p95={latency['p95']}ms p99={latency['p99']}ms errors={result['errors']}")
+
+        try:
+            report = benchmark.run(options['scenario'] or list(benchmark.SCENARIOS), options['requests'],
+                                   options['concurrency'], options['warmup'], options['mode'], options['url'],
+                                   options['seed'], progress)
+        except LookupError as e:
+            raise CommandError(str(e))
+
+        if to_file:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"报告已写入 {options['output']}")
+        else:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+
+        if options['compare']:
+            baseline = benchmark.load_report(options['compare'])
+            self.stdout.write(f"与 {options['compare']}（{baseline.get('commit')}）比较（变化为正表示数值增大）：")
+            for key in ('mode', 'database', 'dataset'):
+                if baseline.get(key) != report[key]:
+                    self.stdout.write(self.style.WARNING(f'{key} 不一致：{baseline.get(key)} / {report[key]}'))
+            for scenario, concurrency, metric, before, after, change in benchmark.compare(baseline, report):
+                change = '-' if change is None else f'{change:+.1f}%'
+                self.stdout.write(f'{scenario:<20} c={concurrency:<3} {metric:<10} {before} -> {after} ({change})')
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.monitor.bench_data import ADMIN_PASSWORD, ADMIN_USERNAME, DatasetGenerator, default_sizes
+from apps.statistics.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = ('批量生成基准测试数据（文章、标签、评论、照片、用户、角色/菜单树），'
+            '示例：python manage.py seed_benchmark_data --articles 100000 --settings=djangoAdmin.settings_bench')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000, help='文章数量，其他数据按比例推算')
+        for name in ('users', 'tags', 'categories', 'comments', 'albums', 'photos', 'roles', 'menus'):
+            parser.add_argument(f'--{name}', type=int, help=f'{name} 数量（默认按文章数量推算）')
+        parser.add_argument('--tags-per-article', type=int)
+        parser.add_argument('--seed', type=int, default=42, help='随机种子，相同参数生成相同数据')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--force', action='store_true', help='允许在非基准测试配置的数据库中写入')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'BENCHMARK_DATABASE', False) and not options['force']:
+            raise CommandError('当前不是基准测试数据库，请使用 --settings=djangoAdmin.settings_bench，或加 --force')
+
+        sizes = default_sizes(options['articles'])
+        for name in sizes:
+            if options.get(name) is not None:
+                sizes[name] = options[name]
+        self.stdout.write('生成规模: ' + ', '.join(f'{name}={value}' for name, value in sizes.items()))
+
+        start = time.perf_counter()
+        inserted = {}
+
+        def progress(model, count):
+            inserted[model.__name__] = inserted.get(model.__name__, 0) + count
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {model.__name__}: {inserted[model.__name__]}')
+
+        DatasetGenerator(sizes, seed=options['seed'], batch_size=options['batch_size'], progress=progress).generate()
+        self.stdout.write(f'写入完成，耗时 {time.perf_counter() - start:.1f}s: '
+                          + ', '.join(f'{name}={count}' for name, count in inserted.items()))
+
+        # 批量插入不触发模型信号，统计计数器和每日汇总需要重新计算
+        reconcile()
+        call_command('backfill_rollups', stdout=self.stdout)
+        self.stdout.write(f'基准测试账号: {ADMIN_USERNAME} / {ADMIN_PASSWORD}（超级管理员）')
@@ -0,0 +1,172 @@
+"""内存分析（默认关闭）
+开启后用 tracemalloc 跟踪分配：每个请求记录峰值（相对请求开始时）和留存（请求结束时仍未释放的部分），
+按路由和序列化器类聚合；与开启时的基线快照比较，按代码行列出增长最多的分配，用于发现泄漏。
+tracemalloc 是进程级的，多线程 worker 中并发请求的分配会互相计入，需要精确数据时用单线程 worker 或 memory_report 命令。
+"""
+import gc
+import os
+import threading
+import tracemalloc
+from collections import defaultdict
+
+from django.conf import settings
+
+# tracemalloc 允许 1~65535 层；每次分配都要保存调用栈，层数越多越慢、越占内存，线上限制得更低
+MAX_TRACE_FRAMES = 100
+
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def rss_bytes():
+    """进程当前常驻内存；不支持 /proc 的系统返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def serializer_name(serializer):
+    child = getattr(serializer, 'child', None)
+    if child is not None:  # ListSerializer
+        return f'{type(child).__name__}(many=True)'
+    return type(serializer).__name__
+
+
+class Allocation:
+    """峰值和留存（字节）的累计"""
+    __slots__ = ('count', 'peak_total', 'peak_max', 'retained_total', 'retained_max')
+
+    def __init__(self):
+        self.count = self.peak_total = self.peak_max = self.retained_total = self.retained_max = 0
+
+    def add(self, peak, retained):
+        self.count += 1
+        self.peak_total += peak
+        self.peak_max = max(self.peak_max, peak)
+        self.retained_total += retained
+        self.retained_max = max(self.retained_max, retained)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'peakAvg': self.peak_total // self.count if self.count else 0,
+            'peakMax': self.peak_max,
+            'retainedAvg': self.retained_total // self.count if self.count else 0,
+            'retainedMax': self.retained_max,
+            'retainedTotal': self.retained_total,
+        }
+
+
+class MemoryProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = defaultdict(Allocation)
+        self.serializers = defaultdict(Allocation)
+        self.baseline = None
+
+    @property
+    def enabled(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=None):
+        """开始跟踪并记录基线快照（已在跟踪时返回 False）"""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(frames or settings.MONITOR_MEMORY_TRACE_FRAMES)
+        self.reset()
+        return True
+
+    def stop(self):
+        if not tracemalloc.is_tracing():
+            return False
+        self.baseline = None
+        tracemalloc.stop()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self.routes.clear()
+            self.serializers.clear()
+
+    def reset(self):
+        """清空统计，重新记录基线快照"""
+        self.clear()
+        self.baseline = self.take_snapshot() if tracemalloc.is_tracing() else None
+
+    @staticmethod
+    def take_snapshot():
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def _add(self, table, key, peak, retained):
+        with self._lock:
+            table[key].add(peak, retained)
+
+    # ---------- 请求和序列化器埋点（RequestMetricsMiddleware / instrumentation 调用） ----------
+
+    def begin(self, stats):
+        if not tracemalloc.is_tracing():
+            return
+        tracemalloc.reset_peak()
+        stats.mem_start = stats.mem_peak = tracemalloc.get_traced_memory()[0]
+
+    def end(self, stats, route):
+        if stats.mem_start is None or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self._add(self.routes, route, max(peak, stats.mem_peak) - stats.mem_start, current - stats.mem_start)
+
+    def serializer_begin(self, stats):
+        """最外层序列化器 .data 开始：保存请求峰值后重置，返回当前已分配量"""
+        if stats.mem_start is None or not tracemalloc.is_tracing():
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        stats.mem_peak = max(stats.mem_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def serializer_end(self, stats, serializer, start):
+        if start is None or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        stats.mem_peak = max(stats.mem_peak, peak)
+        self._add(self.serializers, serializer_name(serializer), peak - start, current - start)
+
+    # ---------- 报告 ----------
+
+    def report(self, top=10):
+        """按峰值排序的路由和序列化器、按累计留存排序的路由（疑似泄漏）"""
+        with self._lock:
+            routes = {route: item.as_dict() for route, item in self.routes.items()}
+            serializers = {name: item.as_dict() for name, item in self.serializers.items()}
+        def ranked(items, key):
+            return [{'name': name, **values}
+                    for name, values in sorted(items.items(), key=lambda item: -item[1][key])[:top]]
+
+        return {
+            'pid': os.getpid(),
+            'enabled': tracemalloc.is_tracing(),
+            'tracedBytes': tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+            'rssBytes': rss_bytes(),
+            'routes': ranked(routes, 'peakMax'),
+            'retainedRoutes': ranked(routes, 'retainedTotal'),
+            'serializers': ranked(serializers, 'peakMax'),
+        }
+
+    def growth(self, top=10):
+        """与基线快照相比增长最多的代码行"""
+        if self.baseline is None or not tracemalloc.is_tracing():
+            return []
+        stats = self.take_snapshot().compare_to(self.baseline, 'lineno')
+        return [{'where': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}', 'sizeDiff': stat.size_diff,
+                 'countDiff': stat.count_diff, 'size': stat.size}
+                for stat in stats if stat.size_diff > 0][:top]
+
+
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,176 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+from djangoAdmin.utils.redis_ops import get_client, is_redis
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = 'monitor:metrics'
+
+# 指标名 -> (类型, 说明)
+METRIC_HELP = {
+    'http_requests_total': ('counter', '请求数'),
+    'http_request_duration_seconds': ('histogram', '请求总耗时'),
+    'http_request_db_queries_total': ('counter', 'SQL 条数'),
+    'http_request_db_seconds_total': ('counter', 'SQL 耗时'),
+    'http_request_cache_hits_total': ('counter', '缓存命中次数'),
+    'http_request_cache_misses_total': ('counter', '缓存未命中次数'),
+    'http_request_serialize_seconds_total': ('counter', '序列化器 .data 耗时'),
+    'http_request_render_seconds_total': ('counter', '响应渲染（JSON 编码）耗时'),
+}
+
+
+def _field(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False, separators=(',', ':'))
+
+
+@lru_cache(maxsize=4096)
+def _request_fields(route, method):
+    labels = {'route': route, 'method': method}
+    return {name: _field(name, labels) for name in (
+        'http_request_duration_seconds_sum', 'http_request_duration_seconds_count',
+        'http_request_db_queries_total', 'http_request_db_seconds_total',
+        'http_request_cache_hits_total', 'http_request_cache_misses_total',
+        'http_request_serialize_seconds_total', 'http_request_render_seconds_total',
+    )}
+
+
+@lru_cache(maxsize=4096)
+def _labelled_field(name, route, method, key, value):
+    return _field(name, {'route': route, 'method': method, key: value})
+
+
+def _parse_field(field):
+    name, labels = json.loads(field)
+    return name, dict(labels)
+
+
+class MetricsRegistry:
+    """按路由聚合的请求指标
+    每个进程先在内存中累加，Redis 可用时每隔 MONITOR_FLUSH_INTERVAL 秒把增量 HINCRBYFLOAT 到一个哈希，
+    /api/metrics 读取的是所有进程的合计；否则只能看到当前进程的数据。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self._totals = defaultdict(float)  # 非 Redis 环境下的进程内累计
+        self._flushed_at = time.monotonic()
+
+    def observe(self, route, method, status, stats, duration):
+        # 字段名按 (路由, 方法) 缓存，避免每个请求都序列化标签
+        fields = _request_fields(route, method)
+        values = {
+            _labelled_field('http_requests_total', route, method, 'status', str(status)): 1,
+            fields['http_request_duration_seconds_sum']: duration,
+            fields['http_request_duration_seconds_count']: 1,
+            fields['http_request_db_queries_total']: stats.db_count,
+            fields['http_request_db_seconds_total']: stats.db_time,
+            fields['http_request_cache_hits_total']: stats.cache_hits,
+            fields['http_request_cache_misses_total']: stats.cache_misses,
+            fields['http_request_serialize_seconds_total']: stats.serialize_time,
+            fields['http_request_render_seconds_total']: stats.render_time,
+        }
+        # 直方图只记录落入的第一个桶，输出时再累加成 Prometheus 要求的累计值
+        bucket = next((str(le) for le in settings.MONITOR_LATENCY_BUCKETS if duration <= le), '+Inf')
+        values[_labelled_field('http_request_duration_seconds_bucket', route, method, 'le', bucket)] = 1
+
+        with self._lock:
+            for field, value in values.items():
+                if value:
+                    self._pending[field] += value
+            due = time.monotonic() - self._flushed_at >= settings.MONITOR_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        if not is_redis():
+            with self._lock:
+                for field, value in pending.items():
+                    self._totals[field] += value
+            return
+        try:
+            pipe = get_client().pipeline(transaction=False)
+            key = cache.make_key(REDIS_KEY)
+            for field, value in pending.items():
+                pipe.hincrbyfloat(key, field, value)
+            pipe.execute()
+        except Exception:
+            logger.exception('写入请求指标失败')
+
+    def snapshot(self):
+        """[(指标名, 标签, 值)]，包含所有进程已写入的数据"""
+        self.flush()
+        if is_redis():
+            raw = get_client().hgetall(cache.make_key(REDIS_KEY))
+            items = ((field.decode(), float(value)) for field, value in raw.items())
+        else:
+            with self._lock:
+                items = list(self._totals.items())
+        return [(*_parse_field(field), value) for field, value in items]
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._totals.clear()
+        if is_redis():
+            get_client().delete(cache.make_key(REDIS_KEY))
+
+
+registry = MetricsRegistry()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_prometheus(snapshot):
+    """按 Prometheus 文本格式输出"""
+    by_name = defaultdict(list)
+    buckets = defaultdict(dict)
+    for name, labels, value in snapshot:
+        if name == 'http_request_duration_seconds_bucket':
+            le = labels.pop('le')
+            buckets[tuple(sorted(labels.items()))][le] = value
+        else:
+            by_name[name].append((labels, value))
+
+    lines = []
+    for metric, (kind, help_text) in METRIC_HELP.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        if kind == 'histogram':
+            bounds = [str(le) for le in settings.MONITOR_LATENCY_BUCKETS] + ['+Inf']
+            for label_items, counts in sorted(buckets.items()):
+                cumulative = 0
+                for le in bounds:
+                    cumulative += counts.get(le, 0)
+                    lines.append(f'{metric}_bucket{_format_labels({**dict(label_items), "le": le})} '
+                                 f'{_format_value(cumulative)}')
+            for suffix in ('_sum', '_count'):
+                for labels, value in sorted(by_name[metric + suffix], key=lambda item: sorted(item[0].items())):
+                    lines.append(f'{metric}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        else:
+            for labels, value in sorted(by_name[metric], key=lambda item: sorted(item[0].items())):
+                lines.append(f'{metric}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from apps.monitor import traffic
+from apps.monitor.instrumentation import RequestStats, activate, current_stats, db_wrapper, deactivate
+from apps.monitor.memory import memory_profiler
+from apps.monitor.metrics import registry
+from apps.monitor.profiler import profiler
+
+
+def view_name(view_func, method):
+    """视图的完整名称，ViewSet 带上当前 action，如 apps.blog.views.ArticleViewSet.list"""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    name = f'{cls.__module__}.{cls.__qualname__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f'{name}.{action}' if action else name
+
+
+class RequestMetricsMiddleware:
+    """记录每个请求的 SQL 条数/耗时、缓存命中、序列化和渲染耗时
+    以 Server-Timing 响应头返回，并按路由聚合到 /api/metrics；慢 SQL 记入慢查询日志；内存分析开启时记录内存分配
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = settings.MONITOR_ENABLED
+        self.server_timing = settings.MONITOR_SERVER_TIMING
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = RequestStats()
+        memory_profiler.begin(stats)
+        token = activate(stats)
+        try:
+            with connection.execute_wrapper(db_wrapper):
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+        duration = time.perf_counter() - stats.start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        registry.observe(route, request.method, response.status_code, stats, duration)
+        memory_profiler.end(stats, f'{request.method} {route}')
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(stats, duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (stats := current_stats()) is not None:
+            stats.view = view_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # DRF 的 Response 在所有中间件的 process_template_response 之后渲染，用渲染回调计时
+        if (stats := current_stats()) is not None:
+            stats.render_start = time.perf_counter()
+
+            def finish_render(rendered):
+                stats.render_time += time.perf_counter() - stats.render_start
+
+            response.add_post_render_callback(finish_render)
+        return response
+
+    @staticmethod
+    def server_timing_header(stats, duration):
+        return ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_count} queries"',
+            f'cache;desc="hit={stats.cache_hits} miss={stats.cache_misses}"',
+            f'serialize;dur={stats.serialize_time * 1000:.1f}',
+            f'render;dur={stats.render_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+
+
+class TrafficRecordMiddleware:
+    """按比例抽样录制请求（脱敏），供 replay_traffic 重放；MONITOR_TRAFFIC_SAMPLE_RATE 为 0 时不加载"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.MONITOR_TRAFFIC_SAMPLE_RATE
+        self.exclude = tuple(settings.MONITOR_TRAFFIC_EXCLUDE)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate or request.path.startswith(self.exclude):
+            return self.get_response(request)
+
+        kind = traffic.content_kind(request.content_type)
+        body = traffic.read_json_body(request) if kind == 'json' else None
+        started_at = time.time()
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        if kind in ('form', 'multipart'):
+            body = traffic.form_body(request)
+        match = getattr(request, 'resolver_match', None)
+        entry = {'t': round(started_at, 3), 'm': request.method, 'p': request.path}
+        if request.GET:
+            entry['q'] = traffic.sanitize(traffic.query_dict(request.GET))
+        if body is not None:
+            entry['ct'], entry['b'] = kind, traffic.sanitize(body)
+        if 'HTTP_AUTHORIZATION' in request.META:
+            entry['a'] = 1
+        entry.update(r=match.route if match else None, s=response.status_code, ms=round(duration * 1000, 2))
+        traffic.write(entry)
+        return response
+
+
+class ProfilerMiddleware:
+    """采样分析器运行时，登记当前线程正在处理的路由（分析器只采样这些线程）"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            if profiler.running:
+                profiler.active.pop(threading.get_ident(), None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if profiler.running:
+            match = request.resolver_match
+            profiler.active[threading.get_ident()] = f'{request.method} {match.route if match else request.path}'
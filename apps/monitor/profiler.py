@@ -0,0 +1,230 @@
+"""进程内采样分析器
+后台线程每隔 MONITOR_PROFILER_INTERVAL 秒用 sys._current_frames() 读取一次正在处理请求的线程的调用栈，
+按路由聚合为折叠栈（根在前），导出为 collapsed 格式（flamegraph.pl、speedscope 均可读取）或 speedscope JSON。
+每个工作进程独立采样，通过 /api/monitor/profiler/ 或信号（MONITOR_PROFILER_SIGNAL）开关，
+停止时结果写入 MONITOR_PROFILER_DIR，export_profile 命令可合并多个进程的结果。
+"""
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 200
+MIN_INTERVAL = 0.001  # 最小采样间隔（秒），更短时采样线程会长时间占用 GIL
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+
+def _short_path(filename):
+    if 'site-packages' in filename:
+        return filename.rsplit('site-packages', 1)[1].lstrip('/\\')
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        return filename[len(base_dir):].lstrip('/\\')
+    return '/'.join(Path(filename).parts[-2:])
+
+
+def frame_label(code):
+    """栈帧标签：函数名 (文件:定义行)；折叠栈以分号分隔，标签中不能出现分号"""
+    return f'{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def parse_label(label):
+    """frame_label 的逆操作 -> (函数名, 文件, 行号)"""
+    name, _, location = label.rpartition(' (')
+    file, _, line = location.rstrip(')').rpartition(':')
+    return (name, file, int(line)) if name and line.isdigit() else (label, None, None)
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.running = False
+        self.active = {}  # 线程 ID -> 路由，由 ProfilerMiddleware 在请求期间维护
+        self.last_dump = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stacks = defaultdict(Counter)  # 路由 -> {折叠栈(元组): 次数}
+            self.samples = 0
+            self.sampling_time = 0.0
+            self.started_at = None
+            self.seconds = 0.0
+            self.interval = settings.MONITOR_PROFILER_INTERVAL
+
+    def start(self, interval=None, duration=None):
+        """开始采样（已在运行时返回 False）；duration 秒后自动停止，不超过 MONITOR_PROFILER_MAX_SECONDS"""
+        max_seconds = settings.MONITOR_PROFILER_MAX_SECONDS
+        duration = min(duration or max_seconds, max_seconds)
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = max(interval or settings.MONITOR_PROFILER_INTERVAL, MIN_INTERVAL)
+            self.started_at = time.time()
+            self.running = True
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(self.interval, duration),
+                name='sampling-profiler', daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self):
+        """停止采样并把结果写入文件，返回文件路径（未在运行时返回 None）"""
+        thread = self._thread
+        if thread is None:
+            return None
+        self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        return self.last_dump
+
+    def toggle(self):
+        return self.stop() if self.running else self.start()
+
+    def _run(self, interval, duration):
+        own = threading.get_ident()
+        labels = {}
+        start = time.perf_counter()
+        deadline = start + duration
+        try:
+            while not self._stop.wait(interval) and time.perf_counter() < deadline:
+                self.sample(own, labels)
+        finally:
+            with self._lock:
+                self.seconds += time.perf_counter() - start
+                self.running = False
+                self._thread = None
+                self.active.clear()
+            try:
+                self.last_dump = self.dump()
+            except Exception:
+                logger.exception('保存采样结果失败')
+
+    def sample(self, own=None, labels=None):
+        """采集一次：只记录正在处理请求的线程"""
+        labels = {} if labels is None else labels
+        active = self.active.copy()
+        if not active:
+            return
+        begin = time.perf_counter()
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, route in active.items():
+                frame = frames.get(ident)
+                if frame is None or ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[route][tuple(stack)] += 1
+            self.samples += 1
+            self.sampling_time += time.perf_counter() - begin
+
+    # ---------- 导出 ----------
+
+    def snapshot(self):
+        """当前结果：{pid, 开始时间, 采样时长, 间隔, 次数, 开销, stacks: {路由: {"a;b;c": 次数}}}"""
+        with self._lock:
+            seconds = self.seconds
+            if self.running and self.started_at:
+                seconds += time.time() - self.started_at
+            return {
+                'pid': os.getpid(),
+                'running': self.running,
+                'startedAt': self.started_at,
+                'seconds': round(seconds, 3),
+                'interval': self.interval,
+                'samples': self.samples,
+                # 采样线程占用的时间比例
+                'overheadPct': round(self.sampling_time / seconds * 100, 3) if seconds else 0,
+                'stacks': {route: {';'.join(stack): count for stack, count in counter.items()}
+                           for route, counter in self.stacks.items()},
+            }
+
+    def dump(self):
+        directory = Path(settings.MONITOR_PROFILER_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        profile = self.snapshot()
+        path = directory / f"profile-{profile['pid']}-{int(profile['startedAt'] or time.time())}.json"
+        path.write_text(json.dumps(profile, ensure_ascii=False), encoding='utf-8')
+        return str(path)
+
+    def install_signal(self, name):
+        """收到信号时开关采样；信号处理函数里只启动线程，避免与持有锁的主线程死锁"""
+        signum = getattr(signal, name, None)
+        if signum is None:
+            return False
+        try:
+            signal.signal(signum, lambda *args: threading.Thread(target=self.toggle, daemon=True).start())
+        except ValueError:  # 不在主线程（如部分测试环境）
+            return False
+        return True
+
+
+profiler = SamplingProfiler()
+
+
+def merge(profiles):
+    """合并多个进程的结果"""
+    stacks = defaultdict(Counter)
+    for profile in profiles:
+        for route, counter in profile['stacks'].items():
+            stacks[route].update(counter)
+    return {
+        'samples': sum(profile['samples'] for profile in profiles),
+        'pids': sorted({profile['pid'] for profile in profiles}),
+        'stacks': stacks,
+    }
+
+
+def collapsed(profile, route=None):
+    """collapsed 格式：每行 "路由;根帧;...;叶帧 次数"，路由作为最外层，火焰图按路由分组"""
+    lines = []
+    for name, counter in sorted(profile['stacks'].items()):
+        if route and name != route:
+            continue
+        label = name.replace(';', ',')
+        lines += [f'{label};{stack} {count}' for stack, count in sorted(counter.items())]
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def speedscope(profile, route=None, name='django profile'):
+    """speedscope 文件格式：每个路由一个 sampled profile，共享帧表"""
+    frames, index = [], {}
+    profiles = []
+    for route_name, counter in sorted(profile['stacks'].items()):
+        if route and route_name != route:
+            continue
+        samples, weights = [], []
+        for stack, count in sorted(counter.items()):
+            sample = []
+            for label in stack.split(';'):
+                if label not in index:
+                    index[label] = len(frames)
+                    function, file, line = parse_label(label)
+                    frames.append({'name': function, 'file': file, 'line': line} if file else {'name': function})
+                sample.append(index[label])
+            samples.append(sample)
+            weights.append(count)
+        profiles.append({'type': 'sampled', 'name': route_name, 'unit': 'none', 'startValue': 0,
+                         'endValue': sum(weights), 'samples': samples, 'weights': weights})
+    return {'$schema': SPEEDSCOPE_SCHEMA, 'name': name, 'exporter': 'djangoAdmin', 'activeProfileIndex': 0,
+            'shared': {'frames': frames}, 'profiles': profiles}
@@ -0,0 +1,67 @@
+"""接口 SQL 条数预算
+遍历各应用 urls.py 中的路由，在不同数据量下调用同一接口并比较 SQL 条数，
+条数随数据量增长（N+1）或超过预算时输出两次调用的 SQL 差异。
+"""
+import difflib
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.urls.resolvers import RegexPattern
+
+from apps.monitor.slow_queries import normalize_sql
+
+IGNORED_METHODS = {'head', 'options', 'trace'}
+
+
+def _methods(callback):
+    actions = getattr(callback, 'actions', None)
+    if actions:  # ViewSet：路由只响应 actions 中映射的方法（DRF 处理 GET 请求时会补上 head）
+        return {method.upper() for method in actions if method not in IGNORED_METHODS}
+    view_class = getattr(callback, 'view_class', None) or getattr(callback, 'cls', None)
+    if view_class is None:
+        return set()
+    return {method.upper() for method in view_class.http_method_names
+            if method not in IGNORED_METHODS and hasattr(view_class, method)}
+
+
+def _segment(pattern):
+    text = str(pattern.pattern)
+    if isinstance(pattern.pattern, RegexPattern):
+        text = text.removeprefix('^').removesuffix('$')
+    return text
+
+
+def app_routes(resolver=None, prefix='', in_app=False):
+    """[(路由名, 路径, 方法集合)]：只包含 apps.*.urls 中的路由，跳过 DRF 的 api-root 和 .json 后缀路由"""
+    resolver = resolver or get_resolver()
+    routes = []
+    for pattern in resolver.url_patterns:
+        path = prefix + _segment(pattern)
+        if isinstance(pattern, URLResolver):
+            urlconf = pattern.urlconf_name
+            module = urlconf if isinstance(urlconf, str) else getattr(urlconf, '__name__', '')
+            routes += app_routes(pattern, path, in_app or module.startswith('apps.'))
+        elif isinstance(pattern, URLPattern) and in_app:
+            if pattern.name == 'api-root' or '(?P<format>' in path:
+                continue
+            if methods := _methods(pattern.callback):
+                routes.append((pattern.name, path, methods))
+    return routes
+
+
+def capture(func):
+    """执行 func，返回 (结果, [SQL])"""
+    with CaptureQueriesContext(connection) as context:
+        result = func()
+    return result, [query['sql'] for query in context.captured_queries]
+
+
+def describe(label, budget, baseline, queries):
+    """预算检查失败时的说明：规范化后的 SQL 差异（小数据量 -> 大数据量）和完整 SQL 列表"""
+    lines = [f'{label}: {len(queries)} 条 SQL，预算 {budget}，小数据量时 {len(baseline)} 条']
+    lines += difflib.unified_diff([normalize_sql(sql) for sql in baseline], [normalize_sql(sql) for sql in queries],
+                                  'small', 'large', lineterm='', n=1)
+    lines.append('SQL:')
+    lines += [f'{index:>3}. {sql}' for index, sql in enumerate(queries, 1)]
+    return '\n'.join(lines)
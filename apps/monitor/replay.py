@@ -0,0 +1,144 @@
+"""流量重放
+按录制时的时间间隔（可按倍数加速）把 traffic 记录的请求重新发给本地实例，按接口统计延迟，
+并可与另一次重放（另一个版本）的报告逐接口比较。
+"""
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+from apps.monitor.benchmark import latency_summary, percentile
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def restore(value):
+    """还原脱敏时截断的字符串（按原长度补齐）和上传文件（同名同大小的占位内容）"""
+    if isinstance(value, dict):
+        if '$str' in value:
+            head = value['$str'] or 'x'
+            return (head * (value['len'] // len(head) + 1))[:value['len']]
+        if '$file' in value:
+            return SimpleUploadedFile(value['$file'], b'\0' * value['size'], value.get('type'))
+        return {key: restore(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [restore(item) for item in value]
+    return value
+
+
+def build_request(entry):
+    """记录 -> (路径含查询参数, 方法, 请求体, Content-Type)"""
+    path = entry['p']
+    if query := entry.get('q'):
+        path = f'{path}?{urlencode(restore(query), doseq=True)}'
+    kind, body = entry.get('ct'), entry.get('b')
+    if body is None or (isinstance(body, dict) and any(key in body for key in ('$skipped', '$invalid', '$unparsed'))):
+        return path, entry['m'], b'', None
+    body = restore(body)
+    if kind == 'json':
+        return path, entry['m'], json.dumps(body).encode(), 'application/json'
+    if kind == 'multipart':
+        return path, entry['m'], encode_multipart(BOUNDARY, body), MULTIPART_CONTENT
+    return path, entry['m'], urlencode(body, doseq=True).encode(), 'application/x-www-form-urlencoded'
+
+
+def endpoint(entry):
+    return f"{entry['m']} {entry.get('r') or entry['p']}"
+
+
+def select(entries, read_only=False, skip_uploads=False):
+    if read_only:
+        entries = [entry for entry in entries if entry['m'] in SAFE_METHODS]
+    if skip_uploads:
+        entries = [entry for entry in entries if entry.get('ct') != 'multipart']
+    return entries
+
+
+def replay(entries, send, speed=1.0, concurrency=8):
+    """按录制时间重放：speed 为倍速，0 表示不等待、尽快发送；返回 (逐条结果, 总耗时)
+    逐条结果为 (记录, 状态码, 耗时秒, 相对计划时间的延后秒数)；延后说明并发不够，重放跟不上原始节奏
+    """
+    pending = queue.Queue(maxsize=concurrency * 4)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        try:
+            while (item := pending.get()) is not None:
+                entry, scheduled = item
+                path, method, body, content_type = build_request(entry)
+                start = time.perf_counter()
+                try:
+                    status = send(path, method, body, content_type, authenticated=bool(entry.get('a')))
+                except Exception:
+                    status = None
+                local.append((entry, status, time.perf_counter() - start, max(0.0, start - scheduled)))
+        finally:
+            connections.close_all()
+            with lock:
+                results.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    base = entries[0]['t'] if entries else 0
+    for entry in entries:
+        scheduled = start + (entry['t'] - base) / speed if speed else time.perf_counter()
+        if (delay := scheduled - time.perf_counter()) > 0:
+            time.sleep(delay)
+        pending.put((entry, scheduled))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """按接口（方法 + 路由）统计；recorded 为录制时的延迟，statusChanged 为状态码与录制时不同的请求数"""
+    groups = defaultdict(list)
+    for result in results:
+        groups[endpoint(result[0])].append(result)
+
+    endpoints = {}
+    for key, items in sorted(groups.items()):
+        endpoints[key] = {
+            'count': len(items),
+            'errors': sum(1 for _, status, _, _ in items if status is None or status >= 500),
+            'statusChanged': sum(1 for entry, status, _, _ in items if status != entry.get('s')),
+            'latencyMs': latency_summary([duration for _, _, duration, _ in items]),
+            'recordedMs': latency_summary([entry['ms'] / 1000 for entry, _, _, _ in items if 'ms' in entry]),
+        }
+    lags = sorted(lag * 1000 for _, _, _, lag in results)
+    return {
+        'requests': len(results),
+        'errors': sum(item['errors'] for item in endpoints.values()),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(results) / elapsed, 2) if elapsed else None,
+        'lagMs': {'p50': round(percentile(lags, 50), 2), 'p95': round(percentile(lags, 95), 2)} if lags else None,
+        'endpoints': endpoints,
+    }
+
+
+def compare(baseline, report, metrics=('p50', 'p95', 'p99')):
+    """逐接口比较两次重放：[(接口, 指标, 基准值, 当前值, 变化百分比)]，按 p95 变化幅度倒序"""
+    rows = []
+    for key, result in report['endpoints'].items():
+        old = baseline['endpoints'].get(key)
+        if old is None:
+            continue
+        for metric in metrics:
+            before, after = old['latencyMs'][metric], result['latencyMs'][metric]
+            change = round((after - before) / before * 100, 1) if before and after is not None else None
+            rows.append((key, metric, before, after, change))
+    p95_change = {key: abs(change or 0) for key, metric, _, _, change in rows if metric == 'p95'}
+    rows.sort(key=lambda row: -p95_change.get(row[0], 0))
+    return rows
@@ -0,0 +1,172 @@
+"""慢查询日志
+请求内执行超过 MONITOR_SLOW_QUERY_MS 毫秒的 SQL 记录到定长环形缓冲（所有进程共享），
+每条记录带规范化后的指纹、所在视图和调用栈摘要；同一指纹第一次出现时执行一次 EXPLAIN 保存执行计划。
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from djangoAdmin.utils.redis_ops import push_capped, read_list
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_KEY = 'monitor:slowsql:samples'
+PLAN_KEY = 'monitor:slowsql:plan:{}'
+SAMPLES_TTL = 7 * 24 * 3600
+PLAN_TTL = 24 * 3600  # 执行计划保留一天，过期后同一指纹再次变慢时重新 EXPLAIN
+SQL_MAX_LENGTH = 2000
+STACK_DEPTH = 6
+
+_explaining = ContextVar('slow_query_explaining', default=False)
+_explained = {}  # 本进程已 EXPLAIN 过的指纹 -> 过期时间，减少缓存往返
+EXPLAINED_MAX = 10000
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES_LIST = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+_DJANGO_DB = os.path.join(os.sep, 'django', 'db', '')
+
+
+def normalize_sql(sql):
+    """去掉字面量和参数，IN 列表、批量 VALUES 折叠，只保留语句结构"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    sql = _VALUES_LIST.sub(r'\1', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def _short_path(filename, base_dir):
+    if 'site-packages' in filename:
+        return filename.rsplit('site-packages', 1)[1].lstrip('/\\')
+    return str(Path(filename).relative_to(base_dir))
+
+
+def stack_summary():
+    """项目代码中的调用栈（最内层在后）；视图直接继承第三方实现（如 DRF 的 list）时退化为第三方库的栈帧，
+    跳过 django.db 和监控代码本身"""
+    base_dir = str(settings.BASE_DIR)
+    monitor_dir = str(Path(__file__).resolve().parent)
+    project, library = [], []
+    for frame in traceback.extract_stack():
+        filename = frame.filename
+        if filename.startswith(monitor_dir) or _DJANGO_DB in filename:
+            continue
+        line = frame.lineno, frame.name
+        if filename.startswith(base_dir) and 'site-packages' not in filename:
+            # 跳过 manage.py 等根目录下的入口脚本
+            if os.sep in filename[len(base_dir):].lstrip(os.sep):
+                project.append((filename, *line))
+        elif 'site-packages' in filename:
+            library.append((filename, *line))
+    frames = project or library
+    return [f'{_short_path(filename, base_dir)}:{lineno} {name}' for filename, lineno, name in frames[-STACK_DEPTH:]]
+
+
+def explain(connection, sql, params):
+    """执行 EXPLAIN，返回 [{列名: 值}]；只处理 SELECT"""
+    if not sql.lstrip()[:6].upper() == 'SELECT':
+        return None
+    token = _explaining.set(True)
+    try:
+        # 放在保存点里，EXPLAIN 失败不会破坏外层事务
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        _explaining.reset(token)
+
+
+def _capture_plan(key, normalized, connection, sql, params):
+    now = time.monotonic()
+    if _explained.get(key, 0) > now:
+        return
+    if len(_explained) >= EXPLAINED_MAX:
+        _explained.clear()
+    _explained[key] = now + PLAN_TTL
+    if not cache.add(PLAN_KEY.format(key), None, timeout=PLAN_TTL):
+        return  # 其他进程已经 EXPLAIN 过
+    try:
+        plan = explain(connection, sql, params)
+    except Exception as e:
+        plan = [{'error': str(e)}]
+    cache.set(PLAN_KEY.format(key), {'sql': normalized, 'plan': plan, 'at': int(time.time())}, timeout=PLAN_TTL)
+
+
+def record(sql, params, many, context, duration, view):
+    """记录一条慢查询（由 db_wrapper 在超过阈值时调用）"""
+    if _explaining.get():
+        return
+    try:
+        normalized = normalize_sql(sql)
+        key = fingerprint(normalized)
+        push_capped(SAMPLES_KEY, {
+            'fingerprint': key,
+            'sql': normalized[:SQL_MAX_LENGTH],
+            'ms': round(duration * 1000, 2),
+            'many': many,
+            'view': view,
+            'stack': stack_summary(),
+            'at': int(time.time()),
+        }, settings.MONITOR_SLOW_QUERY_BUFFER, SAMPLES_TTL)
+        if settings.MONITOR_SLOW_QUERY_EXPLAIN and not many:
+            _capture_plan(key, normalized, context['connection'], sql, params)
+    except Exception:
+        logger.exception('记录慢查询失败')
+
+
+def recent(limit=None):
+    """最近的慢查询样本（最新的在前）"""
+    return read_list(SAMPLES_KEY, limit)
+
+
+def summarize(samples=None, limit=None):
+    """按指纹聚合：次数、总/平均/最大耗时、涉及的视图、最慢一次的调用栈和执行计划，按总耗时倒序"""
+    groups = {}
+    for sample in recent() if samples is None else samples:
+        group = groups.get(sample['fingerprint'])
+        if group is None:
+            group = groups[sample['fingerprint']] = {
+                'fingerprint': sample['fingerprint'], 'sql': sample['sql'], 'count': 0, 'totalMs': 0.0,
+                'maxMs': 0.0, 'lastSeen': sample['at'], 'views': set(), 'stack': sample['stack'],
+            }
+        group['count'] += 1
+        group['totalMs'] += sample['ms']
+        group['lastSeen'] = max(group['lastSeen'], sample['at'])
+        if sample['view']:
+            group['views'].add(sample['view'])
+        if sample['ms'] > group['maxMs']:
+            group['maxMs'], group['stack'] = sample['ms'], sample['stack']
+
+    result = sorted(groups.values(), key=lambda group: group['totalMs'], reverse=True)[:limit]
+    plans = cache.get_many([PLAN_KEY.format(group['fingerprint']) for group in result])
+    for group in result:
+        group['totalMs'] = round(group['totalMs'], 2)
+        group['avgMs'] = round(group['totalMs'] / group['count'], 2)
+        group['views'] = sorted(group['views'])
+        plan = plans.get(PLAN_KEY.format(group['fingerprint']))
+        group['plan'] = plan['plan'] if plan else None
+    return result
+
+
+def clear():
+    """清空样本；执行计划按 PLAN_TTL 自然过期"""
+    cache.delete(SAMPLES_KEY)
@@ -0,0 +1,656 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework_jwt.settings import api_settings
+
+from apps.blog.models import Article, ArticleTag, Category, Comment, Config, Photo, PhotoAlbum, Tag
+from apps.menu.models import SysMenu, SysMenuClosure, SysRoleMenu
+from apps.monitor import benchmark, replay, slow_queries, traffic
+from apps.monitor.bench_data import DatasetGenerator, default_sizes
+from apps.monitor.memory import memory_profiler
+from apps.monitor.metrics import registry
+from apps.monitor.profiler import MIN_INTERVAL, SamplingProfiler, collapsed, profiler, speedscope
+from apps.monitor.query_budget import app_routes, capture, describe
+from apps.role.models import SysRole, SysUserRole
+from apps.user.models import SysUser
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        Tag.objects.create(tag_name='python')
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/blog/tags/')
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'cache', 'serialize', 'render', 'total'})
+        self.assertIn('desc="1 queries"', timing['db'])
+
+        cache.set('key', 1)
+        response = self.client.get('/api/statistics/')
+        self.assertIn('hit=0 miss=1', response['Server-Timing'])
+        response = self.client.get('/api/statistics/')
+        self.assertIn('hit=1 miss=0', response['Server-Timing'])
+
+    def test_prometheus_endpoint(self):
+        for _ in range(3):
+            self.client.get('/api/blog/tags/')
+        auth = {'HTTP_AUTHORIZATION': 'Bearer secret'}
+        with self.settings(MONITOR_METRICS_TOKEN='secret'):
+            body = self.client.get('/api/metrics', **auth).content.decode()
+            # 令牌错误、缺失，或来源不在白名单
+            self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/api/metrics', REMOTE_ADDR='10.0.0.1', **auth).status_code, 403)
+        # 未配置令牌时关闭，本机请求（反向代理转发）也不能访问
+        self.assertEqual(self.client.get('/api/metrics', **auth).status_code, 403)
+        route = 'route="api/blog/tags/$"'
+        self.assertIn(f'http_requests_total{{method="GET",{route},status="200"}} 3', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{method="GET",{route},le="+Inf"}} 3', body)
+        self.assertIn(f'http_request_db_queries_total{{method="GET",{route}}} 3', body)
+
+
+@override_settings(MONITOR_SLOW_QUERY_MS=0, PERMISSION_VERSION_CHECK_INTERVAL=0)
+class SlowQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        slow_queries._explained.clear()
+        Tag.objects.create(tag_name='python')
+
+    def test_normalize(self):
+        self.assertEqual(
+            slow_queries.normalize_sql("SELECT * FROM t1 WHERE id IN (%s, %s,%s) AND name = 'a''b'  LIMIT 21"),
+            'SELECT * FROM t1 WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+        self.assertEqual(slow_queries.normalize_sql('INSERT INTO t (a) VALUES (%s), (%s), (%s)'),
+                         'INSERT INTO t (a) VALUES (...)')
+
+    def test_records_and_explains(self):
+        for _ in range(2):
+            self.client.get('/api/blog/tags/')
+        samples = slow_queries.recent()
+        self.assertEqual(len(samples), 2)
+        self.assertEqual(samples[0]['view'], 'apps.blog.views.TagViewSet.list')
+        # list 直接继承自 DRF，调用栈退化为第三方库的栈帧
+        self.assertIn('rest_framework/mixins.py', ' '.join(samples[0]['stack']))
+
+        [group] = slow_queries.summarize()
+        self.assertEqual(group['count'], 2)
+        self.assertIn('FROM "blog_tag"', group['sql'])
+        self.assertTrue(group['plan'])  # EXPLAIN 只执行一次，结果挂在指纹上
+        self.assertNotIn('error', group['plan'][0])
+
+        # SQL、调用栈和执行计划只对超级管理员开放
+        user = SysUser.objects.create(username='user')
+        for method in ('get', 'delete'):
+            response = getattr(self.client, method)('/api/monitor/slow-queries/', HTTP_AUTHORIZATION=(
+                api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(user))))
+            self.assertEqual(response.status_code, 403)
+
+        admin = SysUser.objects.create(username='admin')
+        SysUserRole.objects.create(user=admin, role=SysRole.objects.create(name='超级管理员', code='admin'))
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(admin))
+        response = self.client.get('/api/monitor/slow-queries/')
+        self.assertIn(group['fingerprint'], [query['fingerprint'] for query in response.json()['data']['queries']])
+
+    def test_project_stack(self):
+        self.client.get('/api/blog/tags/tag-list/')
+        sample = slow_queries.recent(1)[0]
+        self.assertEqual(sample['view'], 'apps.blog.views.TagViewSet.tag_list')
+        self.assertTrue(sample['stack'][-1].startswith('apps/blog/views.py'))
+
+
+PASSWORD = hashlib.md5(b'123456').hexdigest()
+
+
+@override_settings(PERMISSION_VERSION_CHECK_INTERVAL=0, MONITOR_SLOW_QUERY_MS=None)
+class QueryBudgetTests(TestCase):
+    """每个接口在两种数据量下调用，SQL 条数不能随数据量增长，也不能超过预算
+    新增接口必须在 BUDGETS 中登记；预算按预热后的稳态（缓存已填充）计算
+    """
+    SMALL, LARGE = 3, 8
+
+    # (路由名, 方法) -> SQL 条数预算
+    BUDGETS = {
+        ('login', 'POST'): 2,
+        ('register', 'POST'): 3,
+        ('captcha', 'GET'): 0,
+        ('captcha-pool', 'GET'): 0,
+        ('update-avatar', 'POST'): 2,
+        ('bootstrap', 'GET'): 1,
+        ('user-list', 'GET'): 3,
+        ('user-list', 'POST'): 2,
+        ('user-batch-delete', 'DELETE'): 9,
+        ('user-detail', 'GET'): 1,
+        ('user-detail', 'PUT'): 3,
+        ('user-detail', 'PATCH'): 2,
+        ('user-detail', 'DELETE'): 9,
+        ('user-assign-roles', 'PATCH'): 3,
+        ('user-change-status', 'PATCH'): 2,
+        ('user-reset-password', 'PATCH'): 2,
+        ('role-list', 'GET'): 1,
+        ('role-list', 'POST'): 1,
+        ('role-batch-delete', 'DELETE'): 6,
+        ('role-role-list', 'GET'): 3,
+        ('role-detail', 'GET'): 1,
+        ('role-detail', 'PUT'): 2,
+        ('role-detail', 'PATCH'): 2,
+        ('role-detail', 'DELETE'): 6,
+        ('role-assign-menus', 'PATCH'): 3,
+        ('menu-list', 'GET'): 0,
+        ('menu-list', 'POST'): 10,
+        ('menu-menu-tree', 'GET'): 0,
+        ('menu-detail', 'GET'): 2,
+        ('menu-detail', 'PUT'): 12,
+        ('menu-detail', 'PATCH'): 12,
+        ('menu-detail', 'DELETE'): 9,
+        ('article-list', 'GET'): 3,
+        ('article-list', 'POST'): 6,
+        ('article-detail', 'GET'): 2,
+        ('article-detail', 'PUT'): 10,
+        ('article-detail', 'PATCH'): 3,
+        ('article-detail', 'DELETE'): 4,
+        ('article-adjacent-articles', 'GET'): 6,
+        ('article-change-top', 'PATCH'): 3,
+        ('category-list', 'GET'): 1,
+        ('category-list', 'POST'): 2,
+        ('category-category-list', 'GET'): 2,
+        ('category-detail', 'GET'): 1,
+        ('category-detail', 'PUT'): 4,
+        ('category-detail', 'PATCH'): 4,
+        ('category-detail', 'DELETE'): 3,
+        ('tag-list', 'GET'): 1,
+        ('tag-list', 'POST'): 2,
+        ('tag-tag-list', 'GET'): 2,
+        ('tag-detail', 'GET'): 1,
+        ('tag-detail', 'PUT'): 4,
+        ('tag-detail', 'PATCH'): 4,
+        ('tag-detail', 'DELETE'): 3,
+        ('photo-list', 'GET'): 2,
+        ('photo-list', 'POST'): 2,
+        ('photo-batch-delete', 'DELETE'): 2,
+        ('photo-change-status', 'PATCH'): 2,
+        ('photo-delete-recycled-status', 'GET'): 0,
+        ('photo-timeline', 'GET'): 1,
+        ('photo-detail', 'GET'): 1,
+        ('photo-detail', 'PUT'): 3,
+        ('photo-detail', 'PATCH'): 2,
+        ('photo-detail', 'DELETE'): 2,
+        ('album-list', 'GET'): 2,
+        ('album-list', 'POST'): 1,
+        ('album-detail', 'GET'): 1,
+        ('album-detail', 'PUT'): 3,
+        ('album-detail', 'PATCH'): 3,
+        ('album-detail', 'DELETE'): 4,
+        ('config-list', 'GET'): 1,
+        ('config-list', 'POST'): 1,
+        ('config-detail', 'GET'): 1,
+        ('config-detail', 'PUT'): 2,
+        ('config-detail', 'PATCH'): 2,
+        ('config-detail', 'DELETE'): 2,
+        ('comment-list', 'GET'): 1,
+        ('comment-list', 'POST'): 3,
+        ('comment-batch-delete', 'DELETE'): 2,
+        ('comment-message-list', 'GET'): 2,
+        ('comment-detail', 'GET'): 1,
+        ('comment-detail', 'PUT'): 3,
+        ('comment-detail', 'PATCH'): 2,
+        ('comment-detail', 'DELETE'): 2,
+        ('statistics', 'GET'): 0,
+        ('statistics-series', 'GET'): 1,
+        ('slow-queries', 'GET'): 0,
+        ('slow-queries', 'DELETE'): 0,
+        ('profiler', 'GET'): 0,
+        ('profiler', 'POST'): 0,
+        ('profiler', 'DELETE'): 0,
+        ('memory', 'GET'): 0,
+        ('memory', 'POST'): 0,
+    }
+
+    # 不参与检查的接口及原因
+    SKIPPED = {
+        ('photo-delete-recycled', 'DELETE'): '在后台线程中分批删除，由 purge_recycled_photos 命令覆盖',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = SysUser.objects.create(username='admin', password=PASSWORD, status=0)
+        cls.admin_role = SysRole.objects.create(name='超级管理员', code='admin')
+        SysUserRole.objects.create(user=cls.admin, role=cls.admin_role)
+        cls.root_menu = SysMenu.objects.create(name='系统管理', menu_type='M', order_num=1)
+        cls.config = Config.objects.create(blog_name='blog')
+        cls.users, cls.roles, cls.menus, cls.categories, cls.tags = [], [], [], [], []
+        cls.articles, cls.comments, cls.albums, cls.photos = [], [], [], []
+
+    def setUp(self):
+        cache.clear()
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(self.admin))
+
+    def seed(self, count):
+        """每种数据追加 count 条，各列表接口的结果随之变大"""
+        start = len(self.users)
+        for index in range(start, start + count):
+            user = SysUser.objects.create(username=f'user{index}', password=PASSWORD, status=0)
+            role = SysRole.objects.create(name=f'role{index}', code=f'role{index}')
+            SysUserRole.objects.create(user=user, role=role)
+            menu = SysMenu.objects.create(name=f'menu{index}', parent=self.root_menu, order_num=index)
+            button = SysMenu.objects.create(name=f'button{index}', parent=menu, menu_type='F',
+                                            perms=f'system:test:{index}')
+            SysRoleMenu.objects.bulk_create([SysRoleMenu(role=role, menu=menu), SysRoleMenu(role=role, menu=button)])
+            category = Category.objects.create(category_name=f'category{index}')
+            tag = Tag.objects.create(tag_name=f'tag{index}')
+            article = Article.objects.create(article_title=f'article{index}', author=user, category=category,
+                                             article_content='content', article_description='description')
+            ArticleTag.objects.create(article=article, tag=tag)
+            if self.tags:
+                ArticleTag.objects.create(article=article, tag=self.tags[0])
+            comments = [Comment.objects.create(comment_type=comment_type, from_user=user, content='comment')
+                        for comment_type in (1, 3)]
+            album = PhotoAlbum.objects.create(album_name=f'album{index}')
+            photos = [Photo.objects.create(album=album, url=f'https://example.com/{index}-{status}.jpg',
+                                           status=status, taken_at=now() - timedelta(days=index))
+                      for status in (1, 1, 2)]
+            self.users.append(user)
+            self.roles.append(role)
+            self.menus += [menu, button]
+            self.categories.append(category)
+            self.tags.append(tag)
+            self.articles.append(article)
+            self.comments += comments
+            self.albums.append(album)
+            self.photos += photos
+
+    def captcha(self):
+        token = uuid.uuid4().hex
+        cache.set(f'captcha_{token}', 'abcd')
+        return {'captcha': 'abcd', 'captcha_token': token}
+
+    def requests(self):
+        """(路由名, 方法) -> 返回 (URL 参数, 请求数据) 的函数；批量接口的数据量随 seed 增长"""
+        user, role, article, photo = self.users[0], self.roles[0], self.articles[1], self.photos[0]
+        menu, category, tag, album, comment = self.menus[0], self.categories[0], self.tags[0], self.albums[0], \
+            self.comments[0]
+        page = {'pageNum': 1, 'pageSize': 100}
+        article_data = {'article_title': 'new', 'article_content': 'content', 'article_description': 'description',
+                        'category': category.id, 'tags': [tag.id for tag in self.tags]}
+        comment_data = {'content': 'comment', 'comment_type': 3, 'from_user_id': user.id,
+                        'created_at': now(), 'updated_at': now()}
+        menu_data = {'name': 'renamed', 'parent': self.root_menu.id}
+        return {
+            ('login', 'POST'): lambda: ({}, {'username': 'admin', 'password': '123456', **self.captcha()}),
+            ('register', 'POST'): lambda: ({}, {'username': 'newcomer', 'password': '123456', **self.captcha()}),
+            ('captcha', 'GET'): lambda: ({}, {}),
+            ('captcha-pool', 'GET'): lambda: ({}, {}),
+            ('update-avatar', 'POST'): lambda: ({}, {'id': user.id, 'avatar': 'https://example.com/a.jpg'}),
+            ('bootstrap', 'GET'): lambda: ({}, {}),
+            ('user-list', 'GET'): lambda: ({}, page),
+            ('user-list', 'POST'): lambda: ({}, {'username': 'created'}),
+            ('user-batch-delete', 'DELETE'): lambda: ({}, [user.id for user in self.users]),
+            ('user-detail', 'GET'): lambda: ({'pk': user.id}, {}),
+            ('user-detail', 'PUT'): lambda: ({'pk': user.id}, {'username': 'renamed'}),
+            ('user-detail', 'PATCH'): lambda: ({'pk': user.id}, {'oldPassword': '123456', 'newPassword': '654321'}),
+            ('user-detail', 'DELETE'): lambda: ({'pk': user.id}, {}),
+            ('user-assign-roles', 'PATCH'): lambda: ({'pk': user.id},
+                                                     {'id': user.id, 'roleIds': [role.id for role in self.roles]}),
+            ('user-change-status', 'PATCH'): lambda: ({'pk': user.id}, {'status': 1}),
+            ('user-reset-password', 'PATCH'): lambda: ({'pk': user.id}, {}),
+            ('role-list', 'GET'): lambda: ({}, {}),
+            ('role-list', 'POST'): lambda: ({}, {'name': 'created', 'code': 'created'}),
+            ('role-batch-delete', 'DELETE'): lambda: ({}, [role.id for role in self.roles]),
+            ('role-role-list', 'GET'): lambda: ({}, page),
+            ('role-detail', 'GET'): lambda: ({'pk': role.id}, {}),
+            ('role-detail', 'PUT'): lambda: ({'pk': role.id}, {'name': 'renamed', 'code': 'renamed'}),
+            ('role-detail', 'PATCH'): lambda: ({'pk': role.id}, {'remark': 'remark'}),
+            ('role-detail', 'DELETE'): lambda: ({'pk': role.id}, {}),
+            ('role-assign-menus', 'PATCH'): lambda: ({'pk': role.id}, {'menuIds': [menu.id for menu in self.menus]}),
+            ('menu-list', 'GET'): lambda: ({}, {}),
+            ('menu-list', 'POST'): lambda: ({}, {'name': 'created', 'parent': self.root_menu.id}),
+            ('menu-menu-tree', 'GET'): lambda: ({}, {}),
+            ('menu-detail', 'GET'): lambda: ({'pk': self.root_menu.id}, {}),
+            ('menu-detail', 'PUT'): lambda: ({'pk': menu.id}, menu_data),
+            ('menu-detail', 'PATCH'): lambda: ({'pk': menu.id}, menu_data),
+            ('menu-detail', 'DELETE'): lambda: ({'pk': self.root_menu.id}, {}),
+            ('article-list', 'GET'): lambda: ({}, page),
+            ('article-list', 'POST'): lambda: ({}, dict(article_data)),
+            ('article-detail', 'GET'): lambda: ({'pk': article.id}, {}),
+            ('article-detail', 'PUT'): lambda: ({'pk': article.id}, dict(article_data)),
+            ('article-detail', 'PATCH'): lambda: ({'pk': article.id}, {}),
+            ('article-detail', 'DELETE'): lambda: ({'pk': article.id}, {}),
+            ('article-adjacent-articles', 'GET'): lambda: ({'pk': article.id}, {}),
+            ('article-change-top', 'PATCH'): lambda: ({'pk': article.id}, {'is_top': 1}),
+            ('category-list', 'GET'): lambda: ({}, {}),
+            ('category-list', 'POST'): lambda: ({}, {'category_name': 'created'}),
+            ('category-category-list', 'GET'): lambda: ({}, page),
+            ('category-detail', 'GET'): lambda: ({'pk': category.id}, {}),
+            ('category-detail', 'PUT'): lambda: ({'pk': category.id}, {'category_name': 'renamed'}),
+            ('category-detail', 'PATCH'): lambda: ({'pk': category.id}, {'category_name': 'renamed'}),
+            ('category-detail', 'DELETE'): lambda: ({'pk': category.id}, {}),
+            ('tag-list', 'GET'): lambda: ({}, {}),
+            ('tag-list', 'POST'): lambda: ({}, {'tag_name': 'created'}),
+            ('tag-tag-list', 'GET'): lambda: ({}, page),
+            ('tag-detail', 'GET'): lambda: ({'pk': tag.id}, {}),
+            ('tag-detail', 'PUT'): lambda: ({'pk': tag.id}, {'tag_name': 'renamed'}),
+            ('tag-detail', 'PATCH'): lambda: ({'pk': tag.id}, {'tag_name': 'renamed'}),
+            ('tag-detail', 'DELETE'): lambda: ({'pk': tag.id}, {}),
+            ('photo-list', 'GET'): lambda: ({}, {}),
+            ('photo-list', 'POST'): lambda: ({}, {'album_id': album.id, 'urls': ['https://example.com/new.jpg']}),
+            ('photo-batch-delete', 'DELETE'): lambda: ({}, {'photoIds': [photo.id for photo in self.photos]}),
+            ('photo-change-status', 'PATCH'): lambda: ({}, {'photoIds': [photo.id for photo in self.photos
+                                                                          if photo.status == 1]}),
+            ('photo-delete-recycled-status', 'GET'): lambda: ({}, {}),
+            ('photo-timeline', 'GET'): lambda: ({}, {}),
+            ('photo-detail', 'GET'): lambda: ({'pk': photo.id}, {}),
+            ('photo-detail', 'PUT'): lambda: ({'pk': photo.id}, {'url': 'https://example.com/x.jpg', 'status': 1,
+                                                                 'album_id': album.id}),
+            ('photo-detail', 'PATCH'): lambda: ({'pk': photo.id}, {'url': 'https://example.com/y.jpg'}),
+            ('photo-detail', 'DELETE'): lambda: ({'pk': photo.id}, {}),
+            ('album-list', 'GET'): lambda: ({}, page),
+            ('album-list', 'POST'): lambda: ({}, {'album_name': 'created'}),
+            ('album-detail', 'GET'): lambda: ({'pk': album.id}, {}),
+            ('album-detail', 'PUT'): lambda: ({'pk': album.id}, {'album_name': 'renamed'}),
+            ('album-detail', 'PATCH'): lambda: ({'pk': album.id}, {'album_name': 'renamed'}),
+            ('album-detail', 'DELETE'): lambda: ({'pk': album.id}, {}),
+            ('config-list', 'GET'): lambda: ({}, {}),
+            ('config-list', 'POST'): lambda: ({}, {'blog_name': 'created'}),
+            ('config-detail', 'GET'): lambda: ({'pk': self.config.id}, {}),
+            ('config-detail', 'PUT'): lambda: ({'pk': self.config.id}, {'blog_name': 'renamed'}),
+            ('config-detail', 'PATCH'): lambda: ({'pk': self.config.id}, {'blog_notice': 'notice'}),
+            ('config-detail', 'DELETE'): lambda: ({'pk': self.config.id}, {}),
+            ('comment-list', 'GET'): lambda: ({}, {}),
+            ('comment-list', 'POST'): lambda: ({}, {'content': 'comment', 'comment_type': 3, 'user_id': user.id}),
+            ('comment-batch-delete', 'DELETE'): lambda: ({}, {'comment_ids': [item.id for item in self.comments]}),
+            ('comment-message-list', 'GET'): lambda: ({}, {}),
+            ('comment-detail', 'GET'): lambda: ({'pk': comment.id}, {}),
+            ('comment-detail', 'PUT'): lambda: ({'pk': comment.id}, dict(comment_data)),
+            ('comment-detail', 'PATCH'): lambda: ({'pk': comment.id}, {'content': 'edited'}),
+            ('comment-detail', 'DELETE'): lambda: ({'pk': comment.id}, {}),
+            ('statistics', 'GET'): lambda: ({}, {}),
+            ('statistics-series', 'GET'): lambda: ({}, {}),
+            ('slow-queries', 'GET'): lambda: ({}, {}),
+            ('slow-queries', 'DELETE'): lambda: ({}, {}),
+            ('profiler', 'GET'): lambda: ({}, {}),
+            ('profiler', 'POST'): lambda: ({}, {'action': 'stop'}),
+            ('profiler', 'DELETE'): lambda: ({}, {}),
+            ('memory', 'GET'): lambda: ({}, {}),
+            ('memory', 'POST'): lambda: ({}, {'action': 'reset'}),
+        }
+
+    def call(self, name, method, build):
+        kwargs, data = build()
+        url = reverse(name, kwargs=kwargs)
+        if method == 'GET':
+            return self.client.get(url, data)
+        return self.client.generic(method, url, json.dumps(data, default=str), content_type='application/json')
+
+    def measure(self, requests):
+        """每个接口先预热一次再计数，写操作在回滚的事务中执行，互不影响"""
+        results = {}
+        for (name, method), build in requests.items():
+            for _ in range(2):
+                with transaction.atomic():
+                    response, queries = capture(lambda: self.call(name, method, build))
+                    transaction.set_rollback(True)
+            results[name, method] = response, queries
+        return results
+
+    def test_every_route_has_budget(self):
+        routes = {(name, method) for name, _, methods in app_routes() for method in methods}
+        missing = routes - set(self.BUDGETS) - set(self.SKIPPED)
+        self.assertFalse(missing, f'以下接口没有登记 SQL 预算: {sorted(missing)}')
+        self.assertFalse(set(self.BUDGETS) - routes, '预算中有已不存在的接口')
+
+    def test_query_budgets(self):
+        self.seed(self.SMALL)
+        small = self.measure({key: build for key, build in self.requests().items() if key in self.BUDGETS})
+        self.seed(self.LARGE - self.SMALL)
+        large = self.measure({key: build for key, build in self.requests().items() if key in self.BUDGETS})
+
+        for (name, method), budget in self.BUDGETS.items():
+            response, queries = large[name, method]
+            _, baseline = small[name, method]
+            label = f'{method} {name}'
+            with self.subTest(label):
+                self.assertLess(response.status_code, 400, f'{label}: {response.content[:300]}')
+                self.assertTrue(len(queries) == len(baseline) and len(queries) <= budget,
+                                describe(label, budget, baseline, queries))
+
+
+@override_settings(MONITOR_SLOW_QUERY_MS=None)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sizes = {**default_sizes(50), 'users': 10, 'menus': 20, 'comments': 30, 'photos': 30}
+        DatasetGenerator(sizes, batch_size=16).generate()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_dataset(self):
+        self.assertEqual(Article.objects.count(), 50)
+        self.assertEqual(ArticleTag.objects.count(), 150)
+        self.assertEqual(SysMenu.objects.filter(parent__isnull=True).count(), 1)
+        self.assertEqual(SysMenuClosure.objects.filter(depth=0).count(), 20)
+        self.assertTrue(SysUserRole.objects.filter(user__username='bench_admin', role__code='admin').exists())
+
+    def test_scenarios(self):
+        send = benchmark.ClientTransport(benchmark.auth_header())
+        samples = benchmark.Samples()
+        for name, build in benchmark.SCENARIOS.items():
+            path = build(samples)
+            with self.subTest(name, path=path):
+                self.assertEqual(send(path), 200)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([benchmark.percentile(values, p) for p in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(benchmark.percentile([7], 99), 7)
+
+
+@override_settings(MONITOR_SLOW_QUERY_MS=None, MONITOR_TRAFFIC_SAMPLE_RATE=1)
+class TrafficReplayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SysUser.objects.create(username='bench_admin', password='x', status=0)
+        self.token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(self.user))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(traffic.close)
+        self.log = f'{directory.name}/traffic-{{pid}}.jsonl'
+
+    def record(self):
+        with self.settings(MONITOR_TRAFFIC_LOG=self.log):
+            self.client.get('/api/blog/tags/?pageNum=1', HTTP_AUTHORIZATION=self.token)
+            self.client.post('/api/blog/tags/', {'tag_name': 'python', 'note': 'x' * 300},
+                             content_type='application/json', HTTP_AUTHORIZATION=self.token)
+            self.client.post('/api/user/login/', {'username': 'bench_admin', 'password': 'secret'},
+                             content_type='application/json')
+            self.client.post('/api/user/update-avatar/', {'id': self.user.id, 'avatar': 'a.png',
+                                                          'file': SimpleUploadedFile('a.png', b'x' * 10)},
+                             HTTP_AUTHORIZATION=self.token)
+            self.client.get('/api/metrics')
+        traffic.close()
+        return traffic.load([self.log.format(pid=os.getpid())])
+
+    def test_record(self):
+        get, create, login, upload = self.record()
+        self.assertEqual((get['m'], get['q'], get['a'], get['s']), ('GET', {'pageNum': '1'}, 1, 200))
+        self.assertEqual(create['b']['note'], {'$str': 'x' * 200, 'len': 300})
+        self.assertEqual(login['b'], {'username': 'bench_admin', 'password': '***'})
+        self.assertNotIn('a', login)
+        self.assertEqual(upload['ct'], 'multipart')
+        self.assertEqual(upload['b']['file'], {'$file': 'a.png', 'size': 10, 'type': 'text/plain'})
+
+    def test_replay(self):
+        entries = self.record()
+        path, method, body, content_type = replay.build_request(entries[1])
+        self.assertEqual(json.loads(body)['note'], 'x' * 300)
+        path, method, body, content_type = replay.build_request(entries[3])
+        self.assertIn(b'filename="a.png"', body)
+        self.assertIn(b'\0' * 10, body)
+
+        # 重放在工作线程中进行，测试数据库的事务对其不可见，这里只记录发出的请求
+        sent = []
+
+        def send(path, method, body, content_type, authenticated):
+            sent.append((method, path, authenticated))
+            return 200
+
+        results, elapsed = replay.replay(entries, send, speed=0, concurrency=2)
+        self.assertEqual(sorted(sent), sorted([('GET', '/api/blog/tags/?pageNum=1', True),
+                                               ('POST', '/api/blog/tags/', True),
+                                               ('POST', '/api/user/login/', False),
+                                               ('POST', '/api/user/update-avatar/', True)]))
+        report = replay.summarize(results, elapsed)
+        self.assertEqual((report['requests'], report['errors']), (4, 0))
+        self.assertEqual(report['endpoints']['POST api/blog/tags/$']['statusChanged'], 1)  # 录制时为 201
+        self.assertEqual(report['endpoints']['POST api/user/login/']['statusChanged'], 1)
+
+        baseline = json.loads(json.dumps(report))
+        baseline['endpoints']['GET api/blog/tags/$']['latencyMs']['p95'] = 0.001
+        rows = replay.compare(baseline, report)
+        self.assertEqual(rows[0][:2], ('GET api/blog/tags/$', 'p50'))
+
+    def test_refuses_writes_outside_benchmark_database(self):
+        path = self.log.format(pid=os.getpid())
+        self.record()
+        with self.assertRaisesMessage(CommandError, '当前不是基准测试数据库'):
+            call_command('replay_traffic', path)
+        # 只读重放不修改数据库
+        with mock.patch.object(replay, 'replay', return_value=([], 0)) as replay_:
+            call_command('replay_traffic', path, '--read-only', stdout=StringIO(), stderr=StringIO())
+        self.assertTrue(replay_.called)
+
+
+@override_settings(PERMISSION_VERSION_CHECK_INTERVAL=0, MONITOR_PROFILER_MAX_SECONDS=300)
+class ProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.settings_override = self.settings(MONITOR_PROFILER_DIR=directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def sample_here(self, sampler):
+        sampler.sample()
+
+    def test_sample_and_export(self):
+        sampler = SamplingProfiler()
+        sampler.active[threading.get_ident()] = 'GET api/test/'
+        self.sample_here(sampler)
+        self.sample_here(sampler)
+        profile = sampler.snapshot()
+        self.assertEqual(profile['samples'], 2)
+        (stack, count), = profile['stacks']['GET api/test/'].items()
+        self.assertEqual(count, 2)
+        self.assertIn('ProfilerTests.sample_here (apps/monitor/tests.py:', stack.split(';')[-2])
+
+        line = collapsed(profile).splitlines()[0]
+        self.assertTrue(line.startswith('GET api/test/;') and line.endswith(' 2'))
+        exported = speedscope(profile)
+        self.assertEqual(exported['profiles'][0]['weights'], [2])
+        leaf = exported['shared']['frames'][exported['profiles'][0]['samples'][0][-1]]
+        self.assertEqual((leaf['name'], leaf['file']), ('SamplingProfiler.sample', 'apps/monitor/profiler.py'))
+
+    def test_start_limits(self):
+        sampler = SamplingProfiler()
+        with mock.patch('apps.monitor.profiler.threading.Thread') as thread:
+            sampler.start(interval=0.000001, duration=3600)
+        self.assertEqual(thread.call_args.kwargs['args'], (MIN_INTERVAL, 300))
+
+    def test_endpoint(self):
+        user = SysUser.objects.create(username='user', password='x', status=0)
+        response = self.client.post('/api/monitor/profiler/', {'action': 'start'}, content_type='application/json',
+                                    HTTP_AUTHORIZATION=api_settings.JWT_ENCODE_HANDLER(
+                                        api_settings.JWT_PAYLOAD_HANDLER(user)))
+        self.assertEqual(response.status_code, 403)
+
+        admin = SysUser.objects.create(username='admin', password='x', status=0)
+        SysUserRole.objects.create(user=admin, role=SysRole.objects.create(name='超级管理员', code='admin'))
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(admin))
+        self.addCleanup(profiler.reset)
+        self.addCleanup(profiler.stop)
+        for params in ({'interval': 0.000001}, {'duration': -1}, {'duration': 301}):
+            response = self.client.post('/api/monitor/profiler/', {'action': 'start', **params},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/monitor/profiler/', {'action': 'start', 'interval': 0.001},
+                                    content_type='application/json')
+        self.assertTrue(response.json()['data']['running'])
+        self.assertEqual(self.client.post('/api/monitor/profiler/', {'action': 'start'},
+                                          content_type='application/json').status_code, 409)
+        self.client.get('/api/blog/tags/')
+        data = self.client.post('/api/monitor/profiler/', {'action': 'stop'},
+                                content_type='application/json').json()['data']
+        self.assertFalse(data['running'])
+        with open(data['lastDump'], encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['pid'], os.getpid())
+        self.assertEqual(self.client.get('/api/monitor/profiler/?export=collapsed')['Content-Type'],
+                         'text/plain; charset=utf-8')
+        self.assertEqual(self.client.get('/api/monitor/profiler/?export=svg').status_code, 400)
+
+
+@override_settings(PERMISSION_VERSION_CHECK_INTERVAL=0)
+class MemoryProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = SysUser.objects.create(username='admin', password='x', status=0)
+        SysUserRole.objects.create(user=admin, role=SysRole.objects.create(name='超级管理员', code='admin'))
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(admin))
+        self.addCleanup(memory_profiler.clear)
+        self.addCleanup(memory_profiler.stop)
+        for index in range(20):
+            Comment.objects.create(comment_type=3, from_user=admin, content='留言' * 50)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        self.client.get('/api/blog/comments/message-list/')
+        self.assertEqual(memory_profiler.report()['routes'], [])
+
+    def test_invalid_frames(self):
+        for frames in (0, -1, 65536, 'x'):
+            response = self.client.post('/api/monitor/memory/', {'action': 'start', 'frames': frames},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_route_and_serializer_attribution(self):
+        response = self.client.post('/api/monitor/memory/', {'action': 'start'}, content_type='application/json')
+        self.assertTrue(response.json()['data']['enabled'])
+        self.assertEqual(self.client.post('/api/monitor/memory/', {'action': 'start'},
+                                          content_type='application/json').status_code, 409)
+        self.client.get('/api/blog/comments/message-list/')
+        self.client.get('/api/blog/comments/message-list/?pageNum=1&pageSize=2')
+
+        data = self.client.get('/api/monitor/memory/?top=5&growth=1').json()['data']
+        route = data['routes'][0]
+        self.assertEqual((route['name'], route['count']), ('GET api/blog/comments/message-list/$', 2))
+        self.assertGreater(route['peakMax'], 0)
+        serializer = data['serializers'][0]
+        self.assertEqual((serializer['name'], serializer['count']), ('CommentSerializer(many=True)', 2))
+        self.assertLessEqual(serializer['peakMax'], route['peakMax'])
+        self.assertIsInstance(data['growth'], list)
+
+        self.client.post('/api/monitor/memory/', {'action': 'stop'}, content_type='application/json')
+        self.assertFalse(tracemalloc.is_tracing())
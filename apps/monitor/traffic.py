@@ -0,0 +1,127 @@
+"""流量录制
+按 MONITOR_TRAFFIC_SAMPLE_RATE 抽样记录请求（方法、路径、参数、脱敏后的请求体、状态码和耗时），
+每个进程写一个 JSON Lines 文件，按大小轮转。replay_traffic 命令读取这些文件在本地重放。
+
+一行一个请求：
+{"t": 开始时间戳, "m": 方法, "p": 路径, "q": 查询参数, "ct": 请求体类型, "b": 请求体, "a": 是否带登录令牌,
+ "r": 路由, "s": 状态码, "ms": 耗时}
+请求体中的敏感字段替换为 "***"；超长字符串只保留开头，记为 {"$str": 开头, "len": 原长度}；
+上传的文件只记录 {"$file": 文件名, "size": 大小, "type": 类型}。
+"""
+import json
+import logging
+import os
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_JSON_BODY = 1024 * 1024  # 超过该大小的 JSON 请求体只记录长度
+REDACTED = '***'
+
+_handlers = {}
+_lock = threading.Lock()
+
+
+def content_kind(content_type):
+    content_type = (content_type or '').split(';', 1)[0].strip().lower()
+    if content_type == 'application/json':
+        return 'json'
+    if content_type == 'multipart/form-data':
+        return 'multipart'
+    if content_type == 'application/x-www-form-urlencoded':
+        return 'form'
+    return None
+
+
+def sanitize(value):
+    """递归脱敏：敏感字段替换、超长字符串截断"""
+    if isinstance(value, dict):
+        return {key: REDACTED if key in settings.MONITOR_TRAFFIC_REDACT else sanitize(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    if isinstance(value, str) and len(value) > settings.MONITOR_TRAFFIC_MAX_STRING:
+        return {'$str': value[:settings.MONITOR_TRAFFIC_MAX_STRING], 'len': len(value)}
+    return value
+
+
+def query_dict(query):
+    """QueryDict -> dict，单值参数不包列表"""
+    return {key: values[0] if len(values) == 1 else values for key, values in query.lists()}
+
+
+def read_json_body(request):
+    """视图执行前读取 JSON 请求体（之后 DRF 会消费请求流），无法解析时返回 None"""
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return None
+    if length > MAX_JSON_BODY:
+        return {'$skipped': length}
+    if not length:
+        return None
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        return {'$invalid': length}
+
+
+def form_body(request):
+    """视图执行后读取表单字段和文件（DRF 解析后回填到 Django 请求上）；未被解析时只记录长度"""
+    if not hasattr(request, '_files'):
+        return {'$unparsed': int(request.META.get('CONTENT_LENGTH') or 0)}
+    body = query_dict(request.POST)
+    for key, files in request.FILES.lists():
+        body[key] = [{'$file': file.name, 'size': file.size, 'type': file.content_type} for file in files]
+        if len(body[key]) == 1:
+            body[key] = body[key][0]
+    return body
+
+
+def _handler():
+    path = str(settings.MONITOR_TRAFFIC_LOG).format(pid=os.getpid())
+    handler = _handlers.get(path)
+    if handler is None:
+        with _lock:
+            if (handler := _handlers.get(path)) is None:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                handler = _handlers[path] = RotatingFileHandler(
+                    path, maxBytes=settings.MONITOR_TRAFFIC_MAX_BYTES,
+                    backupCount=settings.MONITOR_TRAFFIC_BACKUP_COUNT, encoding='utf-8', delay=True)
+    return handler
+
+
+def write(entry):
+    try:
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str)
+        _handler().handle(logging.makeLogRecord({'msg': line, 'args': None}))
+    except Exception:
+        logger.exception('写入流量记录失败')
+
+
+def close():
+    """关闭已打开的记录文件（测试中切换路径时使用）"""
+    with _lock:
+        for handler in _handlers.values():
+            handler.close()
+        _handlers.clear()
+
+
+def load(paths):
+    """读取记录文件，跳过写了一半的行，按开始时间排序"""
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and 't' in entry and 'm' in entry and 'p' in entry:
+                    entries.append(entry)
+    entries.sort(key=lambda entry: entry['t'])
+    return entries
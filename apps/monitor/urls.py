@@ -0,0 +1,9 @@
+from django.urls import path
+
+from apps.monitor.views import MemoryView, ProfilerView, SlowQueryView
+
+urlpatterns = [
+    path('slow-queries/', SlowQueryView.as_view(), name='slow-queries'),
+    path('profiler/', ProfilerView.as_view(), name='profiler'),
+    path('memory/', MemoryView.as_view(), name='memory'),
+]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class RoleConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.role"
+
+    def ready(self):
+        from apps.role.models import SysRole
+        from djangoAdmin.utils import autocomplete
+
+        # 输入联想索引随模型变更增量刷新
+        autocomplete.register('role', SysRole, 'name')
@@ -1,3 +1,46 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework_jwt.settings import api_settings
 
-# Create your tests here.
+from apps.menu.models import SysMenu, SysRoleMenu
+from apps.role.models import SysRole
+from apps.user.models import SysUser
+
+
+class RoleListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = SysUser.objects.create(username='admin')
+        self.client.defaults['HTTP_AUTHORIZATION'] = api_settings.JWT_ENCODE_HANDLER(
+            api_settings.JWT_PAYLOAD_HANDLER(user))
+        self.system = SysMenu.objects.create(name='system', order_num=1)
+        self.users = SysMenu.objects.create(name='users', parent=self.system, order_num=1)
+        self.add_user = SysMenu.objects.create(name='add-user', parent=self.users, order_num=1)
+        self.roles = SysMenu.objects.create(name='roles', parent=self.system, order_num=2)
+
+    def create_roles(self, count):
+        for index in range(count):
+            role = SysRole.objects.create(name=f'role{index}')
+            SysRoleMenu.objects.create(role=role, menu=self.users)
+            SysRoleMenu.objects.create(role=role, menu=self.add_user)
+            SysRoleMenu.objects.create(role=role, menu=self.roles)
+
+    def fetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/role/role-list/', {'pageSize': 50})
+        return response.json(), len(queries)
+
+    def test_menu_ids_collapsed(self):
+        self.create_roles(1)
+        data, _ = self.fetch()
+        self.assertCountEqual(data['roleList'][0]['menuIds'], [self.users.id, self.roles.id])
+
+    def test_query_count_does_not_grow_with_roles(self):
+        self.create_roles(2)
+        _, small = self.fetch()
+        self.create_roles(20)
+        data, large = self.fetch()
+        self.assertEqual(len(data['roleList']), 22)
+        self.assertLessEqual(large, small)
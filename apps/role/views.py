@@ -7,7 +7,9 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from apps.menu.models import SysRoleMenu, SysMenu
+from apps.menu.models import SysRoleMenu
+from apps.menu.permissions import HasMenuPerm
+from apps.menu.services import invalidate_roles, invalidate_role_menus, get_menu_snapshot
 from apps.role.models import SysRole, SysRoleSerializer, SysUserRole
 from djangoAdmin.utils.pagination import paginate_queryset
 
@@ -18,6 +20,18 @@ from djangoAdmin.utils.pagination import paginate_queryset
 class SysRoleViewSet(viewsets.ModelViewSet):
     queryset = SysRole.objects.all()
     serializer_class = SysRoleSerializer
+    permission_classes = [HasMenuPerm]
+    required_perms = {
+        'list': 'system:role:list',
+        'role_list': 'system:role:list',
+        'retrieve': 'system:role:query',
+        'create': 'system:role:add',
+        'update': 'system:role:edit',
+        'partial_update': 'system:role:edit',
+        'assign_menus': 'system:role:edit',
+        'destroy': 'system:role:remove',
+        'batch_delete': 'system:role:remove',
+    }
 
     @action(methods=['get'], detail=False, url_path='role-list')
     def role_list(self, request, *args, **kwargs):
@@ -33,15 +47,19 @@ class SysRoleViewSet(viewsets.ModelViewSet):
 
             role_ids = [role['id'] for role in roles]
 
-            # 新增：获取角色原始菜单ID
-            role_menu_ids = SysRoleMenu.objects.filter(
-                role_id__in=role_ids
-            ).values('role_id', 'menu_id')
+            # 菜单父子关系（来自菜单快照缓存）和本页角色的菜单分配各只读取一次
+            parent_map = {menu_id: menu['parent'] for menu_id, menu in get_menu_snapshot().items()}
+            has_children = set(parent_map.values())
+            role_menu_ids = {role_id: [] for role_id in role_ids}
+            for role_id, menu_id in SysRoleMenu.objects.filter(
+                    role_id__in=role_ids
+            ).order_by('id').values_list('role_id', 'menu_id'):
+                role_menu_ids[role_id].append(menu_id)
 
-            menu_ids_dict = {}
-            for role_id in role_ids:
-                original_ids = [item['menu_id'] for item in role_menu_ids if item['role_id'] == role_id]
-                menu_ids_dict[role_id] = self._process_menu_ids(original_ids)  # 调用工具方法
+            menu_ids_dict = {
+                role_id: self._process_menu_ids(original_ids, parent_map, has_children)
+                for role_id, original_ids in role_menu_ids.items()
+            }
 
             # 将处理后的menuIds添加到角色数据中
             for role in roles:
@@ -70,6 +88,7 @@ class SysRoleViewSet(viewsets.ModelViewSet):
             SysRoleMenu.objects.filter(role_id__in=id_list).delete()
             SysUserRole.objects.filter(role_id__in=id_list).delete()
             SysRole.objects.filter(id__in=id_list).delete()
+            invalidate_roles(*id_list)
             return Response({'code': 200, 'info': '删除成功！'})
         except Exception as e:
             return Response({'code': 500, 'errorInfo': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -80,6 +99,7 @@ class SysRoleViewSet(viewsets.ModelViewSet):
             SysRoleMenu.objects.filter(role_id=id).delete()
             SysUserRole.objects.filter(role_id=id).delete()
             SysRole.objects.filter(id=id).delete()
+            invalidate_roles(id)
             return Response({'code': 200, 'info': '删除成功！'})
         except Exception as e:
             return Response({'code': 500, 'errorInfo': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -95,7 +115,9 @@ class SysRoleViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         try:
             request.data['update_time'] = now().date()
-            return super().update(request, *args, **kwargs)
+            response = super().update(request, *args, **kwargs)
+            invalidate_roles()
+            return response
         except IntegrityError:
             return Response({'code': 400, 'errorInfo': '角色已存在！'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -115,35 +137,27 @@ class SysRoleViewSet(viewsets.ModelViewSet):
             SysRoleMenu.objects.filter(role_id=pk).delete()
             role_menus = [SysRoleMenu(role_id=pk, menu_id=menu_id) for menu_id in menu_ids]
             SysRoleMenu.objects.bulk_create(role_menus)
+            invalidate_role_menus(pk)
             return Response({'code': 200, 'info': '分配成功！'})
         except Exception as e:
             return Response({'code': 500, 'info': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _process_menu_ids(self, raw_ids):
-        """统一处理菜单ID的工具方法"""
-        # 获取所有菜单关系（缓存查询结果）
-        all_menus = SysMenu.objects.prefetch_related('children').in_bulk()
-        parent_child_map = {
-            menu.id: [child.id for child in menu.children.all()]
-            for menu in all_menus.values() if menu.children.exists()
-        }
-
+    def _process_menu_ids(self, raw_ids, parent_map, has_children):
+        """统一处理菜单ID的工具方法（parent_map: 菜单ID -> 父菜单ID，has_children: 有子菜单的菜单ID集合）"""
         filtered_ids = set(raw_ids)
 
         # 第一步：移除被子菜单包含的父菜单的子菜单ID
         for menu_id in raw_ids:
-            if menu := all_menus.get(menu_id):
-                if menu.parent_id and menu.parent_id in filtered_ids:
-                    filtered_ids.discard(menu_id)
+            parent_id = parent_map.get(menu_id)
+            if parent_id and parent_id in filtered_ids:
+                filtered_ids.discard(menu_id)
 
         # 第二步：处理父菜单自身
         final_ids = set()
         for menu_id in filtered_ids:
-            if menu_id in parent_child_map:  # 是父菜单
+            if menu_id in has_children:  # 是父菜单
+                final_ids.add(menu_id)
+            elif parent_map.get(menu_id) not in filtered_ids:  # 是子菜单
                 final_ids.add(menu_id)
-            else:  # 是子菜单
-                parent_id = all_menus[menu_id].parent_id
-                if parent_id not in filtered_ids:
-                    final_ids.add(menu_id)
 
         return list(final_ids)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class StatisticsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.statistics"
+
+    def ready(self):
+        from apps.statistics.counters import connect_signals
+
+        # 被统计的模型增删改时增量维护计数器
+        connect_signals()
@@ -0,0 +1,188 @@
+import threading
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Value, When
+from django.db.models.signals import post_delete, post_init, post_save
+
+from apps.blog.models import Article, Category, Comment, Photo, PhotoAlbum, Tag
+from apps.statistics.models import StatCounter
+from apps.statistics.rollups import flush_rollups, rollup_key
+from apps.user.models import SysUser
+
+CACHE_KEY = 'stats:counters'
+CACHE_TIMEOUT = 60
+
+# 指标名 -> (模型, 过滤条件)；过滤条件只能是字段等值匹配
+METRICS = {
+    'user_total': (SysUser, {}),
+    'article_total': (Article, {}),
+    'article_public': (Article, {'status': 1}),
+    'article_private': (Article, {'status': 2}),
+    'article_draft': (Article, {'status': 3}),
+    'tag_total': (Tag, {}),
+    'category_total': (Category, {}),
+    'comment_total': (Comment, {}),
+    'comment_article': (Comment, {'comment_type': 1}),
+    'comment_talk': (Comment, {'comment_type': 2}),
+    'comment_message': (Comment, {'comment_type': 3}),
+    'photo_total': (Photo, {}),
+    'photo_normal': (Photo, {'status': 1}),
+    'photo_recycled': (Photo, {'status': 2}),
+    'album_total': (PhotoAlbum, {}),
+}
+
+# 照片状态 -> 指标名（批量修改状态时显式调整计数器）
+PHOTO_STATUS_METRICS = {1: 'photo_normal', 2: 'photo_recycled'}
+
+_MISSING = object()
+_local = threading.local()
+
+
+def _metrics_by_model():
+    grouped = defaultdict(list)
+    for name, (model, filters) in METRICS.items():
+        grouped[model].append((name, filters))
+    return grouped
+
+
+MODEL_METRICS = _metrics_by_model()
+# 每个模型参与统计的字段，加载实例时记录原值，保存时据此计算状态变化
+TRACKED_FIELDS = {model: sorted({field for _, filters in metrics for field in filters})
+                  for model, metrics in MODEL_METRICS.items()}
+
+
+def _matched(model, values):
+    return [name for name, filters in MODEL_METRICS[model]
+            if all(values.get(field, _MISSING) == value for field, value in filters.items())]
+
+
+def _snapshot(model, instance):
+    return {field: instance.__dict__.get(field, _MISSING) for field in TRACKED_FIELDS[model]}
+
+
+# ---------- 增量写入 ----------
+
+class _Batch:
+    """同一事务内的增量合并为一次 UPDATE，在事务提交后执行"""
+
+    def __init__(self):
+        self.deltas = defaultdict(int)
+        self.rollups = defaultdict(int)
+
+    def __call__(self):
+        if _local.__dict__.get('batch') is self:
+            del _local.batch
+        flush(self.deltas, self.rollups)
+
+
+def apply_deltas(deltas, rollups=None):
+    """累加计数器增量和每日汇总增量（{(日期, 指标): 增量}）；在事务中时合并到提交后执行，否则立即执行"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    rollups = {key: delta for key, delta in (rollups or {}).items() if delta}
+    if not deltas and not rollups:
+        return
+    if not connection.in_atomic_block:
+        flush(deltas, rollups)
+        return
+    batch = getattr(_local, 'batch', None)
+    # 事务回滚后 Django 会丢弃已注册的提交回调，此时旧的批次作废，重新开始一批
+    if batch is None or not any(func is batch for _, func, _ in connection.run_on_commit):
+        batch = _local.batch = _Batch()
+        transaction.on_commit(batch)
+    for name, delta in deltas.items():
+        batch.deltas[name] += delta
+    for key, delta in rollups.items():
+        batch.rollups[key] += delta
+
+
+def flush(deltas, rollups=None):
+    if rollups:
+        flush_rollups(rollups)
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    StatCounter.objects.filter(name__in=deltas).update(value=F('value') + Case(
+        *[When(name=name, then=Value(delta)) for name, delta in deltas.items()],
+        default=Value(0), output_field=BigIntegerField(),
+    ))
+    cache.delete(CACHE_KEY)
+
+
+def on_init(sender, instance, **kwargs):
+    instance._stat_values = _snapshot(sender, instance)
+
+
+def on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _snapshot(sender, instance)
+    deltas, rollups = defaultdict(int), {}
+    if created:
+        for name in _matched(sender, current):
+            deltas[name] += 1
+        if key := rollup_key(sender, instance):
+            rollups[key] = 1
+    else:
+        previous = getattr(instance, '_stat_values', None)
+        if previous and _MISSING not in previous.values() and _MISSING not in current.values():
+            for name in _matched(sender, previous):
+                deltas[name] -= 1
+            for name in _matched(sender, current):
+                deltas[name] += 1
+    instance._stat_values = current
+    apply_deltas(deltas, rollups)
+
+
+def on_delete(sender, instance, **kwargs):
+    key = rollup_key(sender, instance)
+    apply_deltas({name: -1 for name in _matched(sender, _snapshot(sender, instance))}, {key: -1} if key else None)
+
+
+def connect_signals():
+    for model, fields in TRACKED_FIELDS.items():
+        uid = f'stat_counter_{model._meta.label_lower}'
+        if fields:
+            post_init.connect(on_init, sender=model, dispatch_uid=uid)
+        post_save.connect(on_save, sender=model, dispatch_uid=uid)
+        post_delete.connect(on_delete, sender=model, dispatch_uid=uid)
+
+
+# ---------- 读取与校准 ----------
+
+def count_metrics(names=None):
+    """按模型分组用 COUNT 重新计算指标，每个模型一条聚合 SQL"""
+    values = {}
+    for model, metrics in MODEL_METRICS.items():
+        aggregates = {name: Count('pk', filter=Q(**filters)) if filters else Count('pk')
+                      for name, filters in metrics if names is None or name in names}
+        if aggregates:
+            values.update(model.objects.aggregate(**aggregates))
+    return values
+
+
+def reconcile(names=None):
+    """用实际 COUNT 覆盖计数器，返回 {指标: (旧值, 新值)}"""
+    values = count_metrics(names)
+    previous = dict(StatCounter.objects.filter(name__in=values).values_list('name', 'value'))
+    StatCounter.objects.bulk_create(
+        [StatCounter(name=name, value=value) for name, value in values.items()],
+        update_conflicts=True,
+        update_fields=['value', 'updated_at'],
+        unique_fields=['name'] if connection.features.supports_update_conflicts_with_target else None,
+    )
+    cache.delete(CACHE_KEY)
+    return {name: (previous.get(name), value) for name, value in values.items()}
+
+
+def get_counters():
+    """全部指标：优先读缓存，否则一条查询读取计数器表；缺失的指标（首次部署）现场计算"""
+    values = cache.get(CACHE_KEY)
+    if values is None:
+        values = dict(StatCounter.objects.values_list('name', 'value'))
+        if missing := set(METRICS) - set(values):
+            values.update({name: value for name, (_, value) in reconcile(missing).items()})
+        values = {name: values[name] for name in METRICS}
+        cache.set(CACHE_KEY, values, timeout=CACHE_TIMEOUT)
+    return values
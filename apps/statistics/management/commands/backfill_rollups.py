@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.statistics.rollups import ROLLUP_METRICS, backfill, first_date
+
+
+class Command(BaseCommand):
+    help = '按时间分段用 GROUP BY 回填每日汇总表（默认从最早的记录到今天）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metric', action='append', choices=list(ROLLUP_METRICS),
+                            help='只回填指定指标，可重复；默认全部')
+        parser.add_argument('--start', type=date.fromisoformat, help='开始日期 YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, help='结束日期 YYYY-MM-DD，默认今天')
+        parser.add_argument('--batch-days', type=int, default=90, help='每条 GROUP BY 覆盖的天数')
+
+    def handle(self, *args, **options):
+        if options['batch_days'] <= 0:
+            raise CommandError('--batch-days 必须大于 0')
+        end = options['end'] or timezone.localdate()
+        for metric in options['metric'] or ROLLUP_METRICS:
+            start = options['start'] or first_date(metric)
+            if start is None:
+                self.stdout.write(f'{metric}: 没有数据')
+                continue
+            days = 0
+            batch_start = start
+            while batch_start <= end:
+                batch_end = min(batch_start + timedelta(days=options['batch_days'] - 1), end)
+                days += backfill(metric, batch_start, batch_end)
+                batch_start = batch_end + timedelta(days=1)
+            self.stdout.write(f'{metric}: {start} ~ {end} 共 {days} 天有数据')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.statistics.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = '用 COUNT 重新校准统计计数器（建议定时执行，修正批量 update 等绕过信号的写入造成的偏差）'
+
+    def handle(self, *args, **options):
+        for name, (previous, value) in reconcile().items():
+            drift = '' if previous == value else f'（原值 {previous}）'
+            self.stdout.write(f'{name:<20} {value}{drift}')
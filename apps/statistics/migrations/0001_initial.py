@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="StatCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="指标名称",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0, verbose_name="数值")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="修改时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "统计计数器",
+                "verbose_name_plural": "统计计数器",
+                "db_table": "sys_stat_counter",
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("statistics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="日期")),
+                ("metric", models.CharField(max_length=32, verbose_name="指标名称")),
+                ("value", models.IntegerField(default=0, verbose_name="数值")),
+            ],
+            options={
+                "verbose_name": "每日汇总",
+                "verbose_name_plural": "每日汇总",
+                "db_table": "sys_daily_rollup",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("metric", "date"), name="daily_rollup_metric_date_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
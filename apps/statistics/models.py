@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class StatCounter(models.Model):
+    """统计计数器：每个指标一行，由模型信号增量维护，定期用 COUNT 校准"""
+    name = models.CharField(max_length=64, primary_key=True, verbose_name="指标名称")
+    value = models.BigIntegerField(default=0, verbose_name="数值")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="修改时间")
+
+    class Meta:
+        db_table = 'sys_stat_counter'
+        verbose_name = '统计计数器'
+        verbose_name_plural = verbose_name
+
+
+class DailyRollup(models.Model):
+    """按天汇总的新增数量（按创建时间统计现存记录），趋势图按区间读取后在内存中按周/月合并"""
+    date = models.DateField(verbose_name="日期")
+    metric = models.CharField(max_length=32, verbose_name="指标名称")
+    value = models.IntegerField(default=0, verbose_name="数值")
+
+    class Meta:
+        db_table = 'sys_daily_rollup'
+        verbose_name = '每日汇总'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'date'], name='daily_rollup_metric_date_uniq'),
+        ]
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.blog.models import Article, Comment, Photo
+from apps.statistics.models import DailyRollup
+from apps.user.models import SysUser
+
+# 指标名 -> (模型, 创建时间字段)
+ROLLUP_METRICS = OrderedDict([
+    ('article', (Article, 'created_at')),
+    ('comment', (Comment, 'created_at')),
+    ('user', (SysUser, 'create_time')),
+    ('photo', (Photo, 'created_at')),
+])
+MODEL_ROLLUPS = {model: (metric, field) for metric, (model, field) in ROLLUP_METRICS.items()}
+GRANULARITIES = ('day', 'week', 'month')
+MAX_DAYS = 3 * 366  # 单次查询的最大区间
+
+
+def to_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def rollup_key(model, instance):
+    """实例对应的 (日期, 指标)，不参与汇总或没有创建时间时返回 None"""
+    if model not in MODEL_ROLLUPS:
+        return None
+    metric, field = MODEL_ROLLUPS[model]
+    day = to_date(getattr(instance, field, None))
+    return (day, metric) if day else None
+
+
+def flush_rollups(deltas):
+    """累加 {(日期, 指标): 增量}，当天的行不存在时创建"""
+    for (day, metric), delta in deltas.items():
+        if not delta:
+            continue
+        if DailyRollup.objects.filter(date=day, metric=metric).update(value=F('value') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                DailyRollup.objects.create(date=day, metric=metric, value=delta)
+        except IntegrityError:
+            # 并发请求已创建该行
+            DailyRollup.objects.filter(date=day, metric=metric).update(value=F('value') + delta)
+
+
+# ---------- 历史数据回填 ----------
+
+def backfill(metric, start, end):
+    """用一条 GROUP BY 重新计算 [start, end] 内每天的数量并覆盖汇总表，返回写入的天数"""
+    model, field = ROLLUP_METRICS[metric]
+    is_datetime = model._meta.get_field(field).get_internal_type() == 'DateTimeField'
+    if is_datetime:
+        tz = timezone.get_current_timezone()
+        lookup = {f'{field}__gte': datetime.combine(start, datetime.min.time(), tz),
+                  f'{field}__lt': datetime.combine(end + timedelta(days=1), datetime.min.time(), tz)}
+        day = TruncDate(field)
+    else:
+        lookup = {f'{field}__gte': start, f'{field}__lte': end}
+        day = F(field)
+    rows = model.objects.filter(**lookup).annotate(day=day).values('day').annotate(total=Count('pk')).order_by()
+    counts = {to_date(row['day']): row['total'] for row in rows}
+
+    with transaction.atomic():
+        DailyRollup.objects.filter(metric=metric, date__gte=start, date__lte=end).exclude(date__in=counts).delete()
+        DailyRollup.objects.bulk_create(
+            [DailyRollup(date=day, metric=metric, value=total) for day, total in counts.items()],
+            update_conflicts=True,
+            update_fields=['value'],
+            unique_fields=['metric', 'date'] if connection.features.supports_update_conflicts_with_target else None,
+        )
+    return len(counts)
+
+
+def first_date(metric):
+    model, field = ROLLUP_METRICS[metric]
+    value = model.objects.filter(**{f'{field}__isnull': False}).order_by(field).values_list(field, flat=True).first()
+    return to_date(value)
+
+
+# ---------- 区间查询 ----------
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _buckets(start, end, granularity):
+    current, buckets = bucket_start(start, granularity), []
+    while current <= end:
+        buckets.append(current)
+        if granularity == 'day':
+            current += timedelta(days=1)
+        elif granularity == 'week':
+            current += timedelta(days=7)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return buckets
+
+
+def get_series(metrics, start, end, granularity='day'):
+    """读取汇总表，按粒度合并并补齐没有数据的区间"""
+    buckets = _buckets(start, end, granularity)
+    index = {bucket: position for position, bucket in enumerate(buckets)}
+    series = {metric: [0] * len(buckets) for metric in metrics}
+    rows = DailyRollup.objects.filter(metric__in=metrics, date__gte=start, date__lte=end) \
+        .values_list('metric', 'date', 'value')
+    for metric, day, value in rows:
+        series[metric][index[bucket_start(day, granularity)]] += value
+    label_format = '%Y-%m' if granularity == 'month' else '%Y-%m-%d'
+    return {
+        'granularity': granularity,
+        'labels': [bucket.strftime(label_format) for bucket in buckets],
+        'series': series,
+    }
+
+
+def parse_range(start, end, today=None):
+    """解析 YYYY-MM-DD 区间，默认最近 30 天；无效时抛出 ValueError"""
+    today = today or timezone.localdate()
+    end = date.fromisoformat(end) if end else today
+    start = date.fromisoformat(start) if start else end - timedelta(days=29)
+    if start > end:
+        raise ValueError('开始日期不能晚于结束日期')
+    if (end - start).days >= MAX_DAYS:
+        raise ValueError(f'查询区间不能超过 {MAX_DAYS} 天')
+    return start, end
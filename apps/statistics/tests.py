@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.blog.models import Article, Comment, Photo, PhotoAlbum
+from apps.statistics.counters import count_metrics, get_counters, reconcile
+from apps.statistics.models import DailyRollup
+from apps.statistics.rollups import get_series
+from apps.user.models import SysUser
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = SysUser.objects.create(username='admin')
+            self.album = PhotoAlbum.objects.create(album_name='album')
+        reconcile()
+
+    def assertCountersAccurate(self):
+        cache.clear()
+        self.assertEqual(get_counters(), count_metrics())
+
+    def test_endpoint_reads_counters_in_one_query(self):
+        get_counters()
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/statistics/').json()
+        self.assertEqual(response['data']['user_total'], 1)
+        self.assertEqual(response['data']['album_total'], 1)
+        with self.assertNumQueries(0):
+            self.client.get('/api/statistics/')
+
+    def test_signals_keep_counters_in_sync(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.create(article_title='a', author=self.user, article_content='',
+                                             article_description='')
+            Comment.objects.create(comment_type=3, from_user=self.user, content='hi')
+            photos = [Photo.objects.create(album=self.album, url=f'{i}.jpg') for i in range(3)]
+        self.assertCountersAccurate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            article = Article.objects.get(pk=article.pk)
+            article.status = 3
+            article.save()
+            photos[0].delete()
+        self.assertCountersAccurate()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/blog/photos/change-status/', {'photoIds': [p.id for p in photos[1:]]},
+                                         content_type='application/json')
+        self.assertEqual(response.json()['code'], 200)
+        self.assertEqual(get_counters()['photo_recycled'], 2)
+        self.assertCountersAccurate()
+
+        # 删除用户级联删除其文章和评论
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertCountersAccurate()
+
+
+class CounterRollbackTests(TransactionTestCase):
+    def test_rolled_back_changes_are_not_counted(self):
+        reconcile()
+        try:
+            with transaction.atomic():
+                SysUser.objects.create(username='ghost')
+                raise ValueError
+        except ValueError:
+            pass
+        with transaction.atomic():
+            SysUser.objects.create(username='alice')
+        cache.clear()
+        self.assertEqual(get_counters()['user_total'], 1)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = SysUser.objects.create(username='admin')
+            for day, count in [(date(2025, 3, 30), 2), (date(2025, 3, 31), 1), (date(2025, 4, 2), 3)]:
+                for _ in range(count):
+                    article = Article.objects.create(article_title='a', author=self.user, article_content='',
+                                                     article_description='')
+                    created_at = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=23))
+                    Article.objects.filter(pk=article.pk).update(created_at=created_at)
+        # 历史数据由回填生成，清掉创建时按当天累计的汇总
+        DailyRollup.objects.all().delete()
+
+    def test_backfill_and_series(self):
+        call_command('backfill_rollups', metric=['article'], start=date(2025, 3, 1), end=date(2025, 4, 30),
+                     batch_days=7, stdout=open('/dev/null', 'w'))
+        with self.assertNumQueries(1):
+            daily = get_series(['article'], date(2025, 3, 30), date(2025, 4, 2))
+        self.assertEqual(daily['labels'], ['2025-03-30', '2025-03-31', '2025-04-01', '2025-04-02'])
+        self.assertEqual(daily['series']['article'], [2, 1, 0, 3])
+        self.assertEqual(get_series(['article'], date(2025, 3, 1), date(2025, 4, 30), 'month')['series']['article'],
+                         [3, 3])
+        weekly = get_series(['article'], date(2025, 3, 24), date(2025, 4, 6), 'week')
+        self.assertEqual(weekly['labels'], ['2025-03-24', '2025-03-31'])
+        self.assertEqual(weekly['series']['article'], [2, 4])
+
+    def test_incremental_update(self):
+        today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(article_title='b', author=self.user, article_content='', article_description='')
+            Comment.objects.create(comment_type=1, from_user=self.user, content='hi')
+        self.assertEqual(DailyRollup.objects.get(metric='article', date=today).value, 1)
+        response = self.client.get('/api/statistics/series/', {'metric': 'article,comment',
+                                                               'granularity': 'month'}).json()
+        self.assertEqual(response['data']['series']['comment'][-1], 1)
+        self.assertEqual(self.client.get('/api/statistics/series/', {'metric': 'nope'}).status_code, 400)
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from apps.statistics.views import StatisticsView, StatisticsSeriesView
+
+urlpatterns = [
+    path('', StatisticsView.as_view(), name='statistics'),
+    path('series/', StatisticsSeriesView.as_view(), name='statistics-series'),
+]
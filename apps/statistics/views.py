@@ -0,0 +1,47 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.statistics.counters import get_counters
+from apps.statistics.rollups import GRANULARITIES, ROLLUP_METRICS, get_series, parse_range
+
+
+class StatisticsView(APIView):
+    """系统数据统计视图
+    GET /api/statistics/ - 获取系统核心数据指标（来自计数器表，不做 COUNT 查询）
+    """
+
+    def get(self, request):
+        try:
+            return Response({
+                'code': status.HTTP_200_OK,
+                'data': get_counters()
+            })
+
+        except Exception as e:
+            return Response({
+                'code': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                'error': f'数据统计失败: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class StatisticsSeriesView(APIView):
+    """趋势数据（来自每日汇总表）
+    GET /api/statistics/series/?metric=article,comment&start=2025-01-01&end=2025-03-31&granularity=day|week|month
+    """
+
+    def get(self, request):
+        metrics = [metric for metric in request.query_params.get('metric', 'article').split(',') if metric]
+        granularity = request.query_params.get('granularity', 'day')
+        if unknown := [metric for metric in metrics if metric not in ROLLUP_METRICS]:
+            return Response({'code': 400, 'errorInfo': f'不支持的指标: {",".join(unknown)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if granularity not in GRANULARITIES:
+            return Response({'code': 400, 'errorInfo': 'granularity 应为 day、week 或 month'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = parse_range(request.query_params.get('start'), request.query_params.get('end'))
+        except ValueError as e:
+            return Response({'code': 400, 'errorInfo': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'code': status.HTTP_200_OK, 'data': get_series(metrics, start, end, granularity)})
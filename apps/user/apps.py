@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.user"
+
+    def ready(self):
+        from django.db.models.signals import post_save
+
+        from apps.user.models import SysUser
+        from apps.user.username_index import on_user_saved
+        from djangoAdmin.utils import autocomplete
+
+        # 新建用户、修改用户名时同步写入用户名布隆过滤器
+        post_save.connect(on_user_saved, sender=SysUser, dispatch_uid='username_bloom')
+        # 输入联想索引随模型变更增量刷新
+        autocomplete.register('user', SysUser, 'username')
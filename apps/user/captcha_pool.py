@@ -0,0 +1,241 @@
+import atexit
+import base64
+import logging
+import multiprocessing
+import secrets
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from captcha.image import ImageCaptcha
+from django.conf import settings
+from django.core.cache import cache
+
+from djangoAdmin.utils.redis_ops import delete_if_equals, get_client, is_redis
+
+logger = logging.getLogger(__name__)
+
+# 验证码字符集（排除易混淆字符）
+CAPTCHA_CHARS = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKMNPQRSTUVWXYZ23456789'
+CAPTCHA_LENGTH = 4  # 验证码长度
+
+
+def render_captcha(_=None):
+    """生成一张验证码，返回 (文本, PNG 的 Base64)；供进程池调用，必须是模块级函数"""
+    text = ''.join(secrets.choice(CAPTCHA_CHARS) for _ in range(CAPTCHA_LENGTH))
+    image_data = ImageCaptcha().generate(text)
+    return text, base64.b64encode(image_data.getvalue()).decode()
+
+
+def _encode(text, image):
+    return f'{text}:{image}'
+
+
+def _decode(entry):
+    if isinstance(entry, bytes):
+        entry = entry.decode()
+    text, _, image = entry.partition(':')
+    return text, image
+
+
+class RedisPoolBackend:
+    """验证码池存放在 Redis 列表中，所有进程共享"""
+
+    def __init__(self, key, stats_key):
+        self.client = get_client()
+        self.key = cache.make_key(key)
+        self.stats_key = cache.make_key(stats_key)
+
+    def pop(self):
+        return self.client.lpop(self.key)
+
+    def push(self, entries, capacity, ttl):
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(self.key, *entries)
+        pipe.ltrim(self.key, -capacity, -1)
+        pipe.expire(self.key, ttl)
+        pipe.execute()
+
+    def depth(self):
+        return self.client.llen(self.key)
+
+    def clear(self):
+        self.client.delete(self.key)
+
+    def incr_stats(self, **fields):
+        pipe = self.client.pipeline(transaction=False)
+        for field, amount in fields.items():
+            pipe.hincrby(self.stats_key, field, amount)
+        pipe.execute()
+
+    def set_stats(self, **fields):
+        self.client.hset(self.stats_key, mapping=fields)
+
+    def get_stats(self):
+        return {key.decode(): int(value) for key, value in self.client.hgetall(self.stats_key).items()}
+
+
+class LocalPoolBackend:
+    """非 Redis 缓存（开发、测试环境）下退化为进程内队列"""
+
+    def __init__(self):
+        self.entries = deque()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def pop(self):
+        try:
+            return self.entries.popleft()
+        except IndexError:
+            return None
+
+    def push(self, entries, capacity, ttl):
+        with self._lock:
+            self.entries.extend(entries)
+            while len(self.entries) > capacity:
+                self.entries.popleft()
+
+    def depth(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def incr_stats(self, **fields):
+        with self._lock:
+            for field, amount in fields.items():
+                self.stats[field] = self.stats.get(field, 0) + amount
+
+    def set_stats(self, **fields):
+        with self._lock:
+            self.stats.update(fields)
+
+    def get_stats(self):
+        return dict(self.stats)
+
+
+class CaptchaPool:
+    """预生成验证码池
+    请求时 O(1) 弹出一张现成的验证码；剩余数量低于水位线时由后台线程加锁补充，池为空时退化为同步生成。
+    CAPTCHA_POOL_WORKERS > 0 时在进程池中并行渲染；进程池用 spawn 启动（在有其他线程的进程中 fork 可能死锁），
+    进程退出时关闭。默认不开启，大批量补充建议用 fill_captcha_pool --workers 命令在 Web 进程外完成。
+    """
+    POOL_KEY = 'captcha:pool'
+    STATS_KEY = 'captcha:pool:stats'
+    LOCK_KEY = 'captcha:pool:lock'
+    LOCK_TIMEOUT = 120  # 补充任务锁超时（秒）
+    POOL_TTL = 3600  # 池中的图片最多保留 1 小时，避免长期复用同一批图片
+
+    def __init__(self):
+        self._backend = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    if is_redis():
+                        self._backend = RedisPoolBackend(self.POOL_KEY, self.STATS_KEY)
+                    else:
+                        self._backend = LocalPoolBackend()
+        return self._backend
+
+    def get(self):
+        """返回 (文本, 图片 Base64)，优先从池中取"""
+        try:
+            entry = self.backend.pop()
+        except Exception:
+            logger.exception('读取验证码池失败')
+            entry = None
+
+        if entry is not None:
+            self.backend.incr_stats(hits=1)
+            self.maybe_refill()
+            return _decode(entry)
+
+        self.backend.incr_stats(misses=1)
+        self.maybe_refill()
+        return render_captcha()
+
+    def maybe_refill(self):
+        """剩余数量低于水位线时在后台补充，同一时间只有一个补充任务"""
+        if self.backend.depth() >= settings.CAPTCHA_POOL_LOW_WATERMARK:
+            return False
+        token = uuid.uuid4().hex
+        if not cache.add(self.LOCK_KEY, token, timeout=self.LOCK_TIMEOUT):
+            return False
+        threading.Thread(target=self._refill_and_release, args=(token,), name='captcha-refill', daemon=True).start()
+        return True
+
+    def _refill_and_release(self, token):
+        try:
+            self.refill()
+        except Exception:
+            logger.exception('补充验证码池失败')
+        finally:
+            # 只释放自己持有的锁：补充超过 LOCK_TIMEOUT 时锁可能已被其他进程重新获取
+            delete_if_equals(self.LOCK_KEY, token)
+
+    def _get_executor(self, workers):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                atexit.register(self.shutdown)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def refill(self, workers=None):
+        """把池补满到 CAPTCHA_POOL_SIZE，返回本次生成的数量；workers 默认为 CAPTCHA_POOL_WORKERS"""
+        capacity = settings.CAPTCHA_POOL_SIZE
+        count = capacity - self.backend.depth()
+        if count <= 0:
+            return 0
+
+        workers = settings.CAPTCHA_POOL_WORKERS if workers is None else workers
+        start = time.perf_counter()
+        if workers > 0:
+            chunksize = max(1, count // (workers * 4))
+            captchas = list(self._get_executor(workers).map(render_captcha, range(count), chunksize=chunksize))
+        else:
+            captchas = [render_captcha() for _ in range(count)]
+        self.backend.push([_encode(text, image) for text, image in captchas], capacity, self.POOL_TTL)
+
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        self.backend.incr_stats(refills=1, generated=count, refill_ms_total=elapsed_ms)
+        self.backend.set_stats(last_refill_ms=elapsed_ms, last_refill_count=count, last_refill_at=int(time.time()))
+        return count
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        stats = self.backend.get_stats()
+        refills = stats.get('refills', 0)
+        hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+        return {
+            'depth': self.backend.depth(),
+            'capacity': settings.CAPTCHA_POOL_SIZE,
+            'lowWatermark': settings.CAPTCHA_POOL_LOW_WATERMARK,
+            'hits': hits,
+            'misses': misses,
+            'hitRate': round(hits / (hits + misses), 4) if hits + misses else None,
+            'refills': refills,
+            'generated': stats.get('generated', 0),
+            'avgRefillMs': round(stats.get('refill_ms_total', 0) / refills, 1) if refills else None,
+            'lastRefillMs': stats.get('last_refill_ms'),
+            'lastRefillCount': stats.get('last_refill_count'),
+            'lastRefillAt': stats.get('last_refill_at'),
+        }
+
+
+captcha_pool = CaptchaPool()
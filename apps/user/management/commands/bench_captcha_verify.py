@@ -0,0 +1,67 @@
+import time
+import uuid
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from apps.monitor.bench_data import ADMIN_PASSWORD, ADMIN_USERNAME
+from apps.monitor.benchmark import latency_summary
+from apps.user.models import SysUser
+from apps.user.views import LoginView
+from djangoAdmin.utils.redis_ops import consume_once, is_redis
+
+
+def get_then_delete(key):
+    """改为原子操作之前的验证码校验：GET 之后再 DELETE，两次往返"""
+    value = cache.get(key)
+    if value:
+        cache.delete(key)
+    return value
+
+
+class Command(BaseCommand):
+    help = ('登录接口端到端耗时（验证码校验、用户查询、签发令牌、权限缓存）：GET + DELETE 对比原子 consume_once，'
+            '示例：python manage.py bench_captcha_verify --settings=djangoAdmin.settings_bench')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='每种校验方式的登录次数')
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--username', default=ADMIN_USERNAME)
+        parser.add_argument('--password', default=ADMIN_PASSWORD)
+
+    def handle(self, *args, **options):
+        if not SysUser.objects.filter(username=options['username']).exists():
+            raise CommandError(f"没有找到用户 {options['username']}，请先运行 seed_benchmark_data")
+        factory = RequestFactory()
+        view = LoginView.as_view()
+        variants = [('GET + DELETE', get_then_delete), ('consume_once', consume_once)]
+
+        def login(consume):
+            token = uuid.uuid4().hex
+            cache.set(f'captcha_{token}', 'Ab3d', timeout=LoginView.CAPTCHA_TIMEOUT)
+            request = factory.post('/api/user/login/', {
+                'username': options['username'], 'password': options['password'],
+                'captcha': 'ab3d', 'captcha_token': token,
+            }, content_type='application/json')
+            with mock.patch('apps.user.views.consume_once', consume):
+                start = time.perf_counter()
+                response = view(request)
+                elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f"登录失败: {response.data.get('errorInfo')}")
+            return elapsed
+
+        self.stdout.write(f"缓存后端: {type(caches['default']).__name__}（{'Redis' if is_redis() else '非 Redis，数值仅供参考'}）")
+        for _ in range(options['warmup']):
+            for _, consume in variants:
+                login(consume)
+        # 两种方式交替执行，抵消缓存、连接池等随时间的波动
+        timings = {name: [] for name, _ in variants}
+        for _ in range(options['iterations']):
+            for name, consume in variants:
+                timings[name].append(login(consume))
+        for name, seconds in timings.items():
+            summary = latency_summary(seconds)
+            self.stdout.write(f"{name:<16} p50={summary['p50']}ms p95={summary['p95']}ms p99={summary['p99']}ms")
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_jwt.settings import api_settings
+
+from apps.user.middleware import JwtAuthenticationMiddleware
+
+
+class FakeUser:
+    pk = 1
+    username = 'bench'
+
+    def get_username(self):
+        return self.username
+
+
+class Command(BaseCommand):
+    help = 'JwtAuthenticationMiddleware 单请求开销微基准（白名单 / 首次验签 / 缓存命中）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        token = api_settings.JWT_ENCODE_HANDLER(api_settings.JWT_PAYLOAD_HANDLER(FakeUser()))
+        middleware = JwtAuthenticationMiddleware(lambda request: HttpResponse())
+
+        white_request = factory.get('/api/blog/articles/')
+        auth_request = factory.get('/api/user/', HTTP_AUTHORIZATION=token)
+
+        def cold(request):
+            middleware.token_cache.clear()
+            return middleware.process_request(request)
+
+        cases = [
+            ('白名单路由', middleware.process_request, white_request),
+            ('验签（缓存未命中）', cold, auth_request),
+            ('验签（缓存命中）', middleware.process_request, auth_request),
+        ]
+        for name, func, request in cases:
+            func(request)  # 预热
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func(request)
+            per_request = (time.perf_counter() - start) / iterations * 1e6
+            self.stdout.write(f'{name:<20} {per_request:8.2f} µs/请求')
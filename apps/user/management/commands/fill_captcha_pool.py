@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.user.captcha_pool import captcha_pool
+
+
+class Command(BaseCommand):
+    help = '把验证码池补满（部署后预热或定时任务使用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='先清空池中已有的验证码')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='并行渲染的进程数，默认为 CAPTCHA_POOL_WORKERS')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            captcha_pool.clear()
+        try:
+            count = captcha_pool.refill(options['workers'])
+        finally:
+            captcha_pool.shutdown()
+        self.stdout.write(f'本次生成 {count} 张验证码')
+        self.stdout.write(json.dumps(captcha_pool.stats(), ensure_ascii=False, indent=2))
@@ -0,0 +1,23 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.user.username_index import username_bloom
+
+
+class Command(BaseCommand):
+    help = '从 sys_user 重建用户名布隆过滤器（清除已删除/改名用户名造成的误判），并输出误判率统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stats', action='store_true', help='只输出统计，不重建')
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            start = time.perf_counter()
+            count = username_bloom.rebuild()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'已写入 {count} 个用户名，耗时 {elapsed:.2f}s')
+            if count > username_bloom.capacity:
+                self.stderr.write(f'用户数已超过 USERNAME_BLOOM_CAPACITY={username_bloom.capacity}，误判率会升高，请调大后重建')
+        self.stdout.write(json.dumps(username_bloom.stats(), ensure_ascii=False, indent=2))
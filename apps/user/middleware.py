@@ -1,25 +1,78 @@
 # apps/user/middleware.py
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
 
+from django.conf import settings
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from jwt import ExpiredSignatureError, InvalidTokenError, PyJWTError
 from rest_framework_jwt.settings import api_settings
 
 
+def compile_white_list(prefixes):
+    """把白名单前缀编译成一个正则，按长度倒序避免短前缀抢先匹配；以 $ 结尾的条目只匹配完整路径"""
+    escaped = sorted((re.escape(prefix[:-1]) + '$' if prefix.endswith('$') else re.escape(prefix)
+                      for prefix in prefixes), key=len, reverse=True)
+    return re.compile('(?:%s)' % '|'.join(escaped)) if escaped else None
+
+
+class VerifiedTokenCache:
+    """已验签 Token 的进程内 LRU，键为 Token 的 SHA-256，条目在 Token 的 exp 到达后失效"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, token, payload):
+        expires_at = payload.get('exp')
+        if not expires_at or self.max_size <= 0:
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class JwtAuthenticationMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # 白名单在进程启动时编译一次（settings.JWT_WHITE_LIST 为前缀列表）
+        self.white_list = compile_white_list(settings.JWT_WHITE_LIST)
+        self.token_cache = VerifiedTokenCache(settings.JWT_VERIFIED_CACHE_SIZE)
+        self.jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
+
     def process_request(self, request):
-        white_list = [
-            "/api/user/login/",
-            "/api/user/register/",
-            "/api/user/captcha/",
-            "/api/blog/",  # 所有/blog/前缀的路由
-            "/api/media/",  # 媒体文件
-            "/api/statistics/",
-        ]
         path = request.path
 
-        # 检查是否在白名单 (使用startswith匹配前缀)
-        if any(path.startswith(white_path) for white_path in white_list):
+        # 检查是否在白名单 (前缀匹配)
+        if self.white_list and self.white_list.match(path):
             return None
 
         # Token验证逻辑
@@ -27,12 +80,20 @@ class JwtAuthenticationMiddleware(MiddlewareMixin):
         if not token:
             return JsonResponse({'code': 401, 'errorInfo': '缺少Token'}, status=401)
 
+        # 近期验签过且未过期的 Token 直接放行，跳过签名计算
+        payload = self.token_cache.get(token)
+        if payload is not None:
+            request.jwt_payload = payload
+            return None
+
         try:
-            jwt_decode_handler = api_settings.JWT_DECODE_HANDLER
-            jwt_decode_handler(token)
+            payload = self.jwt_decode_handler(token)
         except ExpiredSignatureError:
             return JsonResponse({'code': 401, 'errorInfo': 'Token过期'}, status=401)
         except InvalidTokenError:
             return JsonResponse({'code': 401, 'errorInfo': 'Token无效'}, status=401)
         except Exception as e:
             return JsonResponse({'code': 500, 'errorInfo': f'验证异常: {str(e)}'}, status=500)
+
+        self.token_cache.set(token, payload)
+        request.jwt_payload = payload
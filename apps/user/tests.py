@@ -1 +1,107 @@
 
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.user.captcha_pool import captcha_pool
+from apps.user.middleware import compile_white_list
+from apps.user.models import SysUser
+from apps.user.username_index import username_bloom, username_exists
+
+
+@override_settings(CAPTCHA_POOL_SIZE=5, CAPTCHA_POOL_LOW_WATERMARK=0, CAPTCHA_POOL_WORKERS=0)
+class CaptchaPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        captcha_pool.clear()
+
+    def test_pool_hit_and_fallback(self):
+        self.assertEqual(captcha_pool.refill(), 5)
+        self.assertEqual(captcha_pool.refill(), 0)
+        before = captcha_pool.stats()
+
+        response = self.client.get('/api/user/captcha/').json()
+        self.assertTrue(response['base64str'].startswith('data:image/png;base64,'))
+        self.assertEqual(len(cache.get(f"captcha_{response['captcha_token']}")), 4)
+
+        captcha_pool.clear()
+        self.assertEqual(self.client.get('/api/user/captcha/').json()['code'], 200)
+        stats = captcha_pool.stats()
+        self.assertEqual(stats['hits'] - before['hits'], 1)
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+
+    def test_refill_in_spawned_workers(self):
+        self.addCleanup(captcha_pool.shutdown)
+        self.assertEqual(captcha_pool.refill(workers=1), 5)
+        self.assertEqual(captcha_pool._executor._mp_context.get_start_method(), 'spawn')
+        captcha_pool.shutdown()
+        self.assertIsNone(captcha_pool._executor)
+
+    @override_settings(CAPTCHA_POOL_LOW_WATERMARK=1)
+    def test_refill_releases_only_own_lock(self):
+        with mock.patch('apps.user.captcha_pool.threading.Thread') as thread:
+            self.assertTrue(captcha_pool.maybe_refill())
+        token = thread.call_args.kwargs['args'][0]
+        # 补充超过锁超时，锁已被其他进程重新获取
+        cache.set(captcha_pool.LOCK_KEY, 'other')
+        captcha_pool._refill_and_release(token)
+        self.assertEqual(cache.get(captcha_pool.LOCK_KEY), 'other')
+        cache.set(captcha_pool.LOCK_KEY, token)
+        captcha_pool._refill_and_release(token)
+        self.assertIsNone(cache.get(captcha_pool.LOCK_KEY))
+
+
+class WhiteListTests(SimpleTestCase):
+    def test_exact_entries(self):
+        white_list = compile_white_list(settings.JWT_WHITE_LIST)
+        self.assertTrue(white_list.match('/api/metrics'))
+        self.assertTrue(white_list.match('/api/blog/articles/'))
+        self.assertFalse(white_list.match('/api/metrics-admin/'))
+        self.assertFalse(white_list.match('/api/metrics/'))
+
+
+class CaptchaConsumeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_captcha_can_only_be_used_once(self):
+        cache.set('captcha_token-1', 'Ab3d', timeout=300)
+        data = {'username': 'nobody', 'password': 'x', 'captcha': 'ab3d', 'captcha_token': 'token-1'}
+        first = self.client.post('/api/user/login/', data, content_type='application/json').json()
+        self.assertEqual(first['errorInfo'], '用户名或密码错误')
+        second = self.client.post('/api/user/login/', data, content_type='application/json').json()
+        self.assertEqual(second['errorInfo'], '验证码已过期')
+
+
+class UsernameBloomTests(TestCase):
+    def setUp(self):
+        username_bloom.rebuild()
+
+    def test_definite_miss_skips_database(self):
+        SysUser.objects.create(username='alice')
+        with self.assertNumQueries(0):
+            self.assertFalse(username_exists('bob'))
+        with self.assertNumQueries(1):
+            self.assertTrue(username_exists('alice'))
+
+    def test_rename_is_indexed(self):
+        user = SysUser.objects.create(username='alice')
+        user.username = 'carol'
+        user.save()
+        self.assertTrue(username_bloom.might_contain('carol'))
+        self.assertTrue(username_exists('carol'))
+        self.assertFalse(username_exists('alice'))
+
+    def test_add_during_rebuild_is_kept(self):
+        build_bits = username_bloom.build_bits
+
+        def slow_build(usernames):
+            bits = build_bits(usernames)
+            username_bloom.add('dave')  # 重建过程中改名，写到了旧位图
+            return bits
+
+        with mock.patch.object(username_bloom, 'build_bits', slow_build):
+            username_bloom.rebuild()
+        self.assertTrue(username_bloom.might_contain('dave'))
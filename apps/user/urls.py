@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from apps.user.views import LoginView, AvatarView, SysUserViewSet, CaptchaView, RegisterView
+from apps.user.views import LoginView, AvatarView, SysUserViewSet, CaptchaView, RegisterView, BootstrapView, \
+    CaptchaPoolView
 
 router = DefaultRouter()
 router.register('', SysUserViewSet, basename='user')  # 使用复数形式表示资源集合
@@ -10,6 +11,8 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),  # 登录路由
     path('register/', RegisterView.as_view(), name='register'),
     path('captcha/', CaptchaView.as_view(), name='captcha'),
+    path('captcha-pool/', CaptchaPoolView.as_view(), name='captcha-pool'),  # 验证码池监控
     path('update-avatar/', AvatarView.as_view(), name='update-avatar'),  # 头像更新路由
+    path('me/bootstrap/', BootstrapView.as_view(), name='bootstrap'),  # 当前用户角色和菜单
     path('', include(router.urls)),  # 包含 DRF 路由
 ]
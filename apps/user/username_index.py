@@ -0,0 +1,242 @@
+import hashlib
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from apps.user.models import SysUser
+from djangoAdmin.utils.redis_ops import get_client, incr_with_ttl, is_redis
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'user:bloom:stats:{}'  # 判定结果计数：negative / confirmed / false_positive
+STATS_TTL = 30 * 24 * 3600
+STATS_FLUSH_EVERY = 100  # 每个进程累计这么多次判定后写一次缓存
+
+
+# 写入用户名的各个位；重建进行中时同时记入待补写列表，重建结束后补写到新位图（脚本原子执行，不会漏记）
+ADD_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call('SETBIT', KEYS[1], ARGV[i], 1)
+end
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('RPUSH', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+_add_script = None
+
+
+def bloom_size(capacity, fp_rate):
+    """按预期元素数量和误判率计算位数 m 和哈希函数个数 k"""
+    bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+
+class UsernameBloom:
+    """用户名布隆过滤器
+    判定“不存在”是确定的，可以跳过数据库；判定“可能存在”再用 SQL 确认。
+    位图与 Redis 的 SETBIT 布局一致（每个字节高位在前），Redis 可用时所有进程共享一份，
+    否则每个进程在内存中各自构建。删除或改名后的旧用户名仍会被判为“可能存在”，定期重建即可清除。
+    Redis 中的位图缺失时在后台线程重建，重建完成前一律判为“可能存在”（查库）；
+    重建期间写入的用户名先记入待补写列表，新位图替换旧位图后补写，避免把已存在的用户判为不存在。
+    """
+    KEY = 'user:bloom'
+    BUILDING_KEY = 'user:bloom:building'
+    REBUILDING_KEY = 'user:bloom:rebuilding'  # 存在时 add 同时写入 PENDING_KEY
+    PENDING_KEY = 'user:bloom:pending'
+    LOCK_KEY = 'user:bloom:lock'
+    LOCK_TIMEOUT = 300
+
+    def __init__(self, capacity=None, fp_rate=None):
+        self.capacity = capacity or settings.USERNAME_BLOOM_CAPACITY
+        self.fp_rate = fp_rate or settings.USERNAME_BLOOM_FP_RATE
+        self.size, self.hash_count = bloom_size(self.capacity, self.fp_rate)
+        self._local = None  # 非 Redis 环境下的进程内位图
+        self._building = None  # 进程内重建期间写入的用户名
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = {}
+
+    def positions(self, username):
+        # 双重哈希：一次 blake2b 得到两个 64 位整数，组合出 k 个位置
+        digest = hashlib.blake2b(username.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    # ---------- 构建 ----------
+
+    def build_bits(self, usernames):
+        bits = bytearray((self.size + 7) // 8)
+        for username in usernames:
+            for position in self.positions(username):
+                bits[position >> 3] |= 0x80 >> (position & 7)
+        return bits
+
+    def rebuild(self):
+        """从 sys_user 全量重建，返回写入的用户名数量"""
+        shared = is_redis()
+        if shared:
+            client = get_client()
+            marker, pending = cache.make_key(self.REBUILDING_KEY), cache.make_key(self.PENDING_KEY)
+            client.delete(pending)
+            client.set(marker, 1, ex=self.LOCK_TIMEOUT)
+        else:
+            with self._lock:
+                self._building = []
+
+        max_id = SysUser.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        usernames = SysUser.objects.filter(id__lte=max_id).values_list('username', flat=True).iterator(chunk_size=5000)
+        count = 0
+
+        def counted():
+            nonlocal count
+            for username in usernames:
+                count += 1
+                yield username
+
+        bits = self.build_bits(counted())
+        if shared:
+            building_key, key = cache.make_key(self.BUILDING_KEY), cache.make_key(self.KEY)
+            client.set(building_key, bytes(bits))
+            client.rename(building_key, key)
+            # 先删标记再取列表：之后的 add 直接写新位图，之前的都已记入列表
+            client.delete(marker)
+            late = [username.decode() for username in client.lrange(pending, 0, -1)]
+            client.delete(pending)
+        else:
+            with self._lock:
+                late, self._building = self._building, None
+                self._local = bits
+
+        # 重建期间新注册、改名的用户补写进去
+        late += SysUser.objects.filter(id__gt=max_id).values_list('username', flat=True)
+        for username in late:
+            self.add(username)
+        return count
+
+    def _rebuild_shared(self):
+        """Redis 中的位图不存在（首次使用、被清空或淘汰、位数配置变化）时加锁，在后台线程重建"""
+        if not cache.add(self.LOCK_KEY, 1, timeout=self.LOCK_TIMEOUT):
+            return False  # 其他进程正在重建
+        threading.Thread(target=self._rebuild_and_release, name='username-bloom-rebuild', daemon=True).start()
+        return True
+
+    def _rebuild_and_release(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('重建用户名过滤器失败')
+        finally:
+            cache.delete(self.LOCK_KEY)
+            connections.close_all()
+
+    def _ensure_local(self):
+        # 非 Redis 环境（开发、测试）没有其他进程共享位图，首次使用时在当前进程构建
+        if self._local is None:
+            with self._build_lock:
+                if self._local is None:
+                    self.rebuild()
+
+    # ---------- 读写 ----------
+
+    def add(self, username):
+        global _add_script
+        positions = self.positions(username)
+        if not is_redis():
+            with self._lock:
+                if self._building is not None:
+                    self._building.append(username)
+                if self._local is not None:
+                    for position in positions:
+                        self._local[position >> 3] |= 0x80 >> (position & 7)
+            return
+        if _add_script is None:
+            _add_script = get_client().register_script(ADD_SCRIPT)
+        _add_script(keys=[cache.make_key(self.KEY), cache.make_key(self.REBUILDING_KEY),
+                          cache.make_key(self.PENDING_KEY)], args=[username, *positions])
+
+    def might_contain(self, username):
+        positions = self.positions(username)
+        if not is_redis():
+            self._ensure_local()
+            return all(self._local[position >> 3] & (0x80 >> (position & 7)) for position in positions)
+
+        # 位图长度和各个位在一次往返中读取；长度不符说明位图缺失或配置已变化，先查库并在后台重建
+        pipe = get_client().pipeline(transaction=False)
+        key = cache.make_key(self.KEY)
+        pipe.strlen(key)
+        for position in positions:
+            pipe.getbit(key, position)
+        length, *bits = pipe.execute()
+        if length != (self.size + 7) // 8:
+            self._rebuild_shared()
+            return True
+        return all(bits)
+
+    # ---------- 误判率统计 ----------
+
+    def record(self, outcome):
+        with self._lock:
+            self._pending[outcome] = self._pending.get(outcome, 0) + 1
+            if sum(self._pending.values()) < STATS_FLUSH_EVERY:
+                return
+            pending, self._pending = self._pending, {}
+        self._flush(pending)
+
+    def _flush(self, pending):
+        try:
+            for outcome, amount in pending.items():
+                incr_with_ttl(STATS_KEY.format(outcome), STATS_TTL, amount)
+        except Exception:
+            logger.exception('写入用户名过滤器统计失败')
+
+    def stats(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self._flush(pending)
+        counts = cache.get_many([STATS_KEY.format(outcome) for outcome in ('negative', 'confirmed', 'false_positive')])
+        negative, confirmed, false_positive = (counts.get(STATS_KEY.format(outcome), 0)
+                                               for outcome in ('negative', 'confirmed', 'false_positive'))
+        return {
+            'bits': self.size,
+            'hashCount': self.hash_count,
+            'capacity': self.capacity,
+            'negative': negative,
+            'confirmed': confirmed,
+            'falsePositive': false_positive,
+            # 实际不存在的用户名中被误判为“可能存在”的比例
+            'falsePositiveRate': round(false_positive / (negative + false_positive), 6)
+            if negative + false_positive else None,
+        }
+
+
+username_bloom = UsernameBloom()
+
+
+def username_exists(username):
+    """用户名是否已存在：过滤器判定不存在时不查库"""
+    try:
+        maybe = username_bloom.might_contain(username)
+    except Exception:
+        logger.exception('读取用户名过滤器失败')
+        maybe = True
+    if not maybe:
+        username_bloom.record('negative')
+        return False
+    exists = SysUser.objects.filter(username=username).exists()
+    username_bloom.record('confirmed' if exists else 'false_positive')
+    return exists
+
+
+def on_user_saved(sender, instance, **kwargs):
+    """新建用户、修改用户名后写入过滤器（旧用户名无法删除，只会增加误判）"""
+    try:
+        username_bloom.add(instance.username)
+    except Exception:
+        logger.exception('写入用户名过滤器失败')
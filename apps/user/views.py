@@ -1,18 +1,15 @@
-import base64
 import hashlib
 import json
 import os
-import secrets
 import uuid
 from datetime import datetime
 
-from captcha.image import ImageCaptcha
 from django.core.cache import cache
 from django.http import JsonResponse
 
 from djangoAdmin.utils.pagination import paginate_queryset
+from djangoAdmin.utils.redis_ops import consume_once
 from django.db import IntegrityError
-from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from rest_framework.decorators import action
@@ -22,27 +19,21 @@ from rest_framework import viewsets, status
 from rest_framework.views import APIView
 
 from djangoAdmin import settings
-from apps.menu.models import SysRoleMenu, SysMenu, SysMenuSerializer
+from apps.menu.permissions import HasMenuPerm
+from apps.menu.services import get_user_permissions, invalidate_users
 from apps.role.models import SysUserRole
+from apps.user.captcha_pool import captcha_pool
 from apps.user.models import SysUser, SysUserSerializer
+from apps.user.username_index import username_exists
 
 
 class CaptchaView(APIView):
-    # 验证码字符集（排除易混淆字符）
-    CAPTCHA_CHARS = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKMNPQRSTUVWXYZ23456789'
-    CAPTCHA_LENGTH = 4  # 验证码长度
     TIMEOUT = 300  # 验证码有效期（秒）
 
     def get(self, request):
         try:
-            # 生成随机验证码（使用安全随机数）
-            captcha_text = ''.join(secrets.choice(self.CAPTCHA_CHARS) for _ in range(self.CAPTCHA_LENGTH))
-            # 生成验证码图片
-            image = ImageCaptcha()
-            image_data = image.generate(captcha_text)
-
-            # 转换为Base64字符串
-            base64_str = base64.b64encode(image_data.getvalue()).decode()
+            # 优先从预生成的验证码池中取，池为空时同步生成
+            captcha_text, base64_str = captcha_pool.get()
             # 生成唯一令牌并存储验证码
             captcha_token = str(uuid.uuid4())
             cache.set(f'captcha_{captcha_token}', captcha_text, timeout=self.TIMEOUT)
@@ -60,6 +51,13 @@ class CaptchaView(APIView):
             }, status=500)
 
 
+class CaptchaPoolView(APIView):
+    """GET /api/user/captcha-pool/ - 验证码池深度、命中率和补充耗时"""
+
+    def get(self, request):
+        return Response({'code': 200, 'data': captcha_pool.stats()})
+
+
 class LoginView(APIView):
     CAPTCHA_TIMEOUT = 300
 
@@ -75,12 +73,8 @@ class LoginView(APIView):
 
         # 获取缓存验证码
         try:
-            cache_key = f'captcha_{captcha_token}'
-            real_captcha = cache.get(cache_key)
-
-            # 立即删除已使用的验证码（无论对错）
-            if real_captcha:
-                cache.delete(cache_key)
+            # 原子地取出并删除验证码（无论对错只能使用一次），并发请求不会重复通过校验
+            real_captcha = consume_once(f'captcha_{captcha_token}')
 
             if not real_captcha:
                 return Response({'code': 400, 'errorInfo': '验证码已过期'},
@@ -109,89 +103,36 @@ class LoginView(APIView):
         user.login_date = now().date()
         user.save()
 
-        # 获取角色信息
-        role_list = SysUserRole.objects.filter(user_id=user.id).values('role__id', 'role__name')
-        roles = ",".join([role['role__name'] for role in role_list])
-
-        # 获取所有原始菜单ID（不经过处理）
-        raw_menu_ids = set()
-        for role in SysUserRole.objects.filter(user=user).select_related('role'):
-            raw_menu_ids.update(
-                SysRoleMenu.objects.filter(role=role.role)
-                .values_list('menu_id', flat=True)
-            )
+        # 角色和菜单树来自权限缓存（按版本号失效）
+        permissions = get_user_permissions(user.id)
+        return Response({
+            'code': 200,
+            'token': token,
+            'user': SysUserSerializer(user).data,
+            'info': '登录成功！',
+            'roles': permissions['roles'],
+            'menuList': permissions['menuList']
+        })
 
-        # 获取所有相关菜单对象（包括原始菜单及其祖先）
-        menu_map = SysMenu.objects.in_bulk(raw_menu_ids)
-        all_parent_ids = set()
-        for menu_id in raw_menu_ids:
-            all_parent_ids.update(self.get_all_parents(menu_id, menu_map))
 
-        # 合并最终需要的菜单ID（原始菜单 + 所有父级菜单）
-        final_menu_ids = raw_menu_ids.union(all_parent_ids)
+class BootstrapView(APIView):
+    """GET /api/user/me/bootstrap/ - 刷新页面后根据当前 Token 获取用户、角色和菜单，无需重新登录"""
 
-        # 查询菜单并动态过滤子菜单
-        menus = SysMenu.objects.filter(id__in=final_menu_ids).prefetch_related(
-            Prefetch('children',
-                     queryset=SysMenu.objects.filter(id__in=raw_menu_ids),  # 关键修改：只包含原始权限ID
-                     to_attr='filtered_children')
-        ).order_by('order_num')
+    def get(self, request):
+        payload = getattr(request._request, 'jwt_payload', None) or {}
+        user = SysUser.objects.filter(id=payload.get('user_id')).first()
+        if user is None:
+            return Response({'code': 401, 'errorInfo': '用户不存在'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        menu_tree = self.build_menu_tree(menus)
+        permissions = get_user_permissions(user.id)
         return Response({
             'code': 200,
-            'token': token,
             'user': SysUserSerializer(user).data,
-            'info': '登录成功！',
-            'roles': roles,
-            'menuList': menu_tree
+            'roles': permissions['roles'],
+            'roleList': permissions['roleList'],
+            'menuList': permissions['menuList']
         })
 
-        # 获取所有祖先菜单ID（包含路径上的所有父级）
-
-    def get_all_parents(self, menu_id, menu_map):
-        parents = set()
-        current_id = menu_id
-        while current_id:
-            menu = menu_map.get(current_id)
-            if not menu or not menu.parent_id:
-                break
-            parents.add(menu.parent_id)
-            current_id = menu.parent_id
-        return parents
-
-    def build_menu_tree(self, menus):
-        menu_dict = {}
-        processed_ids = set()
-
-        # 第一次遍历：创建所有节点
-        sorted_menus = sorted(menus, key=lambda x: x.order_num)
-        for menu in sorted_menus:
-            menu_data = SysMenuSerializer(menu).data
-            menu_data['children'] = []
-            menu_dict[menu.id] = menu_data
-
-        # 第二次遍历：构建树结构
-        root_menus = []
-        for menu in sorted_menus:
-            menu_data = menu_dict[menu.id]
-
-            # 处理父级关系
-            if menu.parent and menu.parent.id in menu_dict:
-                parent_data = menu_dict[menu.parent.id]
-                # 检查是否重复添加
-                if menu_data not in parent_data['children']:
-                    parent_data['children'].append(menu_data)
-                    processed_ids.add(menu.id)
-
-            # 仅当没有父级或父级不存在时作为根节点
-            if menu.id not in processed_ids:
-                root_menus.append(menu_data)
-                processed_ids.add(menu.id)
-
-        # 按order_num排序根节点
-        return sorted(root_menus, key=lambda x: x['order_num'])
-
 
 class RegisterView(APIView):
     def post(self, request):
@@ -208,12 +149,8 @@ class RegisterView(APIView):
                             status=status.HTTP_400_BAD_REQUEST)
         # 验证码校验逻辑
         try:
-            cache_key = f'captcha_{captcha_token}'
-            real_captcha = cache.get(cache_key)
-
-            # 无论验证结果如何都删除已使用的验证码
-            if real_captcha:
-                cache.delete(cache_key)
+            # 原子地取出并删除验证码（无论对错只能使用一次），并发请求不会重复通过校验
+            real_captcha = consume_once(f'captcha_{captcha_token}')
 
             if not real_captcha:
                 return Response({'code': 400, 'errorInfo': '验证码已过期'},
@@ -227,8 +164,8 @@ class RegisterView(APIView):
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         # 创建用户
         try:
-            # 检查用户名唯一性
-            if SysUser.objects.filter(username=username).exists():
+            # 检查用户名唯一性（布隆过滤器判定不存在时不查库）
+            if username_exists(username):
                 return Response({'code': 400, 'errorInfo': '用户名已存在'},
                                 status=status.HTTP_400_BAD_REQUEST)
 
@@ -279,6 +216,19 @@ class AvatarView(APIView):
 class SysUserViewSet(viewsets.ModelViewSet):
     queryset = SysUser.objects.all()
     serializer_class = SysUserSerializer
+    permission_classes = [HasMenuPerm]
+    # partial_update 是用户修改自己的密码，不做按钮权限校验
+    required_perms = {
+        'list': 'system:user:list',
+        'retrieve': 'system:user:query',
+        'create': 'system:user:add',
+        'update': 'system:user:edit',
+        'change_status': 'system:user:edit',
+        'assign_roles': 'system:user:edit',
+        'reset_password': 'system:user:resetPwd',
+        'destroy': 'system:user:remove',
+        'batch_delete': 'system:user:remove',
+    }
 
     def list(self, request, *args, **kwargs):
         query = request.query_params.get('query', '')
@@ -344,6 +294,7 @@ class SysUserViewSet(viewsets.ModelViewSet):
             id_list = json.loads(request.body.decode("utf-8"))
             SysUserRole.objects.filter(user_id__in=id_list).delete()
             SysUser.objects.filter(id__in=id_list).delete()
+            invalidate_users(*id_list)
             return Response({'code': 200, 'info': '删除成功！'})
         except Exception as e:
             return Response({'code': 500, 'errorInfo': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -353,6 +304,7 @@ class SysUserViewSet(viewsets.ModelViewSet):
             id = kwargs.get('pk')
             SysUserRole.objects.filter(user_id=id).delete()
             SysUser.objects.filter(id=id).delete()
+            invalidate_users(id)
             return Response({'code': 200, 'info': '删除成功！'})
         except Exception as e:
             return Response({'code': 500, 'errorInfo': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -381,6 +333,7 @@ class SysUserViewSet(viewsets.ModelViewSet):
             # 创建新的角色关联
             user_roles = [SysUserRole(user_id=user_id, role_id=role_id) for role_id in role_ids]
             SysUserRole.objects.bulk_create(user_roles)
+            invalidate_users(user_id)
 
             return Response({'code': 200, 'info': '角色分配成功！'})
         except Exception as e:
@@ -42,10 +42,15 @@ INSTALLED_APPS = [
     "apps.user.apps.UserConfig",
     "apps.role.apps.RoleConfig",
     "apps.menu.apps.MenuConfig",
-    "apps.blog.apps.BlogConfig"
+    "apps.blog.apps.BlogConfig",
+    "apps.statistics.apps.StatisticsConfig",
+    "apps.monitor.apps.MonitorConfig"
 ]
 
 MIDDLEWARE = [
+    "apps.monitor.middleware.RequestMetricsMiddleware",
+    "apps.monitor.middleware.TrafficRecordMiddleware",
+    "apps.monitor.middleware.ProfilerMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -146,12 +151,83 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = 'media/'
+MEDIA_CACHE_MAX_AGE = 30 * 24 * 3600  # 媒体文件浏览器缓存时间（秒）
+# 媒体文件卸载模式：None 由 Django 直接发送；'x-accel-redirect'（Nginx）或 'x-sendfile'（Apache/Lighttpd）交给前端代理发送
+MEDIA_OFFLOAD = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'  # Nginx 中对应 MEDIA_ROOT 的 internal location
 
 JWT_AUTH = {
     'JWT_EXPIRATION_DELTA': datetime.timedelta(hours=3),  # 设置有效时间为 3 小时
     'JWT_REFRESH_EXPIRATION_DELTA': datetime.timedelta(days=7),  # 设置刷新有效时间为 7 天
 }
 
+# 无需 Token 的路由前缀，以 $ 结尾的条目只匹配完整路径（JwtAuthenticationMiddleware 启动时编译为一个正则）
+JWT_WHITE_LIST = [
+    "/api/user/login/",
+    "/api/user/register/",
+    "/api/user/captcha/",
+    "/api/blog/",  # 所有/blog/前缀的路由
+    "/api/media/",  # 媒体文件
+    "/api/statistics/",
+    "/api/metrics$",  # Prometheus 抓取（视图内校验 MONITOR_METRICS_TOKEN）
+]
+JWT_VERIFIED_CACHE_SIZE = 4096  # 每个进程缓存的已验签 Token 数量
+
+# 按钮权限：拥有以下角色编码的用户跳过 perms 校验；各进程最多每隔该秒数检查一次权限版本号
+SUPER_ADMIN_ROLE_CODES = ['admin']
+PERMISSION_VERSION_CHECK_INTERVAL = 1
+
+# 验证码池：容量、低水位线（低于该数量时后台补充）、渲染进程数（0 表示在补充线程内渲染；
+# 大于 0 时每个 Web 工作进程各启动一个进程池，需要时显式开启，或用 fill_captcha_pool --workers 在进程外补充）
+CAPTCHA_POOL_SIZE = 500
+CAPTCHA_POOL_LOW_WATERMARK = 100
+CAPTCHA_POOL_WORKERS = 0
+
+# 用户名布隆过滤器：预期用户数和误判率（决定位图大小，用户数超过容量后应调大并重建）
+USERNAME_BLOOM_CAPACITY = 100000
+USERNAME_BLOOM_FP_RATE = 0.01
+
+AUTOCOMPLETE_CHECK_INTERVAL = 1  # 输入联想索引最多每隔该秒数检查一次变更
+
+# 两级缓存（进程内 LRU + Redis）：站点配置、菜单树、文章列表首页
+TIERED_CACHE_LOCAL_SIZE = 256  # 每个命名空间在进程内保留的条目数
+TIERED_CACHE_LOCAL_TTL = 5  # 进程内条目最多保留的秒数，其他进程的修改最多延迟这么久可见
+TIERED_CACHE_BETA = 1.0  # 提前过期系数，越大越早重建
+TIERED_CACHE_LOCK_TIMEOUT = 30  # 重建锁的过期秒数（持锁进程崩溃时的兜底）
+TIERED_CACHE_WAIT = 3  # 没有陈旧值时等待其他调用方重建的最长秒数
+
+# 请求指标：Server-Timing 响应头、按路由聚合的耗时直方图（/api/metrics）
+MONITOR_ENABLED = True
+MONITOR_SERVER_TIMING = True
+MONITOR_FLUSH_INTERVAL = 10  # 各进程每隔该秒数把指标增量写入 Redis
+MONITOR_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+# /api/metrics 需要 Authorization: Bearer <令牌>（Prometheus 的 authorization.credentials），未配置令牌时关闭；
+# 经反向代理转发的请求来源都是 127.0.0.1，IP 白名单只是额外限制，不能代替令牌
+MONITOR_METRICS_TOKEN = os.environ.get('MONITOR_METRICS_TOKEN')
+MONITOR_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+MONITOR_SLOW_QUERY_MS = 200  # 超过该毫秒数的 SQL 记入慢查询日志，None 关闭
+MONITOR_SLOW_QUERY_BUFFER = 1000  # 慢查询环形缓冲保留的条数
+MONITOR_SLOW_QUERY_EXPLAIN = True  # 新指纹第一次出现时执行 EXPLAIN
+
+# 流量录制：抽样记录脱敏后的请求，供 replay_traffic 重放（0 关闭）
+MONITOR_TRAFFIC_SAMPLE_RATE = 0
+MONITOR_TRAFFIC_LOG = BASE_DIR / 'logs' / 'traffic-{pid}.jsonl'  # 每个进程一个文件
+MONITOR_TRAFFIC_MAX_BYTES = 50 * 1024 * 1024  # 单个文件超过该大小后轮转
+MONITOR_TRAFFIC_BACKUP_COUNT = 5
+MONITOR_TRAFFIC_EXCLUDE = ['/api/metrics', '/api/monitor/', '/api/media/']
+MONITOR_TRAFFIC_REDACT = {'password', 'oldPassword', 'newPassword', 'captcha', 'captcha_token', 'token'}
+MONITOR_TRAFFIC_MAX_STRING = 200  # 请求体中的字符串超过该长度只保留开头
+
+# 采样分析器：通过 /api/monitor/profiler/ 或向工作进程发送信号开关
+MONITOR_PROFILER_INTERVAL = 0.01  # 采样间隔（秒）
+MONITOR_PROFILER_MAX_SECONDS = 300  # 开启后最多运行的秒数，超时自动停止
+MONITOR_PROFILER_SIGNAL = 'SIGUSR2'  # None 不注册信号
+MONITOR_PROFILER_DIR = BASE_DIR / 'logs' / 'profiles'  # 停止时结果写入该目录
+
+# 内存分析：tracemalloc 按路由和序列化器统计内存分配（开销较大，排查时开启，也可通过 /api/monitor/memory/ 开关）
+MONITOR_MEMORY_PROFILING = False
+MONITOR_MEMORY_TRACE_FRAMES = 1  # 每次分配保存的调用栈深度，越大越慢
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -169,6 +245,8 @@ CLOUDFLARE_R2_SECRET_KEY = '49ab55cb6b7e47fbf6304a0988c818b4cf543ebd2585b3018c0f
 CLOUDFLARE_R2_BUCKET_NAME = 'blog'
 CLOUDFLARE_R2_PUBLIC_URL = 'https://pub-d470eef1ae124f929afa0d8350e779c7.r2.dev'
 
+PHOTO_META_WORKERS = 4  # 照片 EXIF/尺寸/主色调解析线程数
+
 # 初始化 boto3 客户端
 s3_client = boto3.client(
     's3',
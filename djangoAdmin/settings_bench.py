@@ -0,0 +1,29 @@
+"""基准测试配置：不依赖 Redis 等外部服务，默认使用项目目录下的 SQLite 文件
+python manage.py migrate --settings=djangoAdmin.settings_bench
+python manage.py seed_benchmark_data --articles 100000 --settings=djangoAdmin.settings_bench
+python manage.py run_benchmark --settings=djangoAdmin.settings_bench
+使用本地 MySQL：BENCH_DB=mysql（库名 BENCH_DB_NAME，默认 djangoAdmin_bench，需提前创建）
+"""
+import os
+
+from djangoAdmin.settings import *  # noqa: F401,F403
+from djangoAdmin.settings import BASE_DIR, DATABASES
+
+DEBUG = False
+
+if os.environ.get('BENCH_DB', 'sqlite') == 'mysql':
+    DATABASES = {'default': {**DATABASES['default'], 'NAME': os.environ.get('BENCH_DB_NAME', 'djangoAdmin_bench')}}
+else:
+    DATABASES = {'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB_NAME', str(BASE_DIR / 'bench.sqlite3')),
+        'OPTIONS': {'timeout': 30},
+    }}
+
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# 慢查询日志会在请求内执行 EXPLAIN，基准测试时关闭，避免干扰测量
+MONITOR_SLOW_QUERY_MS = None
+
+# seed_benchmark_data 只在此标记为 True 的配置下写入数据
+BENCHMARK_DATABASE = True
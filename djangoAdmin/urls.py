@@ -17,10 +17,11 @@ Including another URLconf
 
 # from django.contrib import admin
 from django.urls import path, include, re_path
-from django.views.static import serve
 
+from apps.monitor.views import MetricsView
 from djangoAdmin import settings
-from djangoAdmin.utils.views import StatisticsView, ImageUploadView
+from djangoAdmin.utils.media import serve_media
+from djangoAdmin.utils.views import ImageUploadView, AutocompleteView
 
 urlpatterns = [
     #    path("admin/", admin.site.urls),
@@ -28,8 +29,11 @@ urlpatterns = [
     path('api/role/', include('apps.role.urls')),
     path('api/menu/', include('apps.menu.urls')),
     path('api/blog/', include('apps.blog.urls')),
-    path('api/statistics/', StatisticsView.as_view(), name='statistics'),
+    path('api/statistics/', include('apps.statistics.urls')),
+    path('api/monitor/', include('apps.monitor.urls')),
     path('api/upload-image/', ImageUploadView.as_view(), name='upload-image'),
+    path('api/autocomplete/<str:kind>/', AutocompleteView.as_view(), name='autocomplete'),
+    path('api/metrics', MetricsView.as_view(), name='metrics'),
 
-    re_path('api/media/(?P<path>.*)', serve, {'document_root': settings.MEDIA_ROOT}, name='media')
+    re_path('api/media/(?P<path>.*)', serve_media, {'document_root': settings.MEDIA_ROOT}, name='media')
 ]
@@ -0,0 +1,184 @@
+"""输入联想索引
+每个进程为标签、分类、用户名、角色名等短文本维护一份内存索引：按规范化名称排序的数组（二分查找前缀）
+加上二元组、三元组倒排表（子串匹配），查询只在内存中完成。
+数据变化通过模型信号写入缓存中的变更日志，其他进程读取日志增量更新；日志不连续时整表重建。
+"""
+import bisect
+import heapq
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from djangoAdmin.utils.redis_ops import push_capped, read_list
+
+SEQ_KEY = 'autocomplete:{}:seq'
+LOG_KEY = 'autocomplete:{}:log'
+LOG_SIZE = 1000  # 变更日志保留条数，落后更多的进程整表重建
+LOG_TTL = 7 * 24 * 3600
+
+_indexes = {}
+
+
+def normalize(text):
+    return (text or '').casefold()
+
+
+def ngrams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def index_grams(text):
+    # 二元组用于两个字符的查询，三元组用于更长的查询（倒排表更短）
+    return ngrams(text, 2) | ngrams(text, 3)
+
+
+class PrefixIndex:
+    def __init__(self, kind, model, field):
+        self.kind = kind
+        self.model = model
+        self.field = field
+        self._lock = threading.Lock()
+        self.seq = None
+        self.checked_at = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.keys = []  # 规范化名称，有序
+        self.items = []  # 与 keys 一一对应的 (id, 原始名称)
+        self.names = {}  # id -> 原始名称（当前有效的条目）
+        self.keys_by_id = {}  # id -> 规范化名称
+        self.postings = {}  # 二元组/三元组 -> array('I') 条目 id
+
+    # ---------- 构建与增量更新 ----------
+
+    def rebuild(self):
+        rows = self.model.objects.exclude(**{f'{self.field}__isnull': True}).values_list('pk', self.field)
+        seq = cache.get(SEQ_KEY.format(self.kind)) or 0
+        with self._lock:
+            self._reset()
+            pairs = sorted((normalize(name), pk, name) for pk, name in rows)
+            self.keys = [key for key, _, _ in pairs]
+            self.items = [(pk, name) for _, pk, name in pairs]
+            for key, pk, name in pairs:
+                self.names[pk] = name
+                self.keys_by_id[pk] = key
+                for gram in index_grams(key):
+                    self.postings.setdefault(gram, array('I')).append(pk)
+            self.seq = seq
+
+    def _apply(self, op, pk, name):
+        # 有序数组中的旧条目直接删除；倒排表只追加，查询时按 names 过滤掉已删除或改名的条目
+        self.names.pop(pk, None)
+        key = self.keys_by_id.pop(pk, None)
+        if key is not None:
+            index = bisect.bisect_left(self.keys, key)
+            while index < len(self.keys) and self.keys[index] == key:
+                if self.items[index][0] == pk:
+                    del self.keys[index], self.items[index]
+                    break
+                index += 1
+        if op == 'set' and name is not None:
+            key = normalize(name)
+            index = bisect.bisect_left(self.keys, key)
+            self.keys.insert(index, key)
+            self.items.insert(index, (pk, name))
+            self.names[pk] = name
+            self.keys_by_id[pk] = key
+            for gram in index_grams(key):
+                self.postings.setdefault(gram, array('I')).append(pk)
+
+    def sync(self):
+        """最多每 AUTOCOMPLETE_CHECK_INTERVAL 秒检查一次变更序号，按日志增量更新"""
+        now = time.monotonic()
+        if self.seq is not None and now - self.checked_at < settings.AUTOCOMPLETE_CHECK_INTERVAL:
+            return
+        self.checked_at = now
+        if self.seq is None:
+            self.rebuild()
+            return
+        seq = cache.get(SEQ_KEY.format(self.kind)) or 0
+        if seq == self.seq:
+            return
+        if seq < self.seq:
+            self.rebuild()  # 缓存被清空
+            return
+        changes = sorted(entry for entry in read_list(LOG_KEY.format(self.kind)) if entry[0] > self.seq)
+        if not changes or changes[0][0] != self.seq + 1:
+            self.rebuild()  # 日志已被裁掉，无法增量追上
+            return
+        with self._lock:
+            for change_seq, op, pk, name in changes:
+                if change_seq != self.seq + 1:
+                    break  # 序号已分配但日志尚未写入，下次再追
+                self._apply(op, pk, name)
+                self.seq = change_seq
+
+    # ---------- 查询 ----------
+
+    def _add_infix(self, query, candidates, max_size):
+        if len(query) >= 2:
+            # 取最短的倒排表作为候选，再逐个校验子串
+            grams = ngrams(query, min(len(query), 3))
+            pks = min((self.postings.get(gram, ()) for gram in grams), key=len)
+        else:
+            pks = (pk for pk, _ in self.items)  # 单个字符没有二元组，顺序扫描
+        for pk in pks:
+            if len(candidates) >= max_size:
+                break
+            key = self.keys_by_id.get(pk)
+            if key is not None and pk not in candidates and query in key:
+                candidates[pk] = self.names[pk]
+
+    def search(self, text, limit=10):
+        """返回最多 limit 个 {'id', 'name'}：完全匹配 > 前缀匹配 > 子串匹配（越靠前越好），再按长度、名称排序"""
+        self.sync()
+        query = normalize(text).strip()
+        with self._lock:
+            if not query:
+                return [{'id': pk, 'name': name} for pk, name in self.items[:limit]]
+            candidates = {}
+            start = bisect.bisect_left(self.keys, query)
+            end = bisect.bisect_left(self.keys, query + '\U0010ffff')
+            # 前缀匹配总是排在子串匹配之前：前缀结果足够时不再查子串
+            for pk, name in self.items[start:min(end, start + limit * 4)]:
+                candidates[pk] = name
+            if end - start < limit:
+                self._add_infix(query, candidates, limit * 4)
+
+        def rank(item):
+            pk, name = item
+            key = normalize(name)
+            return key != query, key.find(query), len(key), key, pk
+
+        return [{'id': pk, 'name': name} for pk, name in heapq.nsmallest(limit, candidates.items(), key=rank)]
+
+
+def _publish(kind, op, pk, name):
+    cache.add(SEQ_KEY.format(kind), 0, timeout=None)
+    seq = cache.incr(SEQ_KEY.format(kind))
+    push_capped(LOG_KEY.format(kind), (seq, op, pk, name), LOG_SIZE, LOG_TTL)
+
+
+def register(kind, model, field):
+    """注册一种联想数据源并连接模型信号（在 AppConfig.ready 中调用）"""
+    _indexes[kind] = PrefixIndex(kind, model, field)
+
+    def on_save(sender, instance, **kwargs):
+        name = getattr(instance, field)
+        transaction.on_commit(lambda: _publish(kind, 'set', instance.pk, name))
+
+    def on_delete(sender, instance, **kwargs):
+        pk = instance.pk
+        transaction.on_commit(lambda: _publish(kind, 'delete', pk, None))
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f'autocomplete_{kind}_save')
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f'autocomplete_{kind}_delete')
+
+
+def get_index(kind):
+    return _indexes.get(kind)
@@ -0,0 +1,144 @@
+import mimetypes
+import mmap
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024  # mmap 分段输出的块大小
+
+
+class RangeFileWrapper:
+    """以内存映射方式按块输出文件的某个字节区间，避免把整段内容读入 Python 内存"""
+
+    def __init__(self, file, start, end, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.start = start
+        self.end = end  # 闭区间
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        position = self.start
+        while position <= self.end:
+            stop = min(position + self.chunk_size, self.end + 1)
+            # 切片直接复制出 bytes，不持有 memoryview，输出中途 close() 也能关闭 mmap
+            yield self.mapped[position:stop]
+            position = stop
+
+    def close(self):
+        self.mapped.close()
+        self.file.close()
+
+
+def _etag(statobj):
+    return f'"{int(statobj.st_mtime):x}-{statobj.st_size:x}"'
+
+
+def _parse_range(header, size):
+    """解析单个字节区间，返回 (start, end)；不支持的格式返回 None，越界抛出 ValueError"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # 多段区间等格式直接回退为整文件响应
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # bytes=-N 表示最后 N 个字节
+        length = int(last)
+        if length == 0:
+            raise ValueError
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def _offload_response(path, fullpath):
+    """交给前端代理（Nginx X-Accel-Redirect / Apache X-Sendfile）直接发送文件"""
+    response = HttpResponse()
+    # 由代理根据文件扩展名决定 Content-Type
+    del response['Content-Type']
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+    else:
+        response['X-Sendfile'] = fullpath
+    return response
+
+
+def serve_media(request, path, document_root=None):
+    """生产环境媒体文件视图
+    支持 Range 断点续传、ETag/Last-Modified 条件请求（304）、长缓存头，
+    整文件响应经 wsgi.file_wrapper 走 sendfile 零拷贝，区间响应使用 mmap 分块输出；
+    配置 MEDIA_OFFLOAD 后由前端代理负责实际的文件传输。
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(document_root or settings.MEDIA_ROOT, path)
+    try:
+        statobj = os.stat(fullpath)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('文件不存在')
+    if not os.path.isfile(fullpath):
+        raise Http404('文件不存在')
+
+    etag = _etag(statobj)
+    last_modified = statobj.st_mtime
+
+    # If-None-Match / If-Modified-Since 命中时直接返回 304
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if conditional is not None:
+        return _with_cache_headers(conditional, etag, last_modified)
+
+    if settings.MEDIA_OFFLOAD:
+        return _with_cache_headers(_offload_response(path, fullpath), etag, last_modified)
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    size = statobj.st_size
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and size and _if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return _with_cache_headers(response, etag, last_modified)
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(RangeFileWrapper(open(fullpath, 'rb'), start, end),
+                                         status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return _with_cache_headers(response, etag, last_modified)
+
+
+def _with_cache_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
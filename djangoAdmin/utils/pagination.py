@@ -1,4 +1,8 @@
+import base64
+import json
+
 from django.core.paginator import Paginator, EmptyPage
+from django.db.models import Q
 
 
 def paginate_queryset(queryset, page_num, page_size):
@@ -16,3 +20,52 @@ def paginate_queryset(queryset, page_num, page_size):
         return page, paginator.count
     except EmptyPage:
         raise ValueError('分页超出范围！')
+
+
+def encode_cursor(values):
+    """将排序键的取值编码为不透明的游标字符串"""
+    raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('游标参数无效！')
+    if not isinstance(values, list):
+        raise ValueError('游标参数无效！')
+    return values
+
+
+CURSOR_MAX_PAGE_SIZE = 200  # 游标分页每页条数上限，避免通过 limit 一次取出整张表
+
+
+def cursor_paginate(queryset, cursor, page_size, ordering=('-created_at', '-id'), max_size=CURSOR_MAX_PAGE_SIZE):
+    """基于排序键的游标分页（keyset），翻页代价与页码无关，也不需要 COUNT(*)
+    ordering 的最后一个字段必须唯一（通常为 id），page_size 限制在 [1, max_size]，返回 (当前页对象列表, 下一页游标)
+    """
+    page_size = min(max(1, int(page_size)), max_size)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(ordering):
+            raise ValueError('游标参数无效！')
+        # 按字典序构造 (a < x) OR (a = x AND b < y) ... 条件
+        conditions = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            conditions |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        queryset = queryset.filter(conditions)
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return items, next_cursor
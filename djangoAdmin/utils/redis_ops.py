@@ -0,0 +1,155 @@
+"""Redis 原子操作封装
+缓存后端为 django-redis 时直接使用 Redis 命令 / Lua 脚本，每个操作一次网络往返；
+其他缓存后端（开发、测试环境的本地内存缓存）退化为等价的 django cache 调用。
+键名与 django cache 一致（经过 cache.make_key），可与 cache.get / cache.set 混用。
+"""
+import threading
+
+from django.core.cache import cache, caches
+from redis.exceptions import ResponseError
+
+# GET 后立即 DEL（Redis < 6.2 没有 GETDEL 时使用）
+CONSUME_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('DEL', KEYS[1])
+end
+return value
+"""
+
+# 计数器首次创建时设置过期时间，之后的递增不刷新过期时间
+INCR_WITH_TTL_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value == tonumber(ARGV[1]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+# 值等于预期时才删除（释放自己持有的锁）
+DELETE_IF_EQUALS_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 多个版本号一次递增，不存在的先初始化为 ARGV[1]
+BUMP_VERSIONS_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[1], 'NX')
+    redis.call('INCR', key)
+end
+return #KEYS
+"""
+
+_scripts = {}
+_local_lock = threading.Lock()
+_has_getdel = True
+
+
+def is_redis():
+    # django.core.cache.cache 是代理对象，需要检查实际的后端类
+    return type(caches['default']).__module__.startswith('django_redis')
+
+
+def get_client():
+    """django-redis 的原生 Redis 连接"""
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _script(source):
+    script = _scripts.get(source)
+    if script is None:
+        script = _scripts[source] = get_client().register_script(source)
+    return script
+
+
+def _decode(value):
+    return None if value is None else cache.client.decode(value)
+
+
+def consume_once(key):
+    """原子地读取并删除一个键（验证码、一次性令牌），并发请求中只有一个能拿到值"""
+    global _has_getdel
+    if not is_redis():
+        with _local_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.delete(key)
+        return value
+
+    raw_key = cache.make_key(key)
+    if _has_getdel:
+        try:
+            return _decode(get_client().getdel(raw_key))
+        except ResponseError:
+            _has_getdel = False
+    return _decode(_script(CONSUME_SCRIPT)(keys=[raw_key]))
+
+
+def incr_with_ttl(key, ttl, amount=1):
+    """计数器递增，键首次创建时设置 ttl 秒过期（固定窗口计数），返回递增后的值"""
+    if not is_redis():
+        with _local_lock:
+            cache.add(key, 0, timeout=ttl)
+            try:
+                return cache.incr(key, amount)
+            except ValueError:
+                cache.set(key, amount, timeout=ttl)
+                return amount
+    return int(_script(INCR_WITH_TTL_SCRIPT)(keys=[cache.make_key(key)], args=[amount, ttl]))
+
+
+def delete_if_equals(key, expected):
+    """键的值等于 expected 时才删除，返回是否删除"""
+    if not is_redis():
+        with _local_lock:
+            if cache.get(key) == expected:
+                return cache.delete(key)
+        return False
+    # django-redis 对字符串做序列化存储，比较前按同样方式编码
+    encoded = cache.client.encode(expected)
+    return bool(_script(DELETE_IF_EQUALS_SCRIPT)(keys=[cache.make_key(key)], args=[encoded]))
+
+
+def bump_versions(keys, initial):
+    """一次往返递增多个版本号，不存在的键先初始化为 initial"""
+    if not keys:
+        return
+    if not is_redis():
+        with _local_lock:
+            for key in keys:
+                cache.add(key, initial, timeout=None)
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, initial + 1, timeout=None)
+        return
+    _script(BUMP_VERSIONS_SCRIPT)(keys=[cache.make_key(key) for key in keys], args=[initial])
+
+
+def push_capped(key, value, max_length, ttl=None):
+    """写入定长列表（最新的在前），超出 max_length 的旧元素被裁掉；一次流水线往返"""
+    if not is_redis():
+        with _local_lock:
+            items = [value] + (cache.get(key) or [])
+            cache.set(key, items[:max_length], timeout=ttl)
+        return
+    raw_key = cache.make_key(key)
+    pipe = get_client().pipeline(transaction=False)
+    pipe.lpush(raw_key, cache.client.encode(value))
+    pipe.ltrim(raw_key, 0, max_length - 1)
+    if ttl:
+        pipe.expire(raw_key, ttl)
+    pipe.execute()
+
+
+def read_list(key, limit=None):
+    """读取 push_capped 写入的列表（最新的在前）"""
+    if not is_redis():
+        items = cache.get(key) or []
+        return items[:limit] if limit else items
+    values = get_client().lrange(cache.make_key(key), 0, (limit or 0) - 1)
+    return [_decode(value) for value in values]
@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+import boto3
+from django.conf import settings
+
+S3_TIMEOUT = 30  # 秒
+DELETE_BATCH_SIZE = 1000  # DeleteObjects 单次请求的最大对象数
+
+
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """进程内复用的 R2 客户端（boto3 client 线程安全）"""
+    return boto3.client(
+        's3',
+        endpoint_url=settings.CLOUDFLARE_R2_ENDPOINT,
+        aws_access_key_id=settings.CLOUDFLARE_R2_ACCESS_KEY,
+        aws_secret_access_key=settings.CLOUDFLARE_R2_SECRET_KEY,
+        config=boto3.session.Config(
+            connect_timeout=S3_TIMEOUT,
+            read_timeout=S3_TIMEOUT
+        )
+    )
+
+
+def public_url(key):
+    return f"{settings.CLOUDFLARE_R2_PUBLIC_URL}/{settings.CLOUDFLARE_R2_BUCKET_NAME}/{key}"
+
+
+def object_key_from_url(url):
+    """从公开访问地址还原对象 Key，非本存储桶的地址返回 None"""
+    prefix = public_url('')
+    if url and url.startswith(prefix) and len(url) > len(prefix):
+        return url[len(prefix):]
+    return None
+
+
+def delete_objects(keys, before_batch=None):
+    """按 1000 个一批调用 DeleteObjects，存在删除失败的对象时抛出 RuntimeError
+    before_batch 在每次请求前调用（长任务用来续期锁）
+    """
+    keys = list(dict.fromkeys(key for key in keys if key))
+    client = get_s3_client()
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start:start + DELETE_BATCH_SIZE]
+        if before_batch:
+            before_batch()
+        result = client.delete_objects(
+            Bucket=settings.CLOUDFLARE_R2_BUCKET_NAME,
+            Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+        )
+        if errors := result.get('Errors'):
+            raise RuntimeError(f"对象删除失败: {errors[0].get('Key')} {errors[0].get('Message')}")
+    return len(keys)
@@ -0,0 +1,232 @@
+"""两级缓存
+热点数据先查进程内的 LRU（不经过网络、不反序列化），未命中再查 django cache（Redis），都没有时才重新计算。
+
+- 进程内条目最多保留 TIERED_CACHE_LOCAL_TTL 秒：失效只能清掉当前进程的本地条目，
+  其他进程最多在这么久之后才看到变化
+- 过期分两段：ttl 内为新鲜数据；之后 stale_ttl 秒内为陈旧数据，一个调用方负责重建，其他调用方直接拿陈旧值返回
+- 提前过期（XFetch）：临近过期时按上次计算耗时随机提前重建，计算越慢提前得越多，避免大量请求同时遇到过期
+- 单飞重建：同一进程内用 Event 合并并发的重建，多进程之间用缓存锁（cache.add）；
+  拿不到锁又没有陈旧值时等待其他调用方的结果，超过 TIERED_CACHE_WAIT 秒仍没有结果才自己计算
+
+共享层的键带命名空间版本号，invalidate 递增版本号使整个命名空间失效，旧条目随过期时间自然清除。
+进程内命中时返回的是同一个对象，调用方不能修改。
+"""
+import functools
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from djangoAdmin.utils.redis_ops import bump_versions, delete_if_equals
+
+VERSION_KEY = 'tiered:{}:version'
+DATA_KEY = 'tiered:{}:v{}:{}'
+LOCK_KEY = 'tiered:{}:lock:{}'
+POLL_INTERVAL = 0.05
+
+# created 为计算完成的时间戳，delta 为计算耗时（秒）
+Entry = namedtuple('Entry', 'value created ttl stale_ttl delta')
+
+_caches = {}
+
+
+class TieredCache:
+    def __init__(self, name, ttl, stale_ttl=None, local_size=None):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self.local_size = local_size
+        self._lock = threading.Lock()
+        self._local = OrderedDict()  # 键 -> (Entry, 写入本地的时间)
+        self._flights = {}  # 键 -> 正在重建的 Event
+        self._generation = 0  # 每次清空本地条目时递增，丢弃清空前开始的计算结果
+        self.stats = Counter()
+
+    # ---------- 进程内 LRU ----------
+
+    def _local_get(self, key, now):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            entry, stored_at = item
+            if now - stored_at >= settings.TIERED_CACHE_LOCAL_TTL or now >= _hard_expiry(entry):
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _local_set(self, key, entry, now, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._local[key] = (entry, now)
+            self._local.move_to_end(key)
+            while len(self._local) > (self.local_size or settings.TIERED_CACHE_LOCAL_SIZE):
+                self._local.popitem(last=False)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+            self._generation += 1
+
+    # ---------- 共享层 ----------
+
+    def _version(self):
+        key = VERSION_KEY.format(self.name)
+        version = cache.get(key)
+        if version is None:
+            # 与权限版本号一样以毫秒时间戳初始化，缓存被清空后不会复用旧版本号
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def _shared_key(self, key):
+        return DATA_KEY.format(self.name, self._version(), key)
+
+    # ---------- 读取 ----------
+
+    def get(self, key, compute):
+        """返回 key 对应的值，缓存中没有或需要刷新时调用 compute() 重建"""
+        key = str(key)
+        now = time.time()
+        entry = self._local_get(key, now)
+        if entry is not None and _fresh(entry, now):
+            self.stats['local_hits'] += 1
+            return entry.value
+
+        shared_key = self._shared_key(key)
+        entry = cache.get(shared_key)
+        if entry is not None:
+            self._local_set(key, entry, now)
+            if _fresh(entry, now):
+                self.stats['shared_hits'] += 1
+                return entry.value
+        stale = entry if entry is not None and now < _hard_expiry(entry) else None
+        return self._refresh(key, shared_key, compute, stale)
+
+    def _refresh(self, key, shared_key, compute, stale):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+
+        if not leader:
+            # 本进程已有线程在重建
+            if stale is not None:
+                self.stats['stale'] += 1
+                return stale.value
+            self.stats['waits'] += 1
+            flight.wait(settings.TIERED_CACHE_WAIT)
+            entry = self._local_get(key, time.time())
+            if entry is not None:
+                return entry.value
+            return self._compute(key, shared_key, compute)
+
+        try:
+            lock_key = LOCK_KEY.format(self.name, key)
+            token = uuid.uuid4().hex
+            if cache.add(lock_key, token, timeout=settings.TIERED_CACHE_LOCK_TIMEOUT):
+                try:
+                    return self._compute(key, shared_key, compute)
+                finally:
+                    delete_if_equals(lock_key, token)
+            # 其他进程在重建
+            if stale is not None:
+                self.stats['stale'] += 1
+                return stale.value
+            self.stats['waits'] += 1
+            deadline = time.monotonic() + settings.TIERED_CACHE_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                entry = cache.get(shared_key)
+                if entry is not None:
+                    self._local_set(key, entry, time.time())
+                    return entry.value
+            return self._compute(key, shared_key, compute)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.set()
+
+    def _compute(self, key, shared_key, compute):
+        self.stats['computes'] += 1
+        generation = self._generation
+        start = time.perf_counter()
+        value = compute()
+        now = time.time()
+        entry = Entry(value, now, self.ttl, self.stale_ttl, time.perf_counter() - start)
+        cache.set(shared_key, entry, timeout=self.ttl + self.stale_ttl)
+        self._local_set(key, entry, now, generation)
+        return value
+
+    # ---------- 失效 ----------
+
+    def invalidate(self):
+        """整个命名空间失效：递增共享层版本号并清空本进程的本地条目"""
+        bump_versions([VERSION_KEY.format(self.name)], int(time.time() * 1000))
+        self.clear_local()
+
+    def info(self):
+        with self._lock:
+            return {'name': self.name, 'localSize': len(self._local), **self.stats}
+
+
+def _hard_expiry(entry):
+    return entry.created + entry.ttl + entry.stale_ttl
+
+
+def _fresh(entry, now):
+    """XFetch：now - delta * beta * ln(rand) 越过过期时间即提前重建；rand 取 (0, 1]"""
+    early = -entry.delta * settings.TIERED_CACHE_BETA * math.log(1 - random.random())
+    return now + early < entry.created + entry.ttl
+
+
+def get_cache(name):
+    return _caches.get(name)
+
+
+def register(name, ttl, stale_ttl=None, local_size=None):
+    cache_ = _caches[name] = TieredCache(name, ttl, stale_ttl, local_size)
+    return cache_
+
+
+def invalidate(*names):
+    for name in names:
+        _caches[name].invalidate()
+
+
+def clear_local():
+    """清空本进程所有命名空间的本地条目（测试中 cache.clear() 之后使用）"""
+    for cache_ in _caches.values():
+        cache_.clear_local()
+
+
+def cached(name, ttl, stale_ttl=None, key=None, local_size=None):
+    """函数结果放入两级缓存；key(*args, **kwargs) 生成缓存键，默认用参数拼接
+    被装饰的函数带有 .cache（TieredCache）和 .invalidate()
+    """
+    cache_ = register(name, ttl, stale_ttl, local_size)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else _default_key(args, kwargs)
+            return cache_.get(cache_key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache_
+        wrapper.invalidate = cache_.invalidate
+        return wrapper
+
+    return decorator
+
+
+def _default_key(args, kwargs):
+    parts = [str(arg) for arg in args] + [f'{name}={value}' for name, value in sorted(kwargs.items())]
+    return ':'.join(parts) or '-'
@@ -1,6 +1,4 @@
 from django.http import JsonResponse
-from apps.blog.models import Article, Tag, Category
-from apps.user.models import SysUser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -8,34 +6,24 @@ import uuid
 import boto3
 from django.conf import settings
 
+from djangoAdmin.utils.autocomplete import get_index
 
-class StatisticsView(APIView):
-    """系统数据统计视图
-    GET /api/statistics/ - 获取系统核心数据指标
+
+class AutocompleteView(APIView):
+    """输入联想（管理后台下拉框）
+    GET /api/autocomplete/<kind>/?prefix=&limit= - kind 为 tag / category / user / role
     """
+    MAX_LIMIT = 50
 
-    def get(self, request):
+    def get(self, request, kind):
+        index = get_index(kind)
+        if index is None:
+            return Response({'code': 404, 'errorInfo': f'不支持的联想类型: {kind}'}, status=status.HTTP_404_NOT_FOUND)
         try:
-            user_total = SysUser.objects.count()
-            article_total = Article.objects.count()
-            tag_total = Tag.objects.count()
-            category_total = Category.objects.count()
-
-            return Response({
-                'code': status.HTTP_200_OK,
-                'data': {
-                    'user_total': user_total,
-                    'article_total': article_total,
-                    'tag_total': tag_total,
-                    'category_total': category_total
-                }
-            })
-
-        except Exception as e:
-            return Response({
-                'code': status.HTTP_500_INTERNAL_SERVER_ERROR,
-                'error': f'数据统计失败: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            limit = min(int(request.query_params.get('limit', 10)), self.MAX_LIMIT)
+        except ValueError:
+            return Response({'code': 400, 'errorInfo': 'limit 参数无效'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'code': 200, 'data': index.search(request.query_params.get('prefix', ''), limit)})
 
 
 class ImageUploadView(APIView):